@@ -0,0 +1,37 @@
+"""
+Helpers for triggers returning multiple events, see the `run_all` and
+`stream` functions.
+"""
+
+from itertools import islice
+
+import numpy as np
+
+EVENT_DTYPE = np.dtype(
+    [("significance", "f8"), ("changepoint", "i8"), ("triggertime", "i8")]
+)
+
+
+def events(entries=()):
+    """
+    Returns a structured array of events from (significance, changepoint,
+    trigger time) triples.
+    """
+    return np.array(list(entries), dtype=EVENT_DTYPE)
+
+
+def advance(samples, n: int):
+    """
+    Advances an iterator of samples by `n` steps.
+    """
+    next(islice(samples, n, n), None)
+
+
+def as_list(chunk):
+    """
+    Converts a chunk of data, such as a numpy array or a memoryview, to a list
+    of python numbers, which are faster to iterate over.
+    """
+    if hasattr(chunk, "tolist"):
+        return chunk.tolist()
+    return list(chunk)
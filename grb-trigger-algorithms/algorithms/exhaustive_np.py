@@ -0,0 +1,115 @@
+"""
+A NumPy counterpart to `algorithms.exhaustive_true`, with the same results.
+At each step all the interval lengths are tested at once. Since background is
+constant, the smallest count passing threshold over each interval length is
+computed in advance, and exact significances are only computed for intervals
+passing this test.
+"""
+
+from math import floor, sqrt
+
+import numpy as np
+
+from algorithms import significance
+
+# maximum number of (step, interval length) pairs tested at once.
+BLOCK_SIZE = 2**20
+
+
+def critical_counts(b: float, threshold: float, hmax: int):
+    """
+    Returns an array `crit` such that `crit[h]` is the smallest count over an
+    interval of length `h` which passes threshold. `crit[0]` is unused.
+    """
+    crit = np.zeros(hmax + 1, dtype=np.int64)
+    for h in range(1, hmax + 1):
+        bh = b * h
+        # counts must be greater than b * h + threshold * sqrt(b * h) to be tested.
+        n = floor(bh + threshold * sqrt(bh)) + 1
+        width = 16
+        while True:
+            ns = np.arange(n, n + width)
+            passed = significance.cache.lookup(ns, bh) > threshold
+            if np.any(passed):
+                break
+            n += width
+            width *= 2
+        crit[h] = n + np.argmax(passed)
+    return crit
+
+
+def init(
+    threshold: float,
+    b: float,
+    hmax: int | None = None,
+    skip: int = 0,
+):
+    """
+    A vectorized exhaustive search algorithm. Same arguments and results of
+    `algorithms.exhaustive_true.init`.
+
+    Args:
+        threshold: a threshold value in units of standard deviations.
+        b: the background rate.
+        hmax: maximum interval length tested. must be greater than 0.
+        skip: number of initial iterations to skip. must be greater or equal 0.
+
+    Returns:
+        a trigger function. you run this on your data.
+    """
+
+    def critical(length):
+        # critical counts are computed once, and extended when longer data
+        # are met with hmax None.
+        nonlocal crit
+        if len(crit) <= length:
+            crit = critical_counts(b, threshold, length)
+        return crit
+
+    def run(xs: list[int]):
+        """
+        Args:
+            xs: a list of count data
+
+        Returns:
+            A 3-tuple: significance value (std. devs), trigger interval's length,
+            and stopping iteration (trigger time).
+        """
+        xs = np.asarray(xs)
+        if len(xs) <= skip + 1:
+            return 0.0, max(len(xs), 1), max(len(xs) - 1, 0)
+        # sums[k] is the sum of the first k counts after skip.
+        sums = np.zeros(len(xs) - skip + 1, dtype=np.int64)
+        np.cumsum(xs[skip:], out=sums[1:])
+        # at step t, intervals of length 1, .., t - skip are tested.
+        steps = len(xs) - skip
+        hlen = steps - 1 if hmax is None else min(hmax, steps - 1)
+        hs = np.arange(1, hlen + 1)
+        crit_hs = critical(hlen)[1 : hlen + 1]
+        block = max(BLOCK_SIZE // hlen, 1)
+        for u0 in range(1, steps, block):
+            us = np.arange(u0, min(u0 + block, steps))
+            # ns[i, j] is the count over the last hs[j] data at step us[i].
+            starts = us[:, np.newaxis] + 1 - hs
+            ns = sums[us + 1, np.newaxis] - sums[np.maximum(starts, 0)]
+            passed = (ns >= crit_hs) & (starts > 0)
+            for i in np.flatnonzero(np.any(passed, axis=1)).tolist():
+                (js,) = np.nonzero(passed[i])
+                stdevs = np.array(
+                    [
+                        significance.cache(n, bh)
+                        for n, bh in zip(ns[i, js].tolist(), (b * hs[js]).tolist())
+                    ]
+                )
+                k = np.argmax(stdevs)
+                if stdevs[k] > threshold:
+                    t = int(us[i]) + skip
+                    return stdevs[k], t - int(hs[js[k]]) + 1, t
+        return 0.0, len(xs), len(xs) - 1
+
+    if (hmax is not None) and hmax <= 0:
+        raise ValueError("hmax must be either None or a positive integer.")
+    if skip < 0:
+        raise ValueError("skip must be a non negative integer.")
+    crit = critical_counts(b, threshold, hmax) if hmax else np.zeros(1, np.int64)
+    return run
@@ -5,16 +5,13 @@ An exhaustive search algorithm.
 from collections import deque
 from math import sqrt
 
-import scipy.special as sps
+from algorithms.significance import significance
 
 
 def sign(n, b, threshold):
     if n > b + threshold * sqrt(b):
-        # compute poisson partition function
-        pvalue = sps.pdtrc(n, b)
-        # converts to standard deviations
-        stdevs = -sps.ndtri(pvalue)
-        return stdevs
+        # poisson significance in standard deviations, memoized.
+        return significance(n, b)
     return 0.0
 
 
@@ -2,10 +2,18 @@
 Conventional algorithms with simple moving average background estimate.
 """
 
-from collections import deque
 from functools import reduce
-from itertools import islice
-from math import log, sqrt
+from math import lcm, log, sqrt
+
+import numpy as np
+
+from algorithms.events import EVENT_DTYPE, advance, as_list, events
+
+# above this period, the test schedule is computed at each step.
+MAX_SCHEDULE_PERIOD = 2**16
+# vectorized significances may differ from the exact ones by a few ulps.
+# steps within this tolerance from threshold are checked again, exactly.
+BLOCK_TOLERANCE = 1e-6
 
 
 def sign(n, b):
@@ -14,11 +22,21 @@ def sign(n, b):
     return 0.0
 
 
-def sumdq(d, n, h):
+def schedule(hs, gs):
     """
-    no slice for deques. equivalent to sum(d[n - h:n]])
+    Precomputes the tests to run at each phase of the period lcm(hs).
+    a test over timescale h with offset g runs when (t + 1) % h == g.
+
+    Returns:
+        the period and a list with the timescales to test at each phase, in the
+        same order of hs.
     """
-    return sum(islice(d, n - h, n))
+    period = lcm(*hs)
+    if period > MAX_SCHEDULE_PERIOD:
+        return None, None
+    return period, [
+        tuple(h for h, g in zip(hs, gs) if phase % h == g) for phase in range(period)
+    ]
 
 
 def init(
@@ -40,9 +58,128 @@ def init(
             all values in gs must be smaller than respective values in hs.
 
     Returns:
-        a trigger function. you run this on your data.
+        a trigger function. you run this on your data. the function's
+        `run_all` attribute runs the trigger over the whole data, resetting
+        after each trigger. the `run_block` attribute runs the trigger over
+        many light curves at once.
     """
 
+    def search(samples):
+        # a ring buffer of prefix sums. `prefix[k % ring]` is the sum of the
+        # first k + 1 counts, after the search started.
+        prefix = [0] * ring
+        total = 0
+        global_max = 0
+        time_offset = 0
+
+        # `u` counts the iterations since the search started, `t` is the index
+        # of the sample in the data.
+        for u, (t, x_t) in enumerate(samples):
+            total += x_t
+            prefix[u % ring] = total
+            if u < bg_len:
+                continue
+            # background is estimated over the oldest `bg_len` data in memory.
+            start = u - buflen + 1
+            if start <= 0:
+                bkg_rate = prefix[bg_len - 1] / bg_len
+            else:
+                bkg_rate = (
+                    prefix[(start + bg_len - 1) % ring] - prefix[(start - 1) % ring]
+                ) / bg_len
+
+            if period is None:
+                scheduled_tests = [h for h, g in zip(hs, gs) if (u + 1) % h == g]
+            else:
+                scheduled_tests = phases[(u + 1) % period]
+            for h in scheduled_tests:
+                if h > u - bg_len + 1:
+                    continue
+                x = total - prefix[(u - h) % ring]
+                significance = sign(x, bkg_rate * h)
+                if significance > global_max:
+                    global_max = significance
+                    time_offset = -h
+
+            if global_max > threshold_llr:
+                return sqrt(2 * global_max), t + time_offset + 1, t
+        return None
+
+    def scheduled(u):
+        if period is None:
+            return [h for h, g in zip(hs, gs) if (u + 1) % h == g]
+        return phases[(u + 1) % period]
+
+    def exact_step(sums, u):
+        # same computations of `search`, at a single step. `sums[k]` is the
+        # sum of the first k counts.
+        start = max(u - buflen + 1, 0)
+        bkg_rate = (sums[start + bg_len] - sums[start]) / bg_len
+        step_max, time_offset = 0.0, 0
+        for h in scheduled(u):
+            if h > u - bg_len + 1:
+                continue
+            significance = sign(sums[u + 1] - sums[u + 1 - h], bkg_rate * h)
+            if significance > step_max:
+                step_max, time_offset = significance, -h
+        return step_max, time_offset
+
+    def run_block(xs):
+        """
+        A vectorized counterpart to `run`, for offline use. Window sums are
+        computed over all data at once, with cumulative sums.
+
+        Args:
+            xs: a 2D array of count data, one light curve per row. a 1D array
+            is treated as a single light curve.
+
+        Returns:
+            A structured array with fields significance value (std. devs),
+            changepoint, and stopping iteration (trigger time), one entry per
+            row. if `xs` is 1D, a 3-tuple like `run`.
+        """
+        xs = np.asarray(xs)
+        if xs.ndim == 1:
+            return tuple(run_block(xs[np.newaxis, :])[0].tolist())
+        nrows, length = xs.shape
+        out = np.zeros(nrows, dtype=EVENT_DTYPE)
+        out["changepoint"] = length
+        out["triggertime"] = length - 1
+        if length <= bg_len:
+            return out
+
+        sums = np.zeros((nrows, length + 1), dtype=np.int64)
+        np.cumsum(xs, axis=1, out=sums[:, 1:])
+        # background estimates for steps u = bg_len, .., length - 1.
+        starts = np.maximum(np.arange(bg_len, length) - buflen + 1, 0)
+        bkg_rate = (sums[:, starts + bg_len] - sums[:, starts]) / bg_len
+
+        # `best[:, u - bg_len]` is the largest significance tested at step u.
+        best = np.zeros((nrows, length - bg_len))
+        for h, g in set(zip(hs, gs)):
+            # first step u such that (u + 1) % h == g and h <= u - bg_len + 1.
+            lo = bg_len + h - 1
+            us = np.arange(lo + (g - lo - 1) % h, length, h)
+            if not len(us):
+                continue
+            steps = slice(us[0] - bg_len, None, h)
+            n = sums[:, us + 1] - sums[:, us + 1 - h]
+            b = bkg_rate[:, steps] * h
+            with np.errstate(divide="ignore", invalid="ignore"):
+                significance = np.where(n > b, n * np.log(n / b) - (n - b), 0.0)
+            np.maximum(best[:, steps], significance, out=best[:, steps])
+
+        candidates = best > threshold_llr - BLOCK_TOLERANCE
+        for row in np.flatnonzero(np.any(candidates, axis=1)):
+            row_sums = sums[row].tolist()
+            for u in np.flatnonzero(candidates[row]).tolist():
+                step_max, time_offset = exact_step(row_sums, u + bg_len)
+                if step_max > threshold_llr:
+                    t = u + bg_len
+                    out[row] = sqrt(2 * step_max), t + time_offset + 1, t
+                    break
+        return out
+
     def run(xs: list[int]):
         """
         Args:
@@ -52,34 +189,30 @@ def init(
             A 3-tuple: significance value (std. devs), trigger interval's length,
             and stopping iteration (trigger time).
         """
-        observations_buffer = deque(maxlen=buflen)
-        global_max = 0
-        time_offset = 0
+        event = search(enumerate(as_list(xs)))
+        if event is None:
+            return 0, len(xs), len(xs) - 1
+        return event
+
+    def run_all(xs: list[int], dead_time: int = 0):
+        """
+        Runs over the whole data, resetting after each trigger. The background
+        estimate is acquired anew after each reset.
+
+        Args:
+            xs: a list of count data
+            dead_time: number of iterations skipped after each trigger.
 
-        for t, x_t in enumerate(xs):
-            observations_buffer.append(x_t)
-            if t >= bg_len:
-                bkg_rate = sumdq(observations_buffer, bg_len, bg_len) / bg_len
-                #  TODO: improve the next line
-                #  it is not optimal but it's ok here since
-                #  i'm not much concerned with the speed of this implementation.
-                #  if you are looking for an efficient implementation, check
-                #  algorithms_c/benchmark/
-                scheduled_tests = [
-                    (h, g) for (h, g) in zip(hs, gs) if h <= t - bg_len + 1
-                ]
-                for h, g in scheduled_tests:
-                    if (t + 1) % h == g:
-                        x = sumdq(observations_buffer, min(buflen, t + 1), h)
-                        b = bkg_rate * h
-                        significance = sign(x, b)
-                        if significance > global_max:
-                            global_max = significance
-                            time_offset = -h
-
-                if global_max > threshold**2 / 2:
-                    return sqrt(2 * global_max), t + time_offset + 1, t
-        return 0, t + 1, t
+        Returns:
+            A structured array of events, with fields significance value
+            (std. devs), changepoint, and stopping iteration (trigger time).
+        """
+        out = []
+        samples = enumerate(as_list(xs))
+        while (event := search(samples)) is not None:
+            out.append(event)
+            advance(samples, dead_time)
+        return events(out)
 
     if len(hs) != len(gs):
         raise ValueError("hs and gs must have same length")
@@ -87,6 +220,13 @@ def init(
     if not reduce((lambda x, y: x * y), [g < h for (h, g) in zip(hs, gs)]):
         raise ValueError("offsets must be smaller then respective timescales")
     buflen = fg_len + bg_len
+    if max(hs) > buflen:
+        raise ValueError("timescales must not be greater than fg_len + bg_len")
+    ring = buflen + 1
+    period, phases = schedule(hs, gs)
+    threshold_llr = threshold**2 / 2
+    run.run_all = run_all
+    run.run_block = run_block
     return run
 
 
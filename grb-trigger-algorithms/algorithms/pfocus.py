@@ -2,32 +2,112 @@
 An implementation of Poisson-FOCuS with optimizations, see Ward et al., 2023.
 """
 
+import warnings
+from array import array
 from math import inf, log, sqrt
 
+from algorithms.events import advance, as_list, events
 
-class Curve:
-    def __init__(self, x: float, b: float, t: int, m: float):
-        self.x = x
-        self.b = b
-        self.t = t
-        self.m = m
 
-
-def ymax(curve, acc):
-    x = acc.x - curve.x
-    b = acc.b - curve.b
+def ymax(x, b):
+    """
+    returns the maximum of a curve with `x` counts over `b` background.
+    """
     assert x > b
     return x * log(x / b) - (x - b)
 
 
-def dominate(p, q, acc):
+class CurveStack:
     """
-    returns if p dominates q
+    A fixed-capacity stack of curves, see `Stack` in algorithms_c/pfocus_c.
+    Curves are stored in a ring buffer of parallel arrays, so that pushing
+    and popping curves creates no new objects. When the stack is full, pushing
+    a curve drops the oldest one and the overflow is counted.
     """
-    area = (acc.x - p.x) * (acc.b - q.b) - (acc.x - q.x) * (acc.b - p.b)
-    if area > 0:
-        return +1
-    return -1
+
+    __slots__ = ("x", "b", "t", "m", "head", "tail", "capacity", "overflows")
+
+    def __init__(self, capacity: int):
+        """
+        Args:
+            capacity: maximum number of curves, including the tail curve.
+        """
+        if capacity < 3:
+            raise ValueError("capacity must be greater than 2.")
+        self.x = array("d", bytes(8 * (capacity + 1)))
+        self.b = array("d", bytes(8 * (capacity + 1)))
+        self.t = array("q", bytes(8 * (capacity + 1)))
+        self.m = array("d", bytes(8 * (capacity + 1)))
+        self.head = 0
+        self.tail = 0
+        self.capacity = capacity
+        self.overflows = 0
+
+    def __len__(self):
+        return (self.head - self.tail) % (self.capacity + 1)
+
+    def empty(self):
+        return self.head == self.tail
+
+    def full(self):
+        if self.head == self.capacity:
+            return self.tail == 0
+        return self.head + 1 == self.tail
+
+    def prev(self, i):
+        return self.capacity if i == 0 else i - 1
+
+    def push(self, x, b, t, m):
+        head = self.head
+        if (self.tail == 0) if head == self.capacity else (head + 1 == self.tail):
+            self.tail = 0 if self.tail == self.capacity else self.tail + 1
+            self.x[self.tail] = inf
+            self.b[self.tail] = 0.0
+            self.t[self.tail] = 0
+            self.m[self.tail] = 0.0
+            self.overflows += 1
+            if self.overflows == 1:
+                warnings.warn(
+                    "Curve stack overflow, dropping the oldest curve. "
+                    "Consider increasing the stack capacity."
+                )
+        self.x[head] = x
+        self.b[head] = b
+        self.t[head] = t
+        self.m[head] = m
+        self.head = 0 if head == self.capacity else head + 1
+
+    def pop(self):
+        """
+        returns the index of the popped curve. the curve stays valid until
+        the next push.
+        """
+        assert not self.empty()
+        self.head = self.capacity if self.head == 0 else self.head - 1
+        return self.head
+
+    def peek(self):
+        assert not self.empty()
+        return self.capacity if self.head == 0 else self.head - 1
+
+    def reset(self):
+        self.head = 0
+        self.tail = 0
+        self.push(inf, 0.0, 0, 0.0)
+        self.push(0.0, 0.0, 0, 0.0)
+
+    def drop_older(self, t):
+        """
+        drops the curves created before `t`, from the oldest.
+        """
+        i = 0 if self.tail == self.capacity else self.tail + 1
+        while i != self.head and self.t[i] < t:
+            self.tail = i
+            self.x[i] = inf
+            self.b[i] = 0.0
+            self.t[i] = 0
+            self.m[i] = 0.0
+            i = 0 if i == self.capacity else i + 1
 
 
 class Focus:
@@ -35,24 +115,37 @@ class Focus:
         self,
         threshold_std: float,
         mu_min: float = 1.0,
+        capacity: int = 64,
+        t_max: int | None = None,
     ):
         """
         Args:
             threshold_std: threshold value in standard deviations.
             mu_min: mumin value.
+            capacity: maximum number of curves held in memory.
+            t_max: maximum changepoint duration. if given, curves older
+            than `t_max` are dropped at update, and only changepoints
+            younger than `t_max` are tested. disabled by default.
         """
         if mu_min < 1:
             raise ValueError("mumin must be greater or equal 1.0")
         if threshold_std <= 0:
             raise ValueError("threshold must be greater than 0.")
+        if t_max is not None and t_max < 1:
+            raise ValueError("t_max must be greater than 0.")
 
         self.ab_crit = 1 if mu_min == 1 else (mu_min - 1) / log(mu_min)
         self.threshold_llr = threshold_std**2 / 2
+        self.t_max = t_max
         self.global_max = None
         self.time_offset = None
-        self.curve_list = []
-        self.curve_list.append(Curve(inf, 0.0, 0, 0.0))
-        self.curve_list.append(Curve(0, 0.0, 0, 0.0))
+        self.curves = CurveStack(capacity)
+        self.curves.reset()
+
+    def reset(self):
+        self.global_max = None
+        self.time_offset = None
+        self.curves.reset()
 
     def __call__(
         self,
@@ -81,34 +174,171 @@ class Focus:
                 return sqrt(2 * self.global_max), -self.time_offset + t + 1, t
         return 0.0, len(xs) + 1, len(xs)
 
+    def run_all(
+        self,
+        xs: list[int],
+        bs: list[float],
+        dead_time: int = 0,
+    ):
+        """
+        Runs over the whole data, resetting after each trigger.
+
+        Args:
+            xs: a list of count data
+            bs: a list of background values
+            dead_time: number of iterations skipped after each trigger.
+
+        Returns:
+            A structured array of events, with fields significance value
+            (std. devs), changepoint, and stopping iteration (trigger time).
+
+        Raises:
+            ValueError: if zero background is passed to the update function.
+        """
+        out = []
+        samples = enumerate(zip(xs, bs))
+        self.global_max = 0.0
+        self.time_offset = 0
+        for t, (x_t, b_t) in samples:
+            if b_t <= 0:
+                raise ValueError("background rate must be greater than zero.")
+            self.update(x_t, b_t)
+            if self.global_max > self.threshold_llr:
+                out.append((sqrt(2 * self.global_max), -self.time_offset + t + 1, t))
+                self.reset()
+                self.global_max = 0.0
+                self.time_offset = 0
+                advance(samples, dead_time)
+        return events(out)
+
+    def stream(self, chunks, dead_time: int = 0):
+        """
+        Runs over a stream of data chunks, resetting after each trigger.
+        The state is kept across chunks, so that data can be processed as
+        they come, e.g. one telemetry packet at a time.
+
+        Args:
+            chunks: an iterable of (counts, backgrounds) pairs. counts and
+            backgrounds are sequences such as lists, numpy arrays or
+            memoryviews. a single number is accepted as background.
+            dead_time: number of iterations skipped after each trigger.
+
+        Yields:
+            A 3-tuple for each trigger: significance value (std. devs),
+            changepoint, and trigger time. times are counted from the start of
+            the stream.
+
+        Raises:
+            ValueError: if zero background is passed to the update function.
+        """
+        update = self.update
+        self.global_max = 0.0
+        self.time_offset = 0
+        chunk_start = 0
+        resume = 0
+        for xs, bs in chunks:
+            xs = as_list(xs)
+            bs = [bs] * len(xs) if isinstance(bs, (int, float)) else as_list(bs)
+            i = resume - chunk_start
+            while i < len(xs):
+                j = max(i, 0)
+                for t, (x_t, b_t) in enumerate(zip(xs[j:], bs[j:]), chunk_start + j):
+                    if b_t <= 0:
+                        raise ValueError("background rate must be greater than zero.")
+                    update(x_t, b_t)
+                    if self.global_max > self.threshold_llr:
+                        yield sqrt(2 * self.global_max), -self.time_offset + t + 1, t
+                        self.reset()
+                        self.global_max = 0.0
+                        self.time_offset = 0
+                        resume = t + 1 + dead_time
+                        i = resume - chunk_start
+                        break
+                else:
+                    break
+            chunk_start += len(xs)
+
     def update(self, x, b):
-        p = self.curve_list.pop(-1)
-        acc = Curve(p.x + x, p.b + b, p.t + 1, p.m)
-        while dominate(p, self.curve_list[-1], acc) <= 0:
-            p = self.curve_list.pop(-1)
-
-        if (acc.x - p.x) > self.ab_crit * (acc.b - p.b):
-            acc.m = p.m + ymax(p, acc)
-            self.maximize(p, acc)
-            self.curve_list.append(p)
-            self.curve_list.append(acc)
+        """
+        Steps the curve stack with a new count and background value.
+
+        Returns:
+            The stack index of the curve right below the new accumulator. The
+            curves above it were popped, see `algorithms.pfocus_profile`.
+        """
+        curves = self.curves
+        cx, cb, capacity = curves.x, curves.b, curves.capacity
+        # pops the accumulator, see `CurveStack.pop` and `CurveStack.peek`.
+        i = curves.head - 1 if curves.head else capacity
+        j = i - 1 if i else capacity
+        px, pb = cx[i], cb[i]
+        qx, qb = cx[j], cb[j]
+        acc_x, acc_b, acc_t = px + x, pb + b, curves.t[i] + 1
+        # pops curves until p dominates the curve below it.
+        while (acc_x - px) * (acc_b - qb) - (acc_x - qx) * (acc_b - pb) <= 0:
+            i, px, pb = j, qx, qb
+            j = i - 1 if i else capacity
+            qx, qb = cx[j], cb[j]
+
+        x, b = acc_x - px, acc_b - pb
+        if x > self.ab_crit * b:
+            acc_m = curves.m[i] + (x * log(x / b) - (x - b))
+            curves.head = i + 1 if i != capacity else 0
+            # maximizes before pushing, as the push may drop the oldest curve.
+            self.maximize(i, acc_x, acc_b, acc_t, acc_m)
+            curves.push(acc_x, acc_b, acc_t, acc_m)
         else:
-            self.curve_list = self.curve_list[:1]
-            self.curve_list.append(Curve(0, 0.0, 0, 0.0))
-        return
-
-    def maximize(self, p, acc):
-        m = acc.m - p.m
-        i = len(self.curve_list)
-        while m + p.m >= self.threshold_llr:
+            curves.reset()
+        return i
+
+    def maximize(self, i, acc_x, acc_b, acc_t, acc_m):
+        """
+        Looks for curves over threshold, starting from the curve at `i`,
+        right below the accumulator, and moving down the stack.
+
+        Returns:
+            The number of curves tested.
+        """
+        curves = self.curves
+        if self.t_max is not None:
+            curves.drop_older(acc_t - self.t_max)
+            # all the curves were dropped, the accumulator is left.
+            if i == curves.tail:
+                return 0
+        m = acc_m - curves.m[i]
+        iterations = 0
+        while m + curves.m[i] >= self.threshold_llr:
+            iterations += 1
             if m >= self.threshold_llr:
                 self.global_max = m
-                self.time_offset = acc.t - p.t
+                self.time_offset = acc_t - curves.t[i]
+                break
+            i = curves.prev(i)
+            if i == curves.tail:
+                break
+            m = ymax(acc_x - curves.x[i], acc_b - curves.b[i])
+        return iterations
+
+    def window_maximum(self, t_max: int):
+        """
+        Returns the maximum over curves younger than `t_max`, with its
+        time offset.
+        """
+        curves = self.curves
+        a = curves.peek()
+        acc_x, acc_b, acc_t = curves.x[a], curves.b[a], curves.t[a]
+        maximum = 0.0
+        offset = 0
+        i = curves.prev(a)
+        while i != curves.tail:
+            if acc_t - curves.t[i] > t_max:
                 break
-            i -= 1
-            p = self.curve_list[i]
-            m = ymax(p, acc)
-        return
+            m = ymax(acc_x - curves.x[i], acc_b - curves.b[i])
+            if m > maximum:
+                offset = acc_t - curves.t[i]
+                maximum = m
+            i = curves.prev(i)
+        return maximum, offset
 
 
 if __name__ == "__main__":
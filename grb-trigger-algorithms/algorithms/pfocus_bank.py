@@ -0,0 +1,256 @@
+"""
+A vectorized bank of Poisson-FOCuS instances, stepping many independent
+light curves in lockstep. Curve stacks are stored in structure-of-arrays
+form, one row per light curve. Results are the same of `algorithms.pfocus`,
+stacks holding at most `capacity` curves as in `algorithms.pfocus.Focus`.
+Curve maxima are computed with `scipy.special.xlogy`, which calls the C
+library's log as `math.log` does, so that they are the same bit by bit.
+numpy's vectorized log is off by one ulp now and then, which would change
+significances and, right at the threshold, triggers.
+"""
+
+from math import log
+
+import numpy as np
+import scipy.special as sps
+
+from algorithms.events import EVENT_DTYPE
+
+NULL_CURVE = (0.0, 0.0, 0, 0.0)
+TAIL_CURVE = (np.inf, 0.0, 0, 0.0)
+
+
+class FocusBank:
+    def __init__(
+        self,
+        threshold_std: float,
+        nrows: int,
+        mu_min: float = 1.0,
+        capacity: int = 64,
+    ):
+        """
+        Args:
+            threshold_std: threshold value in standard deviations.
+            nrows: number of independent light curves.
+            mu_min: mumin value.
+            capacity: maximum number of curves held in memory, per row. when a
+            stack is full, the oldest curve is dropped, see `CurveStack`.
+        """
+        if mu_min < 1:
+            raise ValueError("mumin must be greater or equal 1.0")
+        if threshold_std <= 0:
+            raise ValueError("threshold must be greater than 0.")
+        if capacity < 3:
+            raise ValueError("capacity must be greater than 2.")
+
+        self.ab_crit = 1 if mu_min == 1 else (mu_min - 1) / log(mu_min)
+        self.threshold_llr = threshold_std**2 / 2
+        self.nrows = nrows
+        self.capacity = capacity
+        # one more column than curves, for pushing onto full stacks.
+        self.x = np.zeros((nrows, capacity + 1))
+        self.b = np.zeros((nrows, capacity + 1))
+        self.t = np.zeros((nrows, capacity + 1), dtype=np.int64)
+        self.m = np.zeros((nrows, capacity + 1))
+        self.size = np.zeros(nrows, dtype=np.int64)
+        self.global_max = np.zeros(nrows)
+        self.time_offset = np.zeros(nrows, dtype=np.int64)
+        self.reset()
+
+    def reset(self, rows=None):
+        """
+        Empties the curve stacks and the maxima of `rows`, all rows by default.
+        """
+        rows = slice(None) if rows is None else rows
+        self.x[rows, 0], self.b[rows, 0], self.t[rows, 0], self.m[rows, 0] = TAIL_CURVE
+        self.x[rows, 1], self.b[rows, 1], self.t[rows, 1], self.m[rows, 1] = NULL_CURVE
+        self.size[rows] = 2
+        self.global_max[rows] = 0.0
+        self.time_offset[rows] = 0
+
+    def __call__(self, xs, bs):
+        """
+        Args:
+            xs: a 2D array of count data, one light curve per row.
+            bs: a 2D array of background values, same shape of xs.
+
+        Returns:
+            A structured array with fields significance value (std. devs),
+            changepoint, and stopping iteration (trigger time), one entry per row.
+
+        Raises:
+            ValueError: if zero background is passed to the update function.
+        """
+        xs = np.asarray(xs)
+        bs = np.broadcast_to(bs, xs.shape)
+        nrows, length = xs.shape
+        if nrows != self.nrows:
+            raise ValueError("data rows must match the bank's size.")
+        if np.any(bs <= 0):
+            raise ValueError("background rate must be greater than zero.")
+
+        self.reset()
+        out = results(nrows)
+        out["changepoint"] = length + 1
+        out["triggertime"] = length
+        rows = np.arange(nrows)
+        for t in range(length):
+            if not len(rows):
+                break
+            self.update(xs[rows, t], bs[rows, t], rows)
+            triggered = self.global_max[rows] > self.threshold_llr
+            if np.any(triggered):
+                done = rows[triggered]
+                out["significance"][done] = np.sqrt(2 * self.global_max[done])
+                out["changepoint"][done] = t - self.time_offset[done] + 1
+                out["triggertime"][done] = t
+                rows = rows[~triggered]
+        return out
+
+    def update(self, xs, bs, rows):
+        """
+        Steps the curve stacks of `rows` with a new count and background value.
+
+        Args:
+            xs: an array of count data, one value per row in `rows`.
+            bs: an array of background values, one value per row in `rows`.
+            rows: an array of row indeces.
+        """
+        i = self.size[rows] - 1
+        acc_x = self.x[rows, i] + xs
+        acc_b = self.b[rows, i] + bs
+        acc_t = self.t[rows, i] + 1
+
+        # pops curves until p dominates the curve below it.
+        # the tail curve is never popped, since its count is infinite.
+        pending = np.arange(len(rows))
+        with np.errstate(invalid="ignore"):
+            while len(pending):
+                r, j = rows[pending], i[pending]
+                area = (acc_x[pending] - self.x[r, j]) * (
+                    acc_b[pending] - self.b[r, j - 1]
+                ) - (acc_x[pending] - self.x[r, j - 1]) * (
+                    acc_b[pending] - self.b[r, j]
+                )
+                pending = pending[area <= 0]
+                i[pending] -= 1
+
+        x = acc_x - self.x[rows, i]
+        b = acc_b - self.b[rows, i]
+        grows = x > self.ab_crit * b
+
+        # rows which do not pass the mu_min test are reset.
+        lost = rows[~grows]
+        self.x[lost, 1], self.b[lost, 1], self.t[lost, 1], self.m[lost, 1] = NULL_CURVE
+        self.size[lost] = 2
+
+        rows, i = rows[grows], i[grows]
+        x, b = x[grows], b[grows]
+        acc_m = self.m[rows, i] + (sps.xlogy(x, x / b) - (x - b))
+        self.x[rows, i + 1] = acc_x[grows]
+        self.b[rows, i + 1] = acc_b[grows]
+        self.t[rows, i + 1] = acc_t[grows]
+        self.m[rows, i + 1] = acc_m
+        self.size[rows] = i + 2
+        self.maximize(rows, i.copy())
+
+        # full stacks drop their oldest curve, see `CurveStack.push`.
+        full = rows[i + 2 > self.capacity]
+        if len(full):
+            for a in (self.x, self.b, self.t, self.m):
+                a[full, 1:-1] = a[full, 2:]
+            self.size[full] = self.capacity
+        return
+
+    def maximize(self, rows, i):
+        """
+        Looks for curves over threshold, starting from the curve at `i`,
+        right below the accumulator, and moving down the stack.
+        """
+        top = i + 1
+        m = self.m[rows, top] - self.m[rows, i]
+        p_m = self.m[rows, i]
+        pending = np.arange(len(rows))
+        while True:
+            keep = m + p_m >= self.threshold_llr
+            pending, m, p_m = pending[keep], m[keep], p_m[keep]
+            if not len(pending):
+                break
+            found = m >= self.threshold_llr
+            r = rows[pending[found]]
+            self.global_max[r] = m[found]
+            self.time_offset[r] = (
+                self.t[r, top[pending[found]]] - self.t[r, i[pending[found]]]
+            )
+            pending = pending[~found]
+            i[pending] -= 1
+            # stops at the tail curve, see `Focus.maximize`.
+            pending = pending[i[pending] > 0]
+            r, j, k = rows[pending], i[pending], top[pending]
+            x = self.x[r, k] - self.x[r, j]
+            b = self.b[r, k] - self.b[r, j]
+            m = sps.xlogy(x, x / b) - (x - b)
+            p_m = self.m[r, j]
+        return
+
+
+def results(nrows: int):
+    """
+    Returns an empty results container, with fields ordered like the outputs
+    of `Focus.__call__`.
+    """
+    return np.zeros(nrows, dtype=EVENT_DTYPE)
+
+
+def init(b: float, threshold: float, mu_min: float = 1, skip: int = 0):
+    """
+    A vectorized counterpart to `algorithms.pfocus_true.init`.
+
+    Args:
+        b: the background rate.
+        threshold: a threshold value in units of standard deviations.
+        mu_min: FOCuS mu_min parameter. defaults to 1.
+        skip: number of initial iterations to skip. must be greater or equal 0.
+
+    Returns:
+        a trigger function. you run this on a 2D array of data, one light curve
+        per row.
+    """
+
+    def run(xs):
+        """
+        Args:
+            xs: a 2D array of count data, one light curve per row.
+
+        Returns:
+            A structured array with fields significance value (std. devs),
+            changepoint, and stopping iteration (trigger time), one entry per row.
+        """
+        xs = np.asarray(xs)
+        nrows, length = xs.shape
+        bank = FocusBank(threshold, nrows, mu_min=mu_min)
+        bs = np.full(nrows, float(b))
+        out = results(nrows)
+        out["changepoint"] = length
+        out["triggertime"] = length - 1
+        rows = np.arange(nrows)
+        for t in range(skip, length):
+            if not len(rows):
+                break
+            bank.update(xs[rows, t], bs[: len(rows)], rows)
+            triggered = bank.global_max[rows] > 0
+            if np.any(triggered):
+                done = rows[triggered]
+                out["significance"][done] = np.sqrt(2 * bank.global_max[done])
+                out["changepoint"][done] = t - bank.time_offset[done] + 1
+                out["triggertime"][done] = t
+                rows = rows[~triggered]
+        return out
+
+    if b <= 0:
+        raise ValueError("background rate must be greater than zero.")
+    if mu_min < 1:
+        raise ValueError("mumin must be greater or equal 1.0")
+    if threshold <= 0:
+        raise ValueError("threshold must be greater than 0.")
+    return run
@@ -0,0 +1,766 @@
+"""
+Python bindings to the C implementation of Poisson-FOCuS, see
+algorithms_c/pfocus_c. The shared library must be compiled first, see the
+README. Arrays are passed to C without copies when they are already
+contiguous `int32` (counts) and `float64` (background) arrays. The GIL is
+released while C code runs. `FocusBank` steps many light curves per call,
+in parallel when the library is compiled with OpenMP.
+"""
+
+import ctypes
+import os
+from math import sqrt
+from pathlib import Path
+
+import numpy as np
+
+from algorithms.events import events
+from algorithms.pfocus_bank import results
+
+LIBRARY_DIR = (
+    Path(__file__).parent.parent / "algorithms_c" / "pfocus_c" / "cmake-build-release"
+)
+LIBRARY_NAMES = ("libpfocus.so", "libpfocus.dylib", "pfocus.dll")
+# see `FOCUS_MAXCURVES` in algorithms_c/pfocus_c/pfocus.h.
+FOCUS_MAXCURVES = 64
+
+
+class Curve(ctypes.Structure):
+    _fields_ = [
+        ("x", ctypes.c_int),
+        ("b", ctypes.c_double),
+        ("t", ctypes.c_int),
+        ("m", ctypes.c_double),
+    ]
+
+
+class Stack(ctypes.Structure):
+    _fields_ = [
+        ("head", ctypes.c_int),
+        ("tail", ctypes.c_int),
+        ("capacity", ctypes.c_int),
+        ("arr", ctypes.POINTER(Curve)),
+    ]
+
+
+class FocusStruct(ctypes.Structure):
+    _fields_ = [
+        ("curves", ctypes.POINTER(Stack)),
+        ("maximum", ctypes.c_double),
+        ("time_offset", ctypes.c_int),
+        ("mu_crit", ctypes.c_double),
+        ("threshold", ctypes.c_double),
+        ("t_max", ctypes.c_int),
+    ]
+
+
+class Changepoint(ctypes.Structure):
+    _fields_ = [
+        ("trigger_time", ctypes.c_size_t),
+        ("start_time", ctypes.c_size_t),
+        ("significance", ctypes.c_double),
+    ]
+
+
+class FocusDESStruct(ctypes.Structure):
+    _fields_ = [
+        ("focus", FocusStruct),
+        ("curves", Stack),
+        ("curve_buffer", Curve * (FOCUS_MAXCURVES + 1)),
+        ("buffer", ctypes.POINTER(ctypes.c_int)),
+        ("buffer_start", ctypes.c_int),
+        ("buffer_len", ctypes.c_int),
+        ("buffer_capacity", ctypes.c_int),
+        ("t", ctypes.c_long),
+        ("s_t", ctypes.c_double),
+        ("b_t", ctypes.c_double),
+        ("lambda_t", ctypes.c_double),
+        ("threshold", ctypes.c_double),
+        ("alpha", ctypes.c_double),
+        ("beta", ctypes.c_double),
+        ("m", ctypes.c_int),
+        ("mu_min", ctypes.c_double),
+        ("t_max", ctypes.c_int),
+        ("sleep", ctypes.c_int),
+        ("s_0", ctypes.c_double),
+        ("b_0", ctypes.c_double),
+    ]
+
+
+class FocusBankStruct(ctypes.Structure):
+    _fields_ = [
+        ("channels", ctypes.c_int),
+        ("capacity", ctypes.POINTER(ctypes.c_int)),
+        ("offset", ctypes.POINTER(ctypes.c_int)),
+        ("head", ctypes.POINTER(ctypes.c_int)),
+        ("tail", ctypes.POINTER(ctypes.c_int)),
+        ("x", ctypes.POINTER(ctypes.c_int)),
+        ("b", ctypes.POINTER(ctypes.c_double)),
+        ("t", ctypes.POINTER(ctypes.c_int)),
+        ("m", ctypes.POINTER(ctypes.c_double)),
+        ("maximum", ctypes.POINTER(ctypes.c_double)),
+        ("time_offset", ctypes.POINTER(ctypes.c_int)),
+        ("mu_crit", ctypes.c_double),
+        ("threshold", ctypes.c_double),
+    ]
+
+
+CURVE_DTYPE = np.dtype(
+    [("x", np.intc), ("b", np.float64), ("t", np.intc), ("m", np.float64)],
+    align=True,
+)
+assert CURVE_DTYPE.itemsize == ctypes.sizeof(Curve)
+
+
+def load_library(path: str | Path | None = None):
+    """
+    Loads the shared library. Looks into the release build folder, unless a
+    path is given or the environment variable `PFOCUS_C_LIBRARY` is set.
+    """
+    path = path or os.environ.get("PFOCUS_C_LIBRARY")
+    candidates = [Path(path)] if path else [LIBRARY_DIR / n for n in LIBRARY_NAMES]
+    for candidate in candidates:
+        if candidate.is_file():
+            break
+    else:
+        raise ImportError(
+            "Could not find the pfocus shared library. "
+            "Compile algorithms_c/pfocus_c in release mode, see the README."
+        )
+    lib = ctypes.CDLL(str(candidate))
+    try:
+        declare(lib)
+    except AttributeError as e:
+        # the library was compiled from older sources.
+        raise ImportError(
+            f"The pfocus shared library {candidate} is missing symbols ({e}). "
+            "Rebuild algorithms_c/pfocus_c in release mode, see the README."
+        ) from e
+    return lib
+
+
+def declare(lib):
+    """
+    Declares the argument and return types of the library's functions.
+    Raises AttributeError if a function is missing.
+    """
+    lib.stack_init.argtypes = [
+        ctypes.POINTER(Stack),
+        ctypes.c_int,
+        ctypes.c_void_p,
+    ]
+    lib.stack_init.restype = None
+    lib.focus_init.argtypes = [
+        ctypes.POINTER(FocusStruct),
+        ctypes.POINTER(Stack),
+        ctypes.c_double,
+        ctypes.c_double,
+    ]
+    lib.focus_init.restype = None
+    lib.focus_step.argtypes = [
+        ctypes.POINTER(FocusStruct),
+        ctypes.c_int,
+        ctypes.c_double,
+    ]
+    lib.focus_step.restype = None
+    lib.focus_window_maximum.argtypes = [
+        ctypes.POINTER(FocusStruct),
+        ctypes.c_int,
+        ctypes.POINTER(ctypes.c_int),
+    ]
+    lib.focus_window_maximum.restype = ctypes.c_double
+    lib.focus_run.argtypes = [
+        ctypes.POINTER(FocusStruct),
+        np.ctypeslib.ndpointer(dtype=np.intc, ndim=1, flags="C_CONTIGUOUS"),
+        np.ctypeslib.ndpointer(dtype=np.float64, ndim=1, flags="C_CONTIGUOUS"),
+        ctypes.c_size_t,
+    ]
+    lib.focus_run.restype = ctypes.c_size_t
+    lib.focus_interface.argtypes = [
+        ctypes.c_double,
+        ctypes.c_double,
+        np.ctypeslib.ndpointer(dtype=np.intc, ndim=1, flags="C_CONTIGUOUS"),
+        np.ctypeslib.ndpointer(dtype=np.float64, ndim=1, flags="C_CONTIGUOUS"),
+        ctypes.c_size_t,
+    ]
+    lib.focus_interface.restype = Changepoint
+    lib.focus_bank_init.argtypes = [
+        ctypes.POINTER(FocusBankStruct),
+        ctypes.c_int,
+        np.ctypeslib.ndpointer(dtype=np.intc, ndim=1, flags="C_CONTIGUOUS"),
+        ctypes.c_double,
+        ctypes.c_double,
+    ]
+    lib.focus_bank_init.restype = ctypes.c_int
+    lib.focus_bank_free.argtypes = [ctypes.POINTER(FocusBankStruct)]
+    lib.focus_bank_free.restype = None
+    lib.focus_bank_reset.argtypes = [ctypes.POINTER(FocusBankStruct), ctypes.c_int]
+    lib.focus_bank_reset.restype = None
+    lib.focus_bank_step.argtypes = [
+        ctypes.POINTER(FocusBankStruct),
+        np.ctypeslib.ndpointer(dtype=np.intc, ndim=1, flags="C_CONTIGUOUS"),
+        np.ctypeslib.ndpointer(dtype=np.float64, ndim=1, flags="C_CONTIGUOUS"),
+    ]
+    lib.focus_bank_step.restype = None
+    lib.focus_bank_run.argtypes = [
+        ctypes.POINTER(FocusBankStruct),
+        np.ctypeslib.ndpointer(dtype=np.intc, ndim=2, flags="C_CONTIGUOUS"),
+        np.ctypeslib.ndpointer(dtype=np.float64, ndim=2, flags="C_CONTIGUOUS"),
+        ctypes.c_size_t,
+        np.ctypeslib.ndpointer(dtype=np.uintp, ndim=1, flags="C_CONTIGUOUS"),
+    ]
+    lib.focus_bank_run.restype = None
+    lib.focus_des_init.argtypes = [
+        ctypes.POINTER(FocusDESStruct),
+        ctypes.c_double,
+        ctypes.c_double,
+        ctypes.c_double,
+        ctypes.c_int,
+        ctypes.c_double,
+        ctypes.c_int,
+        ctypes.c_int,
+        ctypes.c_double,
+        ctypes.c_double,
+    ]
+    lib.focus_des_init.restype = ctypes.c_int
+    lib.focus_des_free.argtypes = [ctypes.POINTER(FocusDESStruct)]
+    lib.focus_des_free.restype = None
+    lib.focus_des_reset.argtypes = [ctypes.POINTER(FocusDESStruct)]
+    lib.focus_des_reset.restype = None
+    lib.focus_des_step.argtypes = [
+        ctypes.POINTER(FocusDESStruct),
+        ctypes.c_int,
+        ctypes.POINTER(ctypes.c_double),
+        ctypes.POINTER(ctypes.c_int),
+    ]
+    lib.focus_des_step.restype = ctypes.c_int
+    lib.focus_des_run.argtypes = [
+        ctypes.POINTER(FocusDESStruct),
+        np.ctypeslib.ndpointer(dtype=np.intc, ndim=1, flags="C_CONTIGUOUS"),
+        ctypes.c_size_t,
+        ctypes.POINTER(ctypes.c_size_t),
+        ctypes.POINTER(ctypes.c_double),
+        ctypes.POINTER(ctypes.c_int),
+    ]
+    lib.focus_des_run.restype = ctypes.c_int
+
+
+_lib = load_library()
+
+
+class CurveStack:
+    """
+    A view over the C curve stack, with the same interface of
+    `algorithms.pfocus.CurveStack`. Curve fields are numpy views over C memory.
+    """
+
+    def __init__(self, capacity: int):
+        self.buffer = np.zeros(capacity + 1, dtype=CURVE_DTYPE)
+        self.x = self.buffer["x"]
+        self.b = self.buffer["b"]
+        self.t = self.buffer["t"]
+        self.m = self.buffer["m"]
+        self.struct = Stack()
+        _lib.stack_init(ctypes.byref(self.struct), capacity, self.buffer.ctypes.data)
+
+    @property
+    def head(self):
+        return self.struct.head
+
+    @property
+    def tail(self):
+        return self.struct.tail
+
+    @property
+    def capacity(self):
+        return self.struct.capacity
+
+    def __len__(self):
+        return (self.head - self.tail) % (self.capacity + 1)
+
+    def prev(self, i):
+        return self.capacity if i == 0 else i - 1
+
+    def peek(self):
+        assert len(self)
+        return self.prev(self.head)
+
+
+class Focus:
+    """
+    A drop-in replacement for `algorithms.pfocus.Focus`, backed by C code.
+    """
+
+    def __init__(
+        self,
+        threshold_std: float,
+        mu_min: float = 1.0,
+        capacity: int = 64,
+        t_max: int | None = None,
+    ):
+        """
+        Args:
+            threshold_std: threshold value in standard deviations.
+            mu_min: mumin value.
+            capacity: maximum number of curves held in memory.
+            t_max: maximum changepoint duration, see `algorithms.pfocus.Focus`.
+        """
+        if mu_min < 1:
+            raise ValueError("mumin must be greater or equal 1.0")
+        if threshold_std <= 0:
+            raise ValueError("threshold must be greater than 0.")
+        if t_max is not None and t_max < 1:
+            raise ValueError("t_max must be greater than 0.")
+
+        self.threshold_std = threshold_std
+        self.mu_min = mu_min
+        self.t_max = t_max
+        self.curves = CurveStack(capacity)
+        self.struct = FocusStruct()
+        self._ref = ctypes.byref(self.struct)
+        self.reset()
+        self.threshold_llr = self.struct.threshold
+
+    def reset(self):
+        curves = self.curves
+        _lib.stack_init(
+            ctypes.byref(curves.struct),
+            curves.capacity,
+            curves.buffer.ctypes.data,
+        )
+        _lib.focus_init(
+            self._ref,
+            ctypes.byref(curves.struct),
+            self.threshold_std,
+            self.mu_min,
+        )
+        self.struct.t_max = -1 if self.t_max is None else self.t_max
+
+    @property
+    def global_max(self):
+        return self.struct.maximum
+
+    @property
+    def time_offset(self):
+        return self.struct.time_offset
+
+    def __call__(self, xs, bs):
+        """
+        Args:
+            xs: an array of count data
+            bs: an array of background values
+
+        Returns:
+            A 3-tuple: significance value (std. devs), changepoint, and
+            stopping iteration (trigger time).
+
+        Raises:
+            ValueError: if zero background is passed to the update function.
+        """
+        xs = np.ascontiguousarray(xs, dtype=np.intc)
+        bs = np.ascontiguousarray(np.broadcast_to(bs, xs.shape), dtype=np.float64)
+        if np.any(bs <= 0):
+            raise ValueError("background rate must be greater than zero.")
+        self.struct.maximum = 0.0
+        self.struct.time_offset = 0
+        t = _lib.focus_run(self._ref, xs, bs, len(xs))
+        if t < len(xs):
+            return sqrt(2 * self.global_max), -self.time_offset + t + 1, t
+        return 0.0, len(xs) + 1, len(xs)
+
+    def run_all(self, xs, bs, dead_time: int = 0):
+        """
+        Runs over the whole data, resetting after each trigger.
+
+        Args:
+            xs: an array of count data
+            bs: an array of background values
+            dead_time: number of iterations skipped after each trigger.
+
+        Returns:
+            A structured array of events, with fields significance value
+            (std. devs), changepoint, and stopping iteration (trigger time).
+
+        Raises:
+            ValueError: if zero background is passed to the update function.
+        """
+        xs = np.ascontiguousarray(xs, dtype=np.intc)
+        bs = np.ascontiguousarray(np.broadcast_to(bs, xs.shape), dtype=np.float64)
+        if np.any(bs <= 0):
+            raise ValueError("background rate must be greater than zero.")
+        out = []
+        start = 0
+        self.struct.maximum = 0.0
+        self.struct.time_offset = 0
+        while start < len(xs):
+            # contiguous slices are views, the data are not copied.
+            t = start + _lib.focus_run(
+                self._ref, xs[start:], bs[start:], len(xs) - start
+            )
+            if t == len(xs):
+                break
+            out.append((sqrt(2 * self.global_max), -self.time_offset + t + 1, t))
+            self.reset()
+            start = t + 1 + dead_time
+        return events(out)
+
+    def stream(self, chunks, dead_time: int = 0):
+        """
+        Runs over a stream of data chunks, resetting after each trigger.
+        The state is kept across chunks, so that data can be processed as
+        they come, e.g. one telemetry packet at a time.
+
+        Args:
+            chunks: an iterable of (counts, backgrounds) pairs. counts and
+            backgrounds are arrays, or anything supporting the buffer
+            protocol. a single number is accepted as background.
+            dead_time: number of iterations skipped after each trigger.
+
+        Yields:
+            A 3-tuple for each trigger: significance value (std. devs),
+            changepoint, and trigger time. times are counted from the start of
+            the stream.
+
+        Raises:
+            ValueError: if zero background is passed to the update function.
+        """
+        self.struct.maximum = 0.0
+        self.struct.time_offset = 0
+        chunk_start = 0
+        resume = 0
+        for xs, bs in chunks:
+            xs = np.ascontiguousarray(xs, dtype=np.intc)
+            bs = np.ascontiguousarray(np.broadcast_to(bs, xs.shape), dtype=np.float64)
+            if np.any(bs <= 0):
+                raise ValueError("background rate must be greater than zero.")
+            start = max(resume - chunk_start, 0)
+            while start < len(xs):
+                t = start + _lib.focus_run(
+                    self._ref, xs[start:], bs[start:], len(xs) - start
+                )
+                if t == len(xs):
+                    break
+                t = chunk_start + t
+                yield sqrt(2 * self.global_max), -self.time_offset + t + 1, t
+                self.reset()
+                resume = t + 1 + dead_time
+                start = resume - chunk_start
+            chunk_start += len(xs)
+
+    def update(self, x, b):
+        _lib.focus_step(self._ref, x, b)
+
+    def window_maximum(self, t_max: int):
+        """
+        Returns the maximum over curves younger than `t_max`, with its
+        time offset.
+        """
+        time_offset = ctypes.c_int()
+        m = _lib.focus_window_maximum(self._ref, t_max, ctypes.byref(time_offset))
+        return m, time_offset.value
+
+
+def focus_interface(xs, bs, threshold_std: float, mu_min: float = 1.0):
+    """
+    Runs the C `focus_interface`, a self-contained focus with a stack of
+    `FOCUS_MAXCURVES` curves, until the first trigger.
+
+    Args:
+        xs: an array of count data
+        bs: an array of background values, or a number.
+        threshold_std: threshold value in standard deviations.
+        mu_min: mumin value.
+
+    Returns:
+        A 3-tuple: significance value (std. devs), changepoint, and
+        stopping iteration (trigger time), as `Focus.__call__`.
+
+    Raises:
+        ValueError: if zero background is passed to the update function.
+    """
+    if mu_min < 1:
+        raise ValueError("mumin must be greater or equal 1.0")
+    if threshold_std <= 0:
+        raise ValueError("threshold must be greater than 0.")
+    xs = np.ascontiguousarray(xs, dtype=np.intc)
+    bs = np.ascontiguousarray(np.broadcast_to(bs, xs.shape), dtype=np.float64)
+    if np.any(bs <= 0):
+        raise ValueError("background rate must be greater than zero.")
+    c = _lib.focus_interface(threshold_std, mu_min, xs, bs, len(xs))
+    return c.significance, c.start_time, c.trigger_time
+
+
+class FocusBank:
+    """
+    A C-backed counterpart to `algorithms.pfocus_bank.FocusBank`, stepping all
+    rows with one call. Curves are stored in structure-of-arrays form, see
+    algorithms_c/pfocus_c/pfocus_bank.h. Unlike `algorithms.pfocus_bank`,
+    stacks are not enlarged: when a row's stack is full its oldest curve is
+    dropped, as in `Focus`.
+    """
+
+    def __init__(
+        self,
+        threshold_std: float,
+        nrows: int,
+        mu_min: float = 1.0,
+        capacity: int = 64,
+    ):
+        """
+        Args:
+            threshold_std: threshold value in standard deviations.
+            nrows: number of independent light curves.
+            mu_min: mumin value.
+            capacity: maximum number of curves held in memory, per row.
+            either a number, or a sequence with a value for each row.
+        """
+        if mu_min < 1:
+            raise ValueError("mumin must be greater or equal 1.0")
+        if threshold_std <= 0:
+            raise ValueError("threshold must be greater than 0.")
+        if nrows < 1:
+            raise ValueError("nrows must be greater than 0.")
+        capacities = np.ascontiguousarray(
+            np.broadcast_to(capacity, (nrows,)), dtype=np.intc
+        )
+        if np.any(capacities < 3):
+            raise ValueError("capacity must be greater than 2.")
+
+        self.nrows = nrows
+        self.struct = FocusBankStruct()
+        self._ref = ctypes.byref(self.struct)
+        # kept, so that the bank can be freed at interpreter exit.
+        self._free = _lib.focus_bank_free
+        if _lib.focus_bank_init(self._ref, nrows, capacities, threshold_std, mu_min):
+            raise MemoryError("could not allocate the focus bank.")
+        self.threshold_llr = self.struct.threshold
+        # views over C memory.
+        self.global_max = np.ctypeslib.as_array(self.struct.maximum, shape=(nrows,))
+        self.time_offset = np.ctypeslib.as_array(
+            self.struct.time_offset, shape=(nrows,)
+        )
+
+    def __del__(self):
+        if getattr(self, "struct", None) is not None and self.struct.channels:
+            self._free(self._ref)
+
+    def reset(self, rows=None):
+        """
+        Empties the curve stacks and the maxima of `rows`, all rows by default.
+        """
+        rows = range(self.nrows) if rows is None else np.arange(self.nrows)[rows]
+        for row in rows:
+            _lib.focus_bank_reset(self._ref, int(row))
+
+    def update(self, xs, bs):
+        """
+        Steps every row with a new count and background value. Rows over
+        threshold must be reset, see `reset`. Backgrounds are not checked,
+        and must be greater than zero.
+
+        Args:
+            xs: an array of count data, one value per row.
+            bs: an array of background values, one value per row, or a number.
+        """
+        xs = np.ascontiguousarray(xs, dtype=np.intc)
+        bs = np.ascontiguousarray(np.broadcast_to(bs, xs.shape), dtype=np.float64)
+        if xs.shape != (self.nrows,):
+            raise ValueError("data rows must match the bank's size.")
+        _lib.focus_bank_step(self._ref, xs, bs)
+
+    def __call__(self, xs, bs):
+        """
+        Args:
+            xs: a 2D array of count data, one light curve per row.
+            bs: a 2D array of background values, same shape of xs.
+
+        Returns:
+            A structured array with fields significance value (std. devs),
+            changepoint, and stopping iteration (trigger time), one entry per row.
+
+        Raises:
+            ValueError: if zero background is passed to the update function.
+        """
+        xs = np.ascontiguousarray(xs, dtype=np.intc)
+        bs = np.ascontiguousarray(np.broadcast_to(bs, xs.shape), dtype=np.float64)
+        nrows, length = xs.shape
+        if nrows != self.nrows:
+            raise ValueError("data rows must match the bank's size.")
+        if np.any(bs <= 0):
+            raise ValueError("background rate must be greater than zero.")
+
+        self.reset()
+        ts = np.empty(nrows, dtype=np.uintp)
+        _lib.focus_bank_run(self._ref, xs, bs, length, ts)
+        out = results(nrows)
+        ts = ts.astype(np.int64)
+        done = ts < length
+        out["significance"][done] = np.sqrt(2 * self.global_max[done])
+        out["changepoint"] = np.where(done, ts - self.time_offset + 1, length + 1)
+        out["triggertime"] = ts
+        return out
+
+
+class FOCuSDES:
+    """
+    A C-backed counterpart to `algorithms.pfocus_des.FOCuSDES`, with the same
+    parameters but the backend. The whole trigger runs in C: background
+    estimate, warm-up and quality control, see
+    algorithms_c/pfocus_c/pfocus_des.h.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        alpha: float,
+        beta: float,
+        m: int,
+        mu_min: float = 1.0,
+        t_max: int | None = None,
+        sleep: int | None = None,
+        s_0: float | None = None,
+        b_0: float | None = None,
+    ):
+        if alpha < 0.0:
+            raise ValueError("alpha must be non negative.")
+        if beta < 0.0:
+            raise ValueError("beta must be non negative.")
+        if mu_min < 1:
+            raise ValueError("mumin must be greater or equal 1.0")
+        if threshold <= 0:
+            raise ValueError("threshold must be greater than 0.")
+        if t_max is not None and t_max < 1:
+            raise ValueError("t_max must be greater than 0.")
+        sleep = m if sleep is None else sleep
+        if sleep < m:
+            raise ValueError("sleep must be greater or equal than m.")
+        if s_0 is not None and s_0 <= 0:
+            raise ValueError("s_0 must be greater than 0.")
+        if s_0 is None and sleep == m:
+            raise ValueError("sleep must be greater than m, if s_0 is not given.")
+
+        self.struct = FocusDESStruct()
+        self._ref = ctypes.byref(self.struct)
+        # kept, so that the trigger can be freed at interpreter exit.
+        self._free = _lib.focus_des_free
+        status = _lib.focus_des_init(
+            self._ref,
+            threshold,
+            alpha,
+            beta,
+            m,
+            mu_min,
+            -1 if t_max is None else t_max,
+            sleep,
+            0.0 if s_0 is None else s_0,
+            0.0 if b_0 is None else b_0,
+        )
+        if status == 1:
+            raise ValueError("m must be non negative.")
+        if status:
+            raise MemoryError("could not allocate the trigger.")
+        self._significance = ctypes.c_double()
+        self._offset = ctypes.c_int()
+        self._t = ctypes.c_size_t()
+
+    def __del__(self):
+        if getattr(self, "struct", None) is not None and self.struct.buffer:
+            self._free(self._ref)
+
+    def reset(self):
+        _lib.focus_des_reset(self._ref)
+
+    @property
+    def lambda_t(self):
+        return self.struct.lambda_t if self.struct.t >= self.struct.sleep else None
+
+    def stack_depth(self):
+        """
+        Returns the number of curves held.
+        """
+        curves = self.struct.curves
+        return (curves.head - curves.tail) % (curves.capacity + 1)
+
+    def step(self, x):
+        if _lib.focus_des_step(
+            self._ref, x, ctypes.byref(self._significance), ctypes.byref(self._offset)
+        ):
+            raise ValueError("background rate must be greater than zero.")
+        return self._significance.value, self._offset.value
+
+    def run_all(self, xs, dead_time: int = 0):
+        """
+        Runs over the whole data, resetting after each trigger.
+
+        Args:
+            xs: an array of count data
+            dead_time: number of iterations skipped after each trigger.
+
+        Returns:
+            A structured array of events, with fields significance value
+            (std. devs), changepoint, and stopping iteration (trigger time).
+
+        Raises:
+            ValueError: if zero background is passed to the update function.
+        """
+        xs = np.ascontiguousarray(xs, dtype=np.intc)
+        out = []
+        start = 0
+        self.reset()
+        while start < len(xs):
+            # contiguous slices are views, the data are not copied.
+            if _lib.focus_des_run(
+                self._ref,
+                xs[start:],
+                len(xs) - start,
+                ctypes.byref(self._t),
+                ctypes.byref(self._significance),
+                ctypes.byref(self._offset),
+            ):
+                raise ValueError("background rate must be greater than zero.")
+            t = start + self._t.value
+            if t == len(xs):
+                break
+            out.append((self._significance.value, t - self._offset.value + 1, t))
+            self.reset()
+            start = t + 1 + dead_time
+        return events(out)
+
+
+def init(b: float, threshold: float, mu_min: float = 1, skip: int = 0):
+    """
+    A C-backed counterpart to `algorithms.pfocus_true.init`.
+
+    Args:
+        b: the background rate.
+        threshold: a threshold value in units of standard deviations.
+        mu_min: FOCuS mu_min parameter. defaults to 1.
+        skip: number of initial iterations to skip. must be greater or equal 0.
+
+    Returns:
+        a trigger function. you run this on your data.
+    """
+
+    def run(xs):
+        """
+        Args:
+            xs: an array of count data
+
+        Returns:
+            A 3-tuple: significance value (std. devs), changepoint, and
+            stopping iteration (trigger time).
+        """
+        # the C library is not referenced here, so that this closure can be
+        # pickled and sent to worker processes.
+        significance, changepoint, t = Focus(threshold, mu_min=mu_min)(xs[skip:], b)
+        if t < len(xs) - skip:
+            return significance, changepoint + skip, t + skip
+        return 0, len(xs), len(xs) - 1
+
+    if b <= 0:
+        raise ValueError("background rate must be greater than zero.")
+    if mu_min < 1:
+        raise ValueError("mumin must be greater or equal 1.0")
+    if threshold <= 0:
+        raise ValueError("threshold must be greater than 0.")
+    return run
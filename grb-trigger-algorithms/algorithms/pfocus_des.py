@@ -6,7 +6,8 @@ exponential smoothing.
 from collections import deque
 from math import sqrt
 
-from algorithms.pfocus import Focus, ymax
+from algorithms.events import advance, as_list, events
+from algorithms.pfocus import Focus
 
 
 class FOCuSDES:
@@ -21,6 +22,7 @@ class FOCuSDES:
         sleep: int | None = None,
         s_0: float | None = None,
         b_0: float | None = None,
+        backend: type = Focus,
     ):
         """
         Args:
@@ -29,6 +31,7 @@ class FOCuSDES:
             beta: DES beta (slope) parameter
             m: background estimate delay and forecast length.
             t_max:  maximum changepoint duration, quality control.
+            curves older than t_max are dropped by FOCuS, see `Focus`.
             disabled by default.
             mu_min: FOCuS mu_min parameter. defaults to 1.
             sleep: dead time for automated s_0 initialization.
@@ -38,13 +41,16 @@ class FOCuSDES:
             defaults to averaged over first `sleep - m` counts.
             b_0: DES init slope parameter. must be greater or equal than 0.
             defaults to 0.
+            backend: a Poisson-FOCuS implementation, such as
+            `algorithms.pfocus_c.Focus`. defaults to `algorithms.pfocus.Focus`.
+            it must support `t_max`.
         """
         if alpha < 0.0:
             raise ValueError("alpha must be non negative.")
         if beta < 0.0:
             raise ValueError("beta must be non negative.")
 
-        self.focus = Focus(threshold, mu_min=mu_min)
+        self.focus = backend(threshold, mu_min=mu_min, t_max=t_max)
         self.buffer = deque([])
         self.s_t = None
         self.b_t = None
@@ -58,6 +64,14 @@ class FOCuSDES:
         self.s_0 = s_0
         self.b_0 = b_0
 
+    def reset(self):
+        self.focus.reset()
+        self.buffer.clear()
+        self.s_t = None
+        self.b_t = None
+        self.lambda_t = None
+        self.t = None
+
     def des_initialize(self):
         if self.s_0 is None:
             counts_sum = sum([self.buffer[i] for i in range(self.sleep - self.m)])
@@ -78,29 +92,6 @@ class FOCuSDES:
         self.b_t = self.beta * (self.s_t - s_t_1) + (1 - self.beta) * b_t_1
         return
 
-    def qc(self):
-        """
-        quality control.
-        called only if focus is over threshold and t_max is given.
-        it recomputes the curve stack maximum, skipping curves earlier than
-        t_max. useful with delayed background estimate.
-        TODO: this can be improved but for the purpose of the paper is ok.
-        """
-        if self.t_max is None:
-            return sqrt(2 * self.focus.global_max), self.focus.time_offset
-        max_significance = 0.0
-        offset = 0
-        acc = self.focus.curve_list.pop(-1)
-        for q in self.focus.curve_list[::-1][:-1]:
-            if acc.t - q.t > self.t_max:
-                break
-            q_max = ymax(q, acc)
-            if q_max > max_significance:
-                offset = acc.t - q.t
-                max_significance = ymax(q, acc)
-        self.focus.curve_list.append(acc)
-        return sqrt(2 * max_significance), offset
-
     def step(self, x):
         self.t = 0 if self.t is None else self.t + 1
         self.buffer.append(x)
@@ -120,15 +111,63 @@ class FOCuSDES:
             raise ValueError("background rate must be greater than zero.")
         self.focus.update(x, self.lambda_t)
         if self.focus.global_max:
-            significance, offset = self.qc()
-            return significance, offset
+            return sqrt(2 * self.focus.global_max), self.focus.time_offset
         return 0.0, 0
 
+    def stream(self, chunks, dead_time: int = 0):
+        """
+        Runs over a stream of data chunks, resetting after each trigger.
+        The state is kept across chunks, so that data can be processed as
+        they come, e.g. one telemetry packet at a time.
+
+        Args:
+            chunks: an iterable of count data chunks, such as lists, numpy
+            arrays or memoryviews.
+            dead_time: number of iterations skipped after each trigger.
+
+        Yields:
+            A 3-tuple for each trigger: significance value (std. devs),
+            changepoint, and trigger time. times are counted from the start of
+            the stream.
+
+        Raises:
+            ValueError: if zero background is passed to the update function.
+        """
+        step = self.step
+        chunk_start = 0
+        resume = 0
+        for chunk in chunks:
+            xs = as_list(chunk)
+            i = resume - chunk_start
+            while i < len(xs):
+                for t, x_t in enumerate(xs[max(i, 0) :], chunk_start + max(i, 0)):
+                    significance, offset = step(x_t)
+                    if significance:
+                        yield significance, t - offset + 1, t
+                        self.reset()
+                        resume = t + 1 + dead_time
+                        i = resume - chunk_start
+                        break
+                else:
+                    break
+            chunk_start += len(xs)
+
 
 def init(**kwargs):
     """
     For compatibility with exhaustive and conventional algorithms.
+    The returned function's `run_all` attribute runs the trigger over the
+    whole data, resetting after each trigger.
     """
+
+    def search(samples):
+        focus_des = FOCuSDES(**init_parameters)
+        for t, x_t in samples:
+            significance, offset = focus_des.step(x_t)
+            if significance:
+                return significance, t - offset + 1, t
+        return None
+
     def run(xs):
         """
         Args:
@@ -141,12 +180,33 @@ def init(**kwargs):
         Raises:
             ValueError: if zero background is passed to the update function.
         """
-        focus_des = FOCuSDES(**init_parameters)
-        for t, x_t in enumerate(xs):
-            significance, offset = focus_des.step(x_t)
-            if significance:
-                return significance, t - offset + 1, t
-        return 0.0, t + 1, t
+        event = search(enumerate(xs))
+        if event is None:
+            return 0.0, len(xs), len(xs) - 1
+        return event
+
+    def run_all(xs, dead_time: int = 0):
+        """
+        Runs over the whole data, resetting after each trigger.
+
+        Args:
+            xs: a list of count data
+            dead_time: number of iterations skipped after each trigger.
+
+        Returns:
+            A structured array of events, with fields significance value
+            (std. devs), changepoint, and stopping iteration (trigger time).
+
+        Raises:
+            ValueError: if zero background is passed to the update function.
+        """
+        out = []
+        samples = enumerate(xs)
+        while (event := search(samples)) is not None:
+            out.append(event)
+            advance(samples, dead_time)
+        return events(out)
 
     init_parameters = kwargs
+    run.run_all = run_all
     return run
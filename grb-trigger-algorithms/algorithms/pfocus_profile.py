@@ -0,0 +1,106 @@
+"""
+A profiling Poisson-FOCuS, see `algorithms.pfocus`. The number of curves
+popped and of maximization iterations depends on the data, and so does the
+time of a step. `ProfiledFocus` records their histograms, and the peak number
+of curves in the stack, so that the worst-case cost of a step can be measured.
+The C counterpart is `algorithms_c/pfocus_c/main_profile.c`, see also
+`computational_efficiency/profile_steps.py`.
+"""
+
+from time import perf_counter_ns
+
+from algorithms.pfocus import Focus
+
+# step times are binned by powers of two: bin k counts the steps lasting
+# [2**k, 2**(k+1)) nanoseconds, bin 0 includes zero.
+TIME_BINS = 64
+
+
+def trimmed(counts):
+    """
+    returns a histogram without trailing empty bins.
+    """
+    n = len(counts)
+    while n > 1 and counts[n - 1] == 0:
+        n -= 1
+    return counts[:n]
+
+
+class StepProfile:
+    """
+    Histograms of step times, curves popped and maximization iterations per
+    step, indexed by count.
+    """
+
+    __slots__ = ("steps", "step_ns", "max_ns", "pops", "iterations", "peak_curves")
+
+    def __init__(self, capacity: int):
+        self.steps = 0
+        self.step_ns = [0] * TIME_BINS
+        self.max_ns = 0
+        # counts above capacity are recorded in the last bin, as in C.
+        self.pops = [0] * (capacity + 2)
+        self.iterations = [0] * (capacity + 2)
+        self.peak_curves = 0
+
+    def record(self, ns, pops, iterations, curves):
+        self.steps += 1
+        self.step_ns[max(ns.bit_length() - 1, 0)] += 1
+        if ns > self.max_ns:
+            self.max_ns = ns
+        last = len(self.pops) - 1
+        self.pops[min(pops, last)] += 1
+        self.iterations[min(iterations, last)] += 1
+        if curves > self.peak_curves:
+            self.peak_curves = curves
+
+    def as_dict(self):
+        """
+        Returns the profile with the same fields as the C profiler's output.
+        """
+        return {
+            "steps": self.steps,
+            "peak_curves": self.peak_curves,
+            "max_ns": self.max_ns,
+            "step_ns": trimmed(self.step_ns),
+            "pops": trimmed(self.pops),
+            "iterations": trimmed(self.iterations),
+        }
+
+
+class ProfiledFocus(Focus):
+    """
+    A drop-in replacement of `algorithms.pfocus.Focus` recording a profile
+    of each update, see `StepProfile`. It can be used as a backend of
+    `algorithms.pfocus_des`. The profile is kept across resets. Counts are
+    taken from `Focus.update` and `Focus.maximize`, so that the profiled code
+    is the same of `Focus`. Step times include the profiler's overhead.
+    """
+
+    def __init__(
+        self,
+        threshold_std: float,
+        mu_min: float = 1.0,
+        capacity: int = 64,
+        t_max: int | None = None,
+    ):
+        super().__init__(threshold_std, mu_min, capacity, t_max)
+        self.profile = StepProfile(capacity)
+        # maximization iterations of the current update.
+        self.iterations = 0
+
+    def update(self, x, b):
+        curves = self.curves
+        # the accumulator, see `Focus.update`.
+        top = curves.head - 1 if curves.head else curves.capacity
+        self.iterations = 0
+        start = perf_counter_ns()
+        i = super().update(x, b)
+        elapsed = perf_counter_ns() - start
+        pops = (top - i) % (curves.capacity + 1)
+        self.profile.record(elapsed, pops, self.iterations, len(curves))
+        return i
+
+    def maximize(self, i, acc_x, acc_b, acc_t, acc_m):
+        self.iterations = super().maximize(i, acc_x, acc_b, acc_t, acc_m)
+        return self.iterations
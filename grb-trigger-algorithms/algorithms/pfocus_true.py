@@ -4,6 +4,8 @@ A wrapper to Poisson-FOCuS for running over known, constant background.
 
 from math import sqrt
 
+from algorithms import pfocus_bank
+from algorithms.events import advance, events
 from algorithms.pfocus import Focus
 
 
@@ -16,9 +18,22 @@ def init(b: float, threshold: float, mu_min: float = 1, skip: int = 0):
         skip: number of initial iterations to skip. must be greater or equal 0.
 
     Returns:
-        a trigger function. you run this on your data.
+        a trigger function. you run this on your data. the function's
+        `run_all` attribute runs the trigger over the whole data, resetting
+        after each trigger. the `run_block` attribute runs the trigger over a
+        2D array of data, one light curve per row, see `algorithms.pfocus_bank`.
     """
 
+    def search(samples):
+        focus = Focus(threshold, mu_min=mu_min)
+        for t, x_t in samples:
+            if t < skip:
+                continue
+            focus.update(x_t, b)
+            if focus.global_max:
+                return sqrt(2 * focus.global_max), t - focus.time_offset + 1, t
+        return None
+
     def run(xs: list[int]):
         """
         Args:
@@ -31,15 +46,29 @@ def init(b: float, threshold: float, mu_min: float = 1, skip: int = 0):
         Raises:
             ValueError: if zero background is passed to the update function.
         """
-        focus = Focus(threshold, mu_min=mu_min)
-        t = None
-        for t, x_t in enumerate(xs):
-            if t < skip:
-                continue
-            focus.update(x_t, b)
-            if focus.global_max:
-                return sqrt(2 * focus.global_max), t - focus.time_offset + 1, t
-        return 0, t + 1, t
+        event = search(enumerate(xs))
+        if event is None:
+            return 0, len(xs), len(xs) - 1
+        return event
+
+    def run_all(xs: list[int], dead_time: int = 0):
+        """
+        Runs over the whole data, resetting after each trigger.
+
+        Args:
+            xs: a list of count data
+            dead_time: number of iterations skipped after each trigger.
+
+        Returns:
+            A structured array of events, with fields significance value
+            (std. devs), changepoint, and stopping iteration (trigger time).
+        """
+        out = []
+        samples = enumerate(xs)
+        while (event := search(samples)) is not None:
+            out.append(event)
+            advance(samples, dead_time)
+        return events(out)
 
     if b <= 0:
         raise ValueError("background rate must be greater than zero.")
@@ -47,4 +76,6 @@ def init(b: float, threshold: float, mu_min: float = 1, skip: int = 0):
         raise ValueError("mumin must be greater or equal 1.0")
     if threshold <= 0:
         raise ValueError("threshold must be greater than 0.")
+    run.run_all = run_all
+    run.run_block = pfocus_bank.init(b, threshold, mu_min=mu_min, skip=skip)
     return run
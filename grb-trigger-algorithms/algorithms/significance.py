@@ -0,0 +1,148 @@
+"""
+Memoized Poisson significances, in standard deviations. With constant
+background, exact significance tests only meet a few background values (the
+background rate times the interval lengths) and narrow ranges of integer
+counts. Significances are stored in a table of consecutive counts for each
+background value. A table spans a limited range of counts, and counts beyond
+it are not memoized. When the tables grow over a maximum number of entries,
+the least recently used ones are evicted. Memoized values are the same of
+`poisson_significance`, bit by bit.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+import scipy.special as sps
+
+# about 32 MB of float64 values.
+MAX_ENTRIES = 2**22
+# about 512 kB of float64 values per background value.
+MAX_SPAN = 2**16
+
+
+def poisson_significance(ns, bs):
+    """
+    Significance of counts `ns` over background `bs`, not memoized.
+    Numpy arrays are accepted.
+    """
+    return -sps.ndtri(sps.pdtrc(ns, bs))
+
+
+class SignificanceCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_span: int = MAX_SPAN):
+        """
+        Args:
+            max_entries: maximum number of significances held in memory.
+            the most recently used table is always kept.
+            max_span: maximum number of counts in a table. capped to
+            `max_entries`.
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be greater than 0.")
+        if max_span <= 0:
+            raise ValueError("max_span must be greater than 0.")
+        self.max_entries = max_entries
+        self.max_span = min(max_span, max_entries)
+        # maps background values to pairs (first count, significances).
+        self.tables = OrderedDict()
+        self.entries = 0
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.tables.clear()
+        self.entries = 0
+
+    def __call__(self, n: int, b: float):
+        """
+        Args:
+            n: an integer count.
+            b: a background value.
+
+        Returns:
+            The significance of n counts over background b.
+        """
+        start, values = self.tables.get(b, (0, ()))
+        if start <= n < start + len(values):
+            self.hits += 1
+            self.tables.move_to_end(b)
+            return values[n - start]
+        start, values = self.table(b, n, n)
+        if start <= n < start + len(values):
+            return values[n - start]
+        return poisson_significance(n, b)
+
+    def lookup(self, ns, b: float):
+        """
+        Args:
+            ns: an array of integer counts.
+            b: a background value.
+
+        Returns:
+            An array with the significances of counts `ns` over background b.
+        """
+        ns = np.asarray(ns)
+        if not ns.size:
+            return np.zeros(ns.shape)
+        lo, hi = int(ns.min()), int(ns.max())
+        start, values = self.table(b, lo, hi)
+        if start <= lo and hi < start + len(values):
+            return values[ns - start]
+        # counts beyond the table's span are not memoized.
+        out = np.empty(ns.shape)
+        inside = (ns >= start) & (ns < start + len(values))
+        out[inside] = values[ns[inside] - start]
+        out[~inside] = poisson_significance(ns[~inside], b)
+        return out
+
+    def table(self, b: float, lo: int, hi: int):
+        """
+        Returns a table of significances over background b, covering counts
+        from lo to hi. Tables are extended at least twofold when needed, up to
+        `max_span` counts. If the counts span more than that, the table is
+        returned as it is, and may not cover them.
+        """
+        start, values = self.tables.get(b, (lo, np.zeros(0)))
+        end = start + len(values)
+        if start <= lo and hi < end:
+            self.hits += 1
+            self.tables.move_to_end(b)
+            return start, values
+
+        self.misses += 1
+        if len(values):
+            wanted = min(lo, start), max(hi, end - 1)
+            if lo < start:
+                lo = max(min(lo, start - len(values)), 0)
+            if hi >= end:
+                hi = max(hi, end + len(values) - 1)
+            lo, hi = min(lo, start), max(hi, end - 1)
+            if hi - lo + 1 > self.max_span:
+                lo, hi = wanted
+        if hi - lo + 1 > self.max_span:
+            return start, values
+        new_values = np.empty(hi - lo + 1)
+        new_values[start - lo : end - lo] = values
+        new_values[: start - lo] = poisson_significance(np.arange(lo, start), b)
+        new_values[end - lo :] = poisson_significance(np.arange(end, hi + 1), b)
+        self.entries += len(new_values) - len(values)
+        self.tables[b] = lo, new_values
+        self.tables.move_to_end(b)
+        while self.entries > self.max_entries and len(self.tables) > 1:
+            _, (_, evicted) = self.tables.popitem(last=False)
+            self.entries -= len(evicted)
+        return lo, new_values
+
+
+# a cache shared by all the algorithms in the same process.
+cache = SignificanceCache()
+
+
+def significance(n, b: float):
+    """
+    Memoized significance of count `n` over background `b`. Counts which are
+    not integers are not memoized.
+    """
+    if n >= 0 and float(n).is_integer():
+        return cache(int(n), b)
+    return poisson_significance(n, b)
@@ -0,0 +1,117 @@
+// pread, fdopen and mmap are POSIX.
+#define _POSIX_C_SOURCE 200809L
+
+#include <fcntl.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+#include "input.h"
+
+#define LINEIN_MAXSIZE 100
+
+static int load_text(Input *input, FILE *fp) {
+    // text inputs have a "#lambda" line, followed by one count per line.
+    char char_buffer[LINEIN_MAXSIZE];
+    if (fgets(char_buffer, LINEIN_MAXSIZE, fp) == NULL || *char_buffer != '#') {
+        fprintf(stderr, "background: missing '#lambda' line.\n");
+        return 1;
+    }
+    input->lambda = strtod(char_buffer + 1, NULL);
+
+    size_t capacity = 1 << 16, length = 0;
+    int32_t *xs = (int32_t *) malloc(capacity * sizeof(int32_t));
+    if (!xs) {
+        perror("malloc ");
+        return 2;
+    }
+    while (fgets(char_buffer, LINEIN_MAXSIZE, fp) != NULL) {
+        if (*char_buffer == '#' || *char_buffer == '\n')
+            continue;
+        if (length == capacity) {
+            capacity *= 2;
+            int32_t *grown = (int32_t *) realloc(xs, capacity * sizeof(int32_t));
+            if (!grown) {
+                perror("realloc ");
+                free(xs);
+                return 2;
+            }
+            xs = grown;
+        }
+        xs[length++] = (int32_t) strtol(char_buffer, NULL, 10);
+    }
+    input->length = length;
+    input->xs = xs;
+    input->data = xs;
+    input->data_size = capacity * sizeof(int32_t);
+    input->mapped = 0;
+    return 0;
+}
+
+static int load_binary(Input *input, int fd, size_t size) {
+    void *data = mmap(NULL, size, PROT_READ, MAP_PRIVATE, fd, 0);
+    if (data == MAP_FAILED) {
+        perror("mmap ");
+        return 2;
+    }
+    InputHeader header;
+    memcpy(&header, data, sizeof(header));
+    if (header.version != INPUT_VERSION ||
+        header.length > (size - sizeof(header)) / sizeof(int32_t)) {
+        fprintf(stderr, "input: unsupported version or truncated file.\n");
+        munmap(data, size);
+        return 3;
+    }
+    input->lambda = header.lambda;
+    input->length = header.length;
+    input->xs = (const int32_t *) ((const char *) data + sizeof(header));
+    input->data = data;
+    input->data_size = size;
+    input->mapped = 1;
+    return 0;
+}
+
+int input_load(Input *input, const char *path) {
+    // binary inputs are memory-mapped, anything else is parsed as text.
+    int fd = open(path, O_RDONLY);
+    if (fd < 0) {
+        perror("open ");
+        return 1;
+    }
+    struct stat st;
+    if (fstat(fd, &st) < 0) {
+        perror("fstat ");
+        close(fd);
+        return 1;
+    }
+    char magic[4] = {0};
+    size_t size = (size_t) st.st_size;
+    if (size >= sizeof(InputHeader) &&
+        pread(fd, magic, sizeof(magic), 0) == sizeof(magic) &&
+        memcmp(magic, INPUT_MAGIC, sizeof(magic)) == 0) {
+        int status = load_binary(input, fd, size);
+        close(fd);
+        return status;
+    }
+    FILE *fp = fdopen(fd, "r");
+    if (!fp) {
+        perror("fdopen ");
+        close(fd);
+        return 1;
+    }
+    int status = load_text(input, fp);
+    fclose(fp);
+    return status;
+}
+
+void input_free(Input *input) {
+    if (input->mapped)
+        munmap(input->data, input->data_size);
+    else
+        free(input->data);
+    input->data = NULL;
+    input->xs = NULL;
+}
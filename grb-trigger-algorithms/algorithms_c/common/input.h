@@ -0,0 +1,33 @@
+#ifndef GRB_COMMON_INPUT_H
+#define GRB_COMMON_INPUT_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+// binary inputs start with this header, followed by `length` int32 counts.
+// all values are little-endian, see `computational_efficiency/generate_data.py`.
+#define INPUT_MAGIC "GRBC"
+#define INPUT_VERSION 1
+
+typedef struct {
+    char magic[4];
+    uint32_t version;
+    double lambda;
+    uint64_t length;
+} InputHeader;
+
+typedef struct {
+    double lambda;
+    size_t length;
+    const int32_t *xs;
+    // the memory-mapped file, or the buffer allocated for text inputs.
+    void *data;
+    size_t data_size;
+    int mapped;
+} Input;
+
+int input_load(Input *input, const char *path);
+
+void input_free(Input *input);
+
+#endif //GRB_COMMON_INPUT_H
@@ -0,0 +1,97 @@
+// clock_gettime is POSIX.
+#define _POSIX_C_SOURCE 200809L
+
+#include <math.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+#include "timing.h"
+
+int timing_parse_options(TimingOptions *options, int argc, char *argv[]) {
+    // parses "--warmup W" and "--repeats N", following the input path.
+    options->warmup = TIMING_WARMUP;
+    options->repeats = TIMING_REPEATS;
+    for (int i = 2; i < argc; i++) {
+        if (i + 1 < argc && strcmp(argv[i], "--warmup") == 0)
+            options->warmup = atoi(argv[++i]);
+        else if (i + 1 < argc && strcmp(argv[i], "--repeats") == 0)
+            options->repeats = atoi(argv[++i]);
+        else {
+            fprintf(stderr, "unknown option: %s\n", argv[i]);
+            return 1;
+        }
+    }
+    if (options->warmup < 0 || options->repeats < 1) {
+        fprintf(stderr, "warmup must be non negative, repeats positive.\n");
+        return 1;
+    }
+    return 0;
+}
+
+double timing_now(void) {
+    // seconds from a monotonic clock, unaffected by system time changes.
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (double) ts.tv_sec + (double) ts.tv_nsec * 1e-9;
+}
+
+uint64_t timing_now_ns(void) {
+    // nanoseconds from the same clock, for timing short intervals.
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (uint64_t) ts.tv_sec * 1000000000u + (uint64_t) ts.tv_nsec;
+}
+
+static int compare_doubles(const void *a, const void *b) {
+    double x = *(const double *) a, y = *(const double *) b;
+    return (x > y) - (x < y);
+}
+
+void timing_summarize(TimingSummary *summary, double *seconds, int repeats) {
+    // sorts the timings in place.
+    qsort(seconds, repeats, sizeof(double), compare_doubles);
+    double sum = 0.;
+    for (int i = 0; i < repeats; i++)
+        sum += seconds[i];
+    summary->min = seconds[0];
+    summary->median = repeats % 2 ?
+                      seconds[repeats / 2] :
+                      (seconds[repeats / 2 - 1] + seconds[repeats / 2]) / 2;
+    // nearest-rank percentile.
+    int rank = (int) ceil(0.95 * repeats);
+    summary->p95 = seconds[rank - 1];
+    summary->mean = sum / repeats;
+}
+
+void print_json_string(const char *s) {
+    putchar('"');
+    for (; *s; s++) {
+        if (*s == '"' || *s == '\\')
+            putchar('\\');
+        if ((unsigned char) *s < 0x20)
+            printf("\\u%04x", (unsigned char) *s);
+        else
+            putchar(*s);
+    }
+    putchar('"');
+}
+
+void timing_print_json(
+        const char *algorithm,
+        const char *input_path,
+        size_t length,
+        double lambda,
+        const TimingOptions *options,
+        const TimingSummary *summary) {
+    // prints a json line, times are in seconds.
+    printf("{\"algorithm\": ");
+    print_json_string(algorithm);
+    printf(", \"input\": ");
+    print_json_string(input_path);
+    printf(", \"n\": %zu, \"lambda\": %.17g, \"warmup\": %d, \"repeats\": %d",
+           length, lambda, options->warmup, options->repeats);
+    printf(", \"median\": %.9g, \"p95\": %.9g, \"min\": %.9g, \"mean\": %.9g}\n",
+           summary->median, summary->p95, summary->min, summary->mean);
+}
@@ -0,0 +1,40 @@
+#ifndef GRB_COMMON_TIMING_H
+#define GRB_COMMON_TIMING_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+#define TIMING_WARMUP 1
+#define TIMING_REPEATS 10
+
+typedef struct {
+    int warmup;
+    int repeats;
+} TimingOptions;
+
+typedef struct {
+    double median;
+    double p95;
+    double min;
+    double mean;
+} TimingSummary;
+
+int timing_parse_options(TimingOptions *options, int argc, char *argv[]);
+
+double timing_now(void);
+
+uint64_t timing_now_ns(void);
+
+void timing_summarize(TimingSummary *summary, double *seconds, int repeats);
+
+void print_json_string(const char *s);
+
+void timing_print_json(
+        const char *algorithm,
+        const char *input_path,
+        size_t length,
+        double lambda,
+        const TimingOptions *options,
+        const TimingSummary *summary);
+
+#endif //GRB_COMMON_TIMING_H
@@ -1,92 +1,47 @@
 #include <stdio.h>
 #include <stdlib.h>
-#include <time.h>
 
+#include "input.h"
 #include "pfocus.h"
-
-#define LINEIN_MAXSIZE 100
-
-char char_buffer[LINEIN_MAXSIZE];
-
-size_t get_events_number(FILE *fp) {
-    // Count Lines
-    int cr = 0;
-    int iscomment = 0;
-    size_t length = 0;
-
-    while (cr != EOF) {
-        if (cr == '#')
-            iscomment = 1;
-        if (cr == '\n') {
-            if (!iscomment)
-                length++;
-            else
-                iscomment = 0;
-        }
-        cr = getc(fp);
-    }
-    rewind(fp);
-    return length;
-}
-
-int get_lambda(double *lambda, FILE *fp) {
-    if (fgets(char_buffer, LINEIN_MAXSIZE, fp) == NULL) {
-        perror("fscanf ");
-        return 1;
-    }
-    if (*char_buffer != '#') {
-        perror("background");
-        return 2;
-    }
-    *lambda = strtod(char_buffer + 1, NULL);
-    return 0;
-}
-
-int get_count(int *n, FILE *fp) {
-    if (fgets(char_buffer, LINEIN_MAXSIZE, fp) == NULL) {
-        perror("fscanf ");
-        return 1;
-    }
-    *n = (int) strtol(char_buffer, NULL, 10);
-    return 0;
-}
+#include "timing.h"
 
 int main(int argc, char *argv[]) {
-    size_t len;
-    double true_rate;
-
-    // reads file
+    // reads file, binary inputs are memory-mapped.
     if (argc == 1) {
-        perror("input ");
+        fprintf(stderr, "usage: %s INPUT [--warmup W] [--repeats N]\n", argv[0]);
         return 1;
     }
-    FILE *fp = fopen(argv[1], "r");
-    if (!fp) {
-        perror("fopen ");
+    TimingOptions options;
+    if (timing_parse_options(&options, argc, argv))
+        return 1;
+    Input input;
+    if (input_load(&input, argv[1]))
         return 2;
-    }
-    len = get_events_number(fp);
-    get_lambda(&true_rate, fp);
-    int x;
-    int *xs = (int *) malloc(len * sizeof(int));
+    const int32_t *xs = input.xs;
+    size_t len = input.length;
+    double true_rate = input.lambda;
 
-    for (size_t i = 0; i < len; i++) {
-        get_count(&x, fp);
-        xs[i] = x;
-    }
-    fclose(fp);
-
-    // initialize focus
     double threshold = 5.0, mu_min = 1.1;
     Curve curve_buffer[STACK_LEN];
     Stack curves;
     Focus focus;
-    stack_init(&curves, FOCUS_MAXCURVES, curve_buffer);
-    focus_init(&focus, &curves, threshold, mu_min);
+    double *seconds = (double *) malloc(options.repeats * sizeof(double));
+
+    // warm-up runs are not timed. each run starts from a fresh focus.
+    for (int r = -options.warmup; r < options.repeats; r++) {
+        stack_init(&curves, FOCUS_MAXCURVES, curve_buffer);
+        focus_init(&focus, &curves, threshold, mu_min);
+        double start = timing_now();
+        for (size_t i = 0; i < len; i++)
+            focus_step(&focus, xs[i], true_rate);
+        if (r >= 0)
+            seconds[r] = timing_now() - start;
+    }
 
-    clock_t start_clk = clock();
-    for (size_t i = 0; i < len; i++)
-        focus_step(&focus, xs[i], true_rate);
-    printf("%Lg s.\n", (clock() - start_clk) / (long double) CLOCKS_PER_SEC);
+    TimingSummary summary;
+    timing_summarize(&summary, seconds, options.repeats);
+    timing_print_json("pfocus", argv[1], len, true_rate, &options, &summary);
+    free(seconds);
+    input_free(&input);
     return 0;
 }
@@ -0,0 +1,54 @@
+#include <stdio.h>
+#include <stdlib.h>
+
+#include "input.h"
+#include "pfocus_des.h"
+#include "timing.h"
+
+int main(int argc, char *argv[]) {
+    // reads file, binary inputs are memory-mapped.
+    if (argc == 1) {
+        fprintf(stderr, "usage: %s INPUT [--warmup W] [--repeats N]\n", argv[0]);
+        return 1;
+    }
+    TimingOptions options;
+    if (timing_parse_options(&options, argc, argv))
+        return 1;
+    Input input;
+    if (input_load(&input, argv[1]))
+        return 2;
+    const int32_t *xs = input.xs;
+    size_t len = input.length;
+
+    // the parameters of `realdata.py`. the background is estimated, so the
+    // input's background rate is not used.
+    FocusDES focus_des;
+    if (focus_des_init(&focus_des, 5.0, 0.002, 0.0, 250, 1.1, 250, 1062, 0., 0.)) {
+        fprintf(stderr, "could not initialize focus-des.\n");
+        return 3;
+    }
+    double significance;
+    int offset;
+    double *seconds = (double *) malloc(options.repeats * sizeof(double));
+
+    // warm-up runs are not timed. each run starts from a fresh trigger, and
+    // the trigger is reset after each trigger.
+    for (int r = -options.warmup; r < options.repeats; r++) {
+        focus_des_reset(&focus_des);
+        double start = timing_now();
+        for (size_t i = 0; i < len; i++) {
+            if (focus_des_step(&focus_des, xs[i], &significance, &offset) || significance)
+                focus_des_reset(&focus_des);
+        }
+        if (r >= 0)
+            seconds[r] = timing_now() - start;
+    }
+
+    TimingSummary summary;
+    timing_summarize(&summary, seconds, options.repeats);
+    timing_print_json("pfocus_des", argv[1], len, input.lambda, &options, &summary);
+    free(seconds);
+    focus_des_free(&focus_des);
+    input_free(&input);
+    return 0;
+}
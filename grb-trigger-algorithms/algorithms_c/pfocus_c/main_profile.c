@@ -0,0 +1,84 @@
+#include <stdio.h>
+#include <stdint.h>
+
+#include "input.h"
+#include "pfocus.h"
+#include "timing.h"
+
+// step times are binned by powers of two: bin k counts the steps lasting
+// [2^k, 2^(k+1)) nanoseconds, bin 0 includes zero.
+#define TIME_BINS 64
+
+static int time_bin(uint64_t ns) {
+    int k = 0;
+    while (ns >>= 1)
+        k++;
+    return k;
+}
+
+static void print_histogram(const char *name, const unsigned long *counts, int len) {
+    // trailing empty bins are not printed.
+    while (len > 1 && counts[len - 1] == 0)
+        len--;
+    printf(", \"%s\": [", name);
+    for (int i = 0; i < len; i++)
+        printf(i ? ", %lu" : "%lu", counts[i]);
+    printf("]");
+}
+
+int main(int argc, char *argv[]) {
+    /*
+    runs focus over an input, resetting after each trigger, and prints a json
+    line with the histograms of step times, curves popped and maximization
+    iterations per step, and the peak number of curves in the stack.
+    the step times include the clock's overhead.
+    */
+    if (argc != 2) {
+        fprintf(stderr, "usage: %s INPUT\n", argv[0]);
+        return 1;
+    }
+    Input input;
+    if (input_load(&input, argv[1]))
+        return 2;
+    const int32_t *xs = input.xs;
+    size_t len = input.length;
+    double true_rate = input.lambda;
+
+    double threshold = 5.0, mu_min = 1.1;
+    Curve curve_buffer[STACK_LEN];
+    Stack curves;
+    Focus focus;
+    unsigned long step_ns[TIME_BINS] = {0};
+    uint64_t max_ns = 0;
+    unsigned long triggers = 0;
+
+    focus_profile_reset();
+    stack_init(&curves, FOCUS_MAXCURVES, curve_buffer);
+    focus_init(&focus, &curves, threshold, mu_min);
+    for (size_t i = 0; i < len; i++) {
+        uint64_t start = timing_now_ns();
+        focus_step(&focus, xs[i], true_rate);
+        uint64_t elapsed = timing_now_ns() - start;
+        step_ns[time_bin(elapsed)]++;
+        if (elapsed > max_ns)
+            max_ns = elapsed;
+        if (focus.maximum) {
+            triggers++;
+            stack_init(&curves, FOCUS_MAXCURVES, curve_buffer);
+            focus_init(&focus, &curves, threshold, mu_min);
+        }
+    }
+
+    printf("{\"algorithm\": \"pfocus_c\", \"input\": ");
+    print_json_string(argv[1]);
+    printf(", \"n\": %zu, \"lambda\": %.17g, \"steps\": %lu, \"triggers\": %lu",
+           len, true_rate, focus_profile.steps, triggers);
+    printf(", \"peak_curves\": %d, \"max_ns\": %llu",
+           focus_profile.peak_curves, (unsigned long long) max_ns);
+    print_histogram("step_ns", step_ns, TIME_BINS);
+    print_histogram("pops", focus_profile.pops, STACK_LEN + 1);
+    print_histogram("iterations", focus_profile.iterations, STACK_LEN + 1);
+    printf("}\n");
+    input_free(&input);
+    return 0;
+}
@@ -2,11 +2,26 @@
 #include <assert.h>
 #include <stdio.h>
 #include <limits.h>
+#include <string.h>
 #include "pfocus.h"
 
 static Curve NULL_CURVE = (Curve) {0};
 static Curve TAIL_CURVE = (Curve) {INT_MAX, 0., 0, 0.};
 
+#ifdef FOCUS_PROFILE
+FocusProfile focus_profile;
+// maximization iterations of the current step.
+static int profile_iterations;
+
+void focus_profile_reset(void) {
+    memset(&focus_profile, 0, sizeof(focus_profile));
+}
+
+static void profile_record(unsigned long *histogram, int count) {
+    histogram[count < STACK_LEN ? count : STACK_LEN]++;
+}
+#endif
+
 void stack_init(Stack *s, int capacity, Curve *arr) {
     s->head = 0;
     s->tail = 0;
@@ -18,6 +33,13 @@ int stack_empty(Stack *s) {
     return s->head == s->tail;
 }
 
+#ifdef FOCUS_PROFILE
+int stack_length(Stack *s) {
+    // includes the tail curve and the accumulator.
+    return (s->head - s->tail + s->capacity + 1) % (s->capacity + 1);
+}
+#endif
+
 int stack_full(Stack *s) {
     return s->head == s->capacity ? s->tail == 0 : s->head + 1 == s->tail;
 }
@@ -39,7 +61,7 @@ Curve *stack_pop(Stack *s) {
 
 Curve *stack_peek(Stack *s) {
     assert(!stack_empty(s));
-    return s->arr + (s->head == 0 ? s->capacity - 1 : s->head - 1);
+    return s->arr + (s->head == 0 ? s->capacity : s->head - 1);
 }
 
 void stack_reset(Stack *s) {
@@ -47,6 +69,16 @@ void stack_reset(Stack *s) {
     s->tail = 0;
 }
 
+void stack_drop_older(Stack *s, int t) {
+    // drops the curves created before `t` below the head, from the oldest.
+    int i = s->tail == s->capacity ? 0 : s->tail + 1;
+    while (i != s->head && (s->arr + i)->t < t) {
+        s->tail = i;
+        *(s->arr + i) = TAIL_CURVE;
+        i == s->capacity ? i = 0 : i++;
+    }
+}
+
 double curve_max(Curve *c, Curve *acc) {
     int x = (acc->x - c->x);
     double b = (acc->b - c->b);
@@ -67,6 +99,7 @@ void focus_init(Focus *f, Stack *s, double threshold, double mu_min) {
     f->curves = s;
     f->threshold = threshold * threshold / 2;
     f->mu_crit = (mu_min == 1. ? 1.0 : (mu_min - 1) / log(mu_min));
+    f->t_max = -1;
 
     stack_push(s, &TAIL_CURVE);
     stack_push(s, &NULL_CURVE);
@@ -77,12 +110,17 @@ void focus_maximize(Focus *f, Curve *p, Curve *acc) {
     double m = acc->m - p->m;
     int i = curves->head;
     while (m + p->m >= f->threshold) {
+#ifdef FOCUS_PROFILE
+        profile_iterations++;
+#endif
         if (m >= f->threshold) {
             f->maximum = m;
             f->time_offset = acc->t - p->t;
             break;
         }
         i == 0 ? i = curves->capacity : i--;
+        if (i == curves->tail)
+            break;
         p = (curves->arr + i);
         m = curve_max(p, acc);
     }
@@ -97,20 +135,70 @@ void focus_step(Focus *f, int x_t, double b_t) {
     Stack *curves = f->curves;
     Curve *p = stack_pop(curves);
     Curve acc = {p->x + x_t, p->b + b_t, p->t + 1, p->m};
-    while (curve_dominate(p, stack_peek(curves), &acc) < 0)
+#ifdef FOCUS_PROFILE
+    int pops = 0;
+    profile_iterations = 0;
+#endif
+    while (curve_dominate(p, stack_peek(curves), &acc) < 0) {
         p = stack_pop(curves);
+#ifdef FOCUS_PROFILE
+        pops++;
+#endif
+    }
 
     if ((acc.x - p->x) > f->mu_crit * (acc.b - p->b)) {
         double m = curve_max(p, &acc);
         acc.m = p->m + m;
-        focus_maximize(f, p, &acc);
-        stack_push(curves, p);
+        if (f->t_max >= 0 && p->t < acc.t - f->t_max) {
+            // all the curves are older than `t_max`, the accumulator is left.
+            stack_reset(curves);
+            stack_push(curves, &TAIL_CURVE);
+        } else {
+            if (f->t_max >= 0)
+                stack_drop_older(curves, acc.t - f->t_max);
+            focus_maximize(f, p, &acc);
+            stack_push(curves, p);
+        }
         stack_push(curves, &acc);
     } else {
         stack_reset(curves);
         stack_push(curves, &TAIL_CURVE);
         stack_push(curves, &NULL_CURVE);
     }
+#ifdef FOCUS_PROFILE
+    focus_profile.steps++;
+    profile_record(focus_profile.pops, pops);
+    profile_record(focus_profile.iterations, profile_iterations);
+    int length = stack_length(curves);
+    if (length > focus_profile.peak_curves)
+        focus_profile.peak_curves = length;
+#endif
+}
+
+double focus_window_maximum(Focus *f, int t_max, int *time_offset) {
+    /*
+    returns the maximum over the curves younger than `t_max`.
+    the corresponding time offset is written to `time_offset`.
+    */
+    Stack *curves = f->curves;
+    Curve *q, *acc = stack_peek(curves);
+    int i = (int) (acc - curves->arr);
+    double m, maximum = 0.;
+
+    *time_offset = 0;
+    i == 0 ? i = curves->capacity : i--;
+    while (i != curves->tail) {
+        q = curves->arr + i;
+        if (acc->t - q->t > t_max)
+            break;
+        m = curve_max(q, acc);
+        if (m > maximum) {
+            maximum = m;
+            *time_offset = acc->t - q->t;
+        }
+        i == 0 ? i = curves->capacity : i--;
+    }
+    return maximum;
 }
 
 void focus_print(size_t t, int x_t, double b_t, Focus *f) {
@@ -131,6 +219,20 @@ void focus_print(size_t t, int x_t, double b_t, Focus *f) {
     stack_push(f->curves, acc);
 }
 
+size_t focus_run(Focus *f, int *xs, double *bs, size_t len) {
+    /*
+    steps focus over a whole array, stopping at the first trigger.
+    returns the trigger iteration, or `len` if no trigger was found.
+    */
+    size_t t;
+    for (t = 0; t < len; t++) {
+        focus_step(f, xs[t], bs[t]);
+        if (f->maximum)
+            break;
+    }
+    return t;
+}
+
 Changepoint focus_interface(double threshold, double mu_min, int *xs, double *bs, size_t len) {
     Curve curve_buffer[STACK_LEN];
     Stack curves;
@@ -32,6 +32,8 @@ typedef struct {
     int time_offset;
     double mu_crit;
     double threshold;
+    // curves older than `t_max` are dropped, if not negative.
+    int t_max;
 } Focus;
 
 void stack_init(Stack *s, int capacity, Curve *arr);
@@ -40,8 +42,30 @@ void focus_init(Focus *f, Stack *s, double threshold, double mu_min);
 
 void focus_step(Focus *f, int x_t, double b_t);
 
+double focus_window_maximum(Focus *f, int t_max, int *time_offset);
+
+size_t focus_run(Focus *f, int *xs, double *bs, size_t len);
+
 Changepoint focus_interface(double threshold, double mu_min, int *xs, double *bs, size_t len);
 
 void focus_print(size_t t, int x_t, double b_t, Focus *f);
 
+#ifdef FOCUS_PROFILE
+// histograms of the data-dependent loop counts of `focus_step`, indexed by
+// count. compiled in with -DFOCUS_PROFILE only, see main_profile.c.
+// not thread safe: the counters are shared by all focus instances.
+typedef struct {
+    unsigned long steps;
+    unsigned long pops[STACK_LEN + 1];
+    unsigned long iterations[STACK_LEN + 1];
+    int peak_curves;
+} FocusProfile;
+
+extern FocusProfile focus_profile;
+
+void focus_profile_reset(void);
+
+int stack_length(Stack *s);
+#endif
+
 #endif //HERMES_FOCUS_FOCUS_H
@@ -0,0 +1,179 @@
+#include <math.h>
+#include <assert.h>
+#include <limits.h>
+#include <stdlib.h>
+#include "pfocus_bank.h"
+
+static void bank_push(FocusBank *bank, int c, int x, double b, int t, double m) {
+    // when the stack is full, the oldest curve is dropped, as in `stack_push`.
+    int off = bank->offset[c], cap = bank->capacity[c];
+    int head = bank->head[c], tail = bank->tail[c];
+    if (head == cap ? tail == 0 : head + 1 == tail) {
+        tail == cap ? tail = 0 : tail++;
+        bank->x[off + tail] = INT_MAX;
+        bank->b[off + tail] = 0.;
+        bank->t[off + tail] = 0;
+        bank->m[off + tail] = 0.;
+        bank->tail[c] = tail;
+    }
+    bank->x[off + head] = x;
+    bank->b[off + head] = b;
+    bank->t[off + head] = t;
+    bank->m[off + head] = m;
+    bank->head[c] = head == cap ? 0 : head + 1;
+}
+
+static void bank_clear(FocusBank *bank, int c) {
+    bank->head[c] = 0;
+    bank->tail[c] = 0;
+    bank_push(bank, c, INT_MAX, 0., 0, 0.);
+    bank_push(bank, c, 0, 0., 0, 0.);
+}
+
+int focus_bank_init(FocusBank *bank, int channels, const int *capacities,
+                    double threshold, double mu_min) {
+    /*
+    allocates a bank of `channels` focus instances. channel c holds at most
+    `capacities[c]` curves, which must be greater than 2.
+    returns zero on success. the bank must be released with `focus_bank_free`.
+    */
+    assert(!(mu_min < 1));
+    size_t curves = 0;
+    for (int c = 0; c < channels; c++) {
+        assert(capacities[c] > 2);
+        curves += (size_t) capacities[c] + 1;
+    }
+    bank->channels = channels;
+    bank->capacity = malloc(channels * sizeof(int));
+    bank->offset = malloc(channels * sizeof(int));
+    bank->head = malloc(channels * sizeof(int));
+    bank->tail = malloc(channels * sizeof(int));
+    bank->maximum = malloc(channels * sizeof(double));
+    bank->time_offset = malloc(channels * sizeof(int));
+    bank->x = malloc(curves * sizeof(int));
+    bank->b = malloc(curves * sizeof(double));
+    bank->t = malloc(curves * sizeof(int));
+    bank->m = malloc(curves * sizeof(double));
+    if (!bank->capacity || !bank->offset || !bank->head || !bank->tail ||
+        !bank->maximum || !bank->time_offset ||
+        !bank->x || !bank->b || !bank->t || !bank->m) {
+        focus_bank_free(bank);
+        return 1;
+    }
+    bank->threshold = threshold * threshold / 2;
+    bank->mu_crit = (mu_min == 1. ? 1.0 : (mu_min - 1) / log(mu_min));
+
+    int offset = 0;
+    for (int c = 0; c < channels; c++) {
+        bank->capacity[c] = capacities[c];
+        bank->offset[c] = offset;
+        offset += capacities[c] + 1;
+        focus_bank_reset(bank, c);
+    }
+    return 0;
+}
+
+void focus_bank_free(FocusBank *bank) {
+    free(bank->capacity);
+    free(bank->offset);
+    free(bank->head);
+    free(bank->tail);
+    free(bank->maximum);
+    free(bank->time_offset);
+    free(bank->x);
+    free(bank->b);
+    free(bank->t);
+    free(bank->m);
+    bank->capacity = bank->offset = bank->head = bank->tail = NULL;
+    bank->time_offset = bank->x = bank->t = NULL;
+    bank->maximum = bank->b = bank->m = NULL;
+    bank->channels = 0;
+}
+
+void focus_bank_reset(FocusBank *bank, int channel) {
+    // empties the curve stack and the maximum of a channel, as `focus_init`.
+    bank_clear(bank, channel);
+    bank->maximum[channel] = 0.;
+    bank->time_offset[channel] = 0;
+}
+
+static void bank_channel_step(FocusBank *bank, int c, int x_t, double b_t) {
+    // same as `focus_step`, see pfocus.c.
+    int cap = bank->capacity[c], off = bank->offset[c];
+    const int *x = bank->x + off, *t = bank->t + off;
+    const double *b = bank->b + off, *m = bank->m + off;
+
+    // pops the accumulator.
+    int i = bank->head[c] == 0 ? cap : bank->head[c] - 1;
+    int j = i == 0 ? cap : i - 1;
+    int acc_x = x[i] + x_t, acc_t = t[i] + 1;
+    double acc_b = b[i] + b_t;
+    // pops curves until p dominates the curve below it.
+    while ((acc_x - x[i]) * (acc_b - b[j]) - (acc_x - x[j]) * (acc_b - b[i]) <= 0) {
+        i = j;
+        j == 0 ? j = cap : j--;
+    }
+
+    int x_p = acc_x - x[i];
+    double b_p = acc_b - b[i];
+    if (x_p > bank->mu_crit * b_p) {
+        double acc_m = m[i] + (x_p * log(x_p / b_p) - (x_p - b_p));
+        // maximizes, as in `focus_maximize`.
+        double m_q = acc_m - m[i];
+        int k = i;
+        while (m_q + m[k] >= bank->threshold) {
+            if (m_q >= bank->threshold) {
+                bank->maximum[c] = m_q;
+                bank->time_offset[c] = acc_t - t[k];
+                break;
+            }
+            k == 0 ? k = cap : k--;
+            if (k == bank->tail[c])
+                break;
+            int x_q = acc_x - x[k];
+            double b_q = acc_b - b[k];
+            assert(x_q > b_q);
+            m_q = x_q * log(x_q / b_q) - (x_q - b_q);
+        }
+        bank->head[c] = i == cap ? 0 : i + 1;
+        bank_push(bank, c, acc_x, acc_b, acc_t, acc_m);
+    } else {
+        bank_clear(bank, c);
+    }
+}
+
+void focus_bank_step(FocusBank *bank, const int *xs, const double *bs) {
+    /*
+    steps every channel with a new count and background, one per channel.
+    as with `focus_step`, triggered channels must be reset by the caller.
+    b_t IS SUPPOSED TO BE GREATER THAN ZERO.
+    */
+    int c;
+#pragma omp parallel for schedule(static) if (bank->channels >= FOCUS_BANK_PARALLEL_MIN)
+    for (c = 0; c < bank->channels; c++)
+        bank_channel_step(bank, c, xs[c], bs[c]);
+}
+
+void focus_bank_run(FocusBank *bank, const int *xs, const double *bs, size_t len,
+                    size_t *trigger_times) {
+    /*
+    steps each channel over its own light curve of `len` counts, stopping at
+    the first trigger, as `focus_run`. counts and backgrounds are stored one
+    light curve after the other: channel c reads xs[c * len] to
+    xs[c * len + len - 1]. writes to `trigger_times` the trigger iteration of
+    each channel, or `len` if the channel did not trigger.
+    */
+    int c;
+#pragma omp parallel for schedule(dynamic, 16) if (bank->channels >= FOCUS_BANK_PARALLEL_MIN)
+    for (c = 0; c < bank->channels; c++) {
+        const int *xs_c = xs + (size_t) c * len;
+        const double *bs_c = bs + (size_t) c * len;
+        size_t t;
+        for (t = 0; t < len; t++) {
+            bank_channel_step(bank, c, xs_c[t], bs_c[t]);
+            if (bank->maximum[c])
+                break;
+        }
+        trigger_times[c] = t;
+    }
+}
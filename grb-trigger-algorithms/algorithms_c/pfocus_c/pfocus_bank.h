@@ -0,0 +1,44 @@
+#ifndef HERMES_FOCUS_BANK_H
+#define HERMES_FOCUS_BANK_H
+
+#include <stddef.h>
+
+// banks with fewer channels are stepped by a single thread, since for them
+// the threads' overhead exceeds the work.
+#define FOCUS_BANK_PARALLEL_MIN 256
+
+/*
+a bank of independent focus instances, one per channel, stepped together.
+curves are stored in structure-of-arrays layout: the fields of the curves of
+channel c are at [offset[c], offset[c] + capacity[c]] in x, b, t and m. each
+channel's curves form a ring buffer, as in `Stack`.
+*/
+typedef struct {
+    int channels;
+    int *capacity;
+    int *offset;
+    int *head;
+    int *tail;
+    int *x;
+    double *b;
+    int *t;
+    double *m;
+    double *maximum;
+    int *time_offset;
+    double mu_crit;
+    double threshold;
+} FocusBank;
+
+int focus_bank_init(FocusBank *bank, int channels, const int *capacities,
+                    double threshold, double mu_min);
+
+void focus_bank_free(FocusBank *bank);
+
+void focus_bank_reset(FocusBank *bank, int channel);
+
+void focus_bank_step(FocusBank *bank, const int *xs, const double *bs);
+
+void focus_bank_run(FocusBank *bank, const int *xs, const double *bs, size_t len,
+                    size_t *trigger_times);
+
+#endif //HERMES_FOCUS_BANK_H
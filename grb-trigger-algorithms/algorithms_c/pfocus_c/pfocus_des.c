@@ -0,0 +1,122 @@
+#include <math.h>
+#include <stdlib.h>
+#include "pfocus_des.h"
+
+int focus_des_init(FocusDES *f, double threshold, double alpha, double beta, int m,
+                   double mu_min, int t_max, int sleep, double s_0, double b_0) {
+    /*
+    returns zero on success, 1 on invalid parameters, 2 if the delay line
+    could not be allocated. the trigger must be released with `focus_des_free`.
+    */
+    f->buffer = NULL;
+    if (alpha < 0. || beta < 0. || m < 0 || mu_min < 1. || threshold <= 0.)
+        return 1;
+    // without `s_0`, at least a count is needed for initialization.
+    if (sleep < m || (s_0 <= 0. && sleep == m))
+        return 1;
+    f->buffer = malloc(((size_t) sleep + 1) * sizeof(int));
+    if (!f->buffer)
+        return 2;
+    f->buffer_capacity = sleep + 1;
+    f->threshold = threshold;
+    f->alpha = alpha;
+    f->beta = beta;
+    f->m = m;
+    f->mu_min = mu_min;
+    f->t_max = t_max;
+    f->sleep = sleep;
+    f->s_0 = s_0;
+    f->b_0 = b_0;
+    focus_des_reset(f);
+    return 0;
+}
+
+void focus_des_free(FocusDES *f) {
+    free(f->buffer);
+    f->buffer = NULL;
+}
+
+void focus_des_reset(FocusDES *f) {
+    stack_init(&f->curves, FOCUS_MAXCURVES, f->curve_buffer);
+    focus_init(&f->focus, &f->curves, f->threshold, f->mu_min);
+    f->focus.t_max = f->t_max;
+    f->buffer_start = 0;
+    f->buffer_len = 0;
+    f->t = -1;
+    f->s_t = 0.;
+    f->b_t = 0.;
+    f->lambda_t = 0.;
+}
+
+static void buffer_push(FocusDES *f, int x) {
+    int i = f->buffer_start + f->buffer_len;
+    f->buffer[i < f->buffer_capacity ? i : i - f->buffer_capacity] = x;
+    f->buffer_len++;
+}
+
+static int buffer_pop(FocusDES *f) {
+    int x = f->buffer[f->buffer_start];
+    f->buffer_start = f->buffer_start + 1 == f->buffer_capacity ? 0 : f->buffer_start + 1;
+    f->buffer_len--;
+    return x;
+}
+
+static void des_initialize(FocusDES *f) {
+    // drops the counts preceding the delay line.
+    long counts_sum = 0;
+    for (int i = 0; i < f->sleep - f->m; i++)
+        counts_sum += buffer_pop(f);
+    f->s_t = f->s_0 > 0. ? f->s_0 : (double) counts_sum / (f->sleep - f->m);
+    f->b_t = f->b_0;
+}
+
+void des_update(FocusDES *f, int x) {
+    double s_t_1 = f->s_t;
+    double b_t_1 = f->b_t;
+    f->s_t = f->alpha * x + (1 - f->alpha) * (s_t_1 + b_t_1);
+    f->b_t = f->beta * (f->s_t - s_t_1) + (1 - f->beta) * b_t_1;
+}
+
+int focus_des_step(FocusDES *f, int x_t, double *significance, int *offset) {
+    /*
+    writes the significance (std. devs) and the time offset of the changepoint
+    when over threshold, else zeros. with `t_max`, only changepoints younger
+    than `t_max` are tested.
+    returns 1 if the background estimate is not positive, else zero.
+    */
+    *significance = 0.;
+    *offset = 0;
+    f->t++;
+    buffer_push(f, x_t);
+    if (f->t < f->sleep)
+        return 0;
+    if (f->t == f->sleep)
+        des_initialize(f);
+
+    des_update(f, buffer_pop(f));
+    f->lambda_t = f->s_t + f->m * f->b_t;
+    if (f->lambda_t <= 0.)
+        return 1;
+    focus_step(&f->focus, x_t, f->lambda_t);
+    if (f->focus.maximum) {
+        *significance = sqrt(2 * f->focus.maximum);
+        *offset = f->focus.time_offset;
+    }
+    return 0;
+}
+
+int focus_des_run(FocusDES *f, const int *xs, size_t len, size_t *t,
+                  double *significance, int *offset) {
+    /*
+    steps over an array, stopping at the first trigger or at the first
+    non-positive background estimate. writes the stopping iteration to `t`,
+    or `len` if there was no stop. returns as `focus_des_step`.
+    */
+    for (*t = 0; *t < len; (*t)++) {
+        if (focus_des_step(f, xs[*t], significance, offset))
+            return 1;
+        if (*significance)
+            break;
+    }
+    return 0;
+}
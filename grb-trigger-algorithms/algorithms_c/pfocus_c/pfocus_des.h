@@ -0,0 +1,54 @@
+#ifndef HERMES_FOCUS_DES_H
+#define HERMES_FOCUS_DES_H
+
+#include <stddef.h>
+#include "pfocus.h"
+
+/*
+Poisson-FOCuS with a background estimated by double exponential smoothing
+(DES), see `algorithms/pfocus_des.py`. the background of each count is
+forecast from the counts `m` steps in the past. the first `sleep` steps are
+a warm-up, after which DES is initialized with the mean of the counts
+preceding the delay line, unless `s_0` is given.
+*/
+typedef struct {
+    Focus focus;
+    Stack curves;
+    Curve curve_buffer[STACK_LEN];
+    // counts delay line, a ring buffer of `sleep + 1` counts.
+    int *buffer;
+    int buffer_start;
+    int buffer_len;
+    int buffer_capacity;
+    long t;
+    double s_t;
+    double b_t;
+    double lambda_t;
+    double threshold;
+    double alpha;
+    double beta;
+    int m;
+    double mu_min;
+    // curves older than `t_max` are dropped, a negative value disables it.
+    int t_max;
+    int sleep;
+    // a non-positive `s_0` is computed at the end of the warm-up.
+    double s_0;
+    double b_0;
+} FocusDES;
+
+int focus_des_init(FocusDES *f, double threshold, double alpha, double beta, int m,
+                   double mu_min, int t_max, int sleep, double s_0, double b_0);
+
+void focus_des_free(FocusDES *f);
+
+void focus_des_reset(FocusDES *f);
+
+void des_update(FocusDES *f, int x);
+
+int focus_des_step(FocusDES *f, int x_t, double *significance, int *offset);
+
+int focus_des_run(FocusDES *f, const int *xs, size_t len, size_t *t,
+                  double *significance, int *offset);
+
+#endif //HERMES_FOCUS_DES_H
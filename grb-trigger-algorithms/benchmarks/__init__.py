@@ -0,0 +1,4 @@
+"""
+Microbenchmarks for the python algorithms in `algorithms`, see
+`benchmarks.runner`.
+"""
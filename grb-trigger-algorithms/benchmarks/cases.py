@@ -0,0 +1,75 @@
+"""
+The algorithms timed by the benchmarks. Each case prepares a trigger for a
+light curve and a background rate, and returns a function running the trigger
+over the whole light curve. Preparation is not timed.
+"""
+
+from typing import Callable, NamedTuple
+
+from algorithms import (
+    exhaustive_true,
+    param_sma,
+    pfocus,
+    pfocus_des,
+    pfocus_minimal,
+    pfocus_true,
+)
+
+THRESHOLD = 5.0
+
+
+class Case(NamedTuple):
+    # takes a list of counts and a background rate, returns a function with
+    # no arguments running the algorithm.
+    setup: Callable
+    # longest light curve timed, None for no limit.
+    max_n: int | None = None
+
+
+def setup_pfocus(xs, lambda_):
+    bs = [lambda_] * len(xs)
+    return lambda: pfocus.Focus(THRESHOLD).run_all(xs, bs)
+
+
+def setup_pfocus_des(xs, lambda_):
+    trigger = pfocus_des.init(
+        threshold=THRESHOLD,
+        alpha=0.002,
+        beta=0.0,
+        m=250,
+        t_max=250,
+        sleep=1062,
+        mu_min=1.1,
+    )
+    return lambda: trigger.run_all(xs)
+
+
+def setup_pfocus_true(xs, lambda_):
+    trigger = pfocus_true.init(b=lambda_, threshold=THRESHOLD)
+    return lambda: trigger.run_all(xs)
+
+
+def setup_pfocus_minimal(xs, lambda_):
+    bs = [lambda_] * len(xs)
+    return lambda: pfocus_minimal.focus(xs, bs, THRESHOLD)
+
+
+def setup_param_sma(xs, lambda_):
+    trigger = param_sma.init_gbm(threshold=THRESHOLD)
+    return lambda: trigger.run_all(xs)
+
+
+def setup_exhaustive_true(xs, lambda_):
+    # intervals are as long as the longest of the GBM-like algorithm.
+    trigger = exhaustive_true.init(threshold=THRESHOLD, b=lambda_, hmax=256)
+    return lambda: trigger(xs)
+
+
+CASES = {
+    "pfocus": Case(setup_pfocus),
+    "pfocus_des": Case(setup_pfocus_des),
+    "pfocus_true": Case(setup_pfocus_true),
+    "pfocus_minimal": Case(setup_pfocus_minimal, max_n=2**16),
+    "param_sma": Case(setup_param_sma),
+    "exhaustive_true": Case(setup_exhaustive_true, max_n=2**13),
+}
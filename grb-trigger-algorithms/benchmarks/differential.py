@@ -0,0 +1,421 @@
+"""
+A differential test of the Poisson-FOCuS implementations. Light curves with
+an injected anomaly are made with `computational_efficiency/generate_data.py`,
+from a seed, and every implementation runs over each of them until the first
+trigger. Results are compared to `algorithms.pfocus.Focus`: mismatches in
+significance, changepoint and trigger time are reported, together with each
+implementation's speed relative to the reference. Implementations with a
+bounded curve stack are run over a sweep of stack capacities, since small
+stacks drop curves. Each implementation is only compared on the fields it
+shares with the reference, see `BACKENDS`, so that any mismatch is a bug.
+The `run_block` blocks of `pfocus_true` triggers are also checked against the
+same triggers run row by row: results must be the same, bit by bit.
+Run from the `grb-trigger-algorithms` folder, e.g.:
+
+    python -m benchmarks.differential --cases 200
+"""
+
+import argparse
+import sys
+import time
+import warnings
+from typing import Callable, NamedTuple
+
+import numpy as np
+from algorithms import pfocus, pfocus_bank, pfocus_minimal, pfocus_true
+from computational_efficiency.generate_data import generate_data
+from visualization import focus as visualization_focus
+
+try:
+    from algorithms import pfocus_c
+except ImportError:
+    # the C implementation of Poisson-FOCuS is not compiled.
+    pfocus_c = None
+
+SEED = 666
+CASES = 100
+THRESHOLD = 5.0
+REFERENCE = "pfocus"
+# significances are compared with this relative tolerance.
+RTOL = 1e-9
+# light curve lengths, background rates and anomalies are drawn from these.
+NS = [2**i for i in range(10, 14)]
+LAMBDAS = [0.5, 2.0, 8.0, 32.0]
+ANOMALY_DURATIONS = [1, 4, 16, 64, 256]
+ANOMALY_INTENSITIES = [1.0, 1.2, 1.5, 2.0, 4.0]
+FIELDS = ("significance", "changepoint", "triggertime")
+# the default capacity of `pfocus.Focus`, never filled by the cases.
+CAPACITY = 64
+# small stacks overflow, dropping their oldest curves.
+CAPACITIES = (3, 5, 8, CAPACITY)
+# light curves per background rate of the `run_block` check.
+BLOCK_ROWS = 200
+# iterations skipped by the triggers of the `run_block` check, as in detperf.
+BLOCK_SKIP = 1062
+
+
+class Backend(NamedTuple):
+    # takes a list of counts, a background rate, a threshold in std. devs.,
+    # mu_min and a stack capacity, returns a (significance, changepoint,
+    # trigger time) triple, with the conventions of `pfocus.Focus.__call__`.
+    run: Callable
+    # the fields compared to the reference, the others differ by design.
+    fields: tuple = FIELDS
+    # whether mu_min is supported, else only mu_min = 1 is tested.
+    mu_min: bool = True
+    # whether the stack capacity is supported, else only `CAPACITY` is tested.
+    capacity: bool = False
+
+
+def run_pfocus(xs, b, threshold, mu_min, capacity):
+    focus = pfocus.Focus(threshold, mu_min=mu_min, capacity=capacity)
+    return focus(xs, [b] * len(xs))
+
+
+def run_pfocus_minimal(xs, b, threshold, mu_min, capacity):
+    return pfocus_minimal.focus(xs, [b] * len(xs), threshold)
+
+
+def run_visualization(xs, b, threshold, mu_min, capacity):
+    return visualization_focus.Focus(threshold, mu_min=mu_min)(xs, [b] * len(xs))
+
+
+def run_pfocus_true(xs, b, threshold, mu_min, capacity):
+    significance, changepoint, t = pfocus_true.init(b, threshold, mu_min=mu_min)(xs)
+    if not significance:
+        # no trigger, see `pfocus.Focus.__call__`.
+        return 0.0, len(xs) + 1, len(xs)
+    return significance, changepoint, t
+
+
+def run_pfocus_bank(xs, b, threshold, mu_min, capacity):
+    bank = pfocus_bank.FocusBank(threshold, 1, mu_min=mu_min, capacity=capacity)
+    return tuple(bank([xs], b)[0].tolist())
+
+
+def run_focus_interface(xs, b, threshold, mu_min, capacity):
+    return pfocus_c.focus_interface(xs, b, threshold, mu_min=mu_min)
+
+
+def run_pfocus_c(xs, b, threshold, mu_min, capacity):
+    return pfocus_c.Focus(threshold, mu_min=mu_min, capacity=capacity)(xs, b)
+
+
+def run_pfocus_c_bank(xs, b, threshold, mu_min, capacity):
+    bank = pfocus_c.FocusBank(threshold, 1, mu_min=mu_min, capacity=capacity)
+    return tuple(bank([xs], b)[0].tolist())
+
+
+BACKENDS = {
+    "pfocus": Backend(run_pfocus, capacity=True),
+    # reports the most significant changepoint, not the first over threshold.
+    "pfocus_minimal": Backend(
+        run_pfocus_minimal, fields=("triggertime",), mu_min=False
+    ),
+    # reports the oldest changepoint over threshold, not the first one.
+    "visualization": Backend(run_visualization, fields=("triggertime",)),
+    "pfocus_true": Backend(run_pfocus_true),
+    "pfocus_bank": Backend(run_pfocus_bank, capacity=True),
+}
+if pfocus_c is not None:
+    # runs with `FOCUS_MAXCURVES` curves.
+    BACKENDS["focus_interface"] = Backend(run_focus_interface)
+    BACKENDS["pfocus_c"] = Backend(run_pfocus_c, capacity=True)
+    BACKENDS["pfocus_c_bank"] = Backend(run_pfocus_c_bank, capacity=True)
+
+
+def make_case(i: int, seed: int = SEED):
+    """
+    Returns the parameters and the light curve of the `i`-th case, a
+    background-only stream followed by an anomaly. The same arguments give
+    the same data.
+    """
+    rng = np.random.default_rng([seed, i])
+    case = {
+        "case": i,
+        "n": int(rng.choice(NS)),
+        "lambda": float(rng.choice(LAMBDAS)),
+        "anomaly_duration": int(rng.choice(ANOMALY_DURATIONS)),
+        "anomaly_intensity": float(rng.choice(ANOMALY_INTENSITIES)),
+    }
+    xs = generate_data(
+        case["n"],
+        case["lambda"],
+        case["anomaly_duration"],
+        case["anomaly_intensity"],
+        rng=rng,
+    )
+    return case, xs.tolist()
+
+
+def differences(result, reference, fields=FIELDS, rtol: float = RTOL):
+    """
+    Returns the names of the fields where a result differs from the reference,
+    among `fields`.
+    """
+    out = []
+    for f, r, e in zip(FIELDS, result, reference):
+        if f not in fields:
+            continue
+        if f == "significance" and np.isclose(r, e, rtol=rtol, atol=0.0):
+            continue
+        if r != e:
+            out.append(f)
+    return out
+
+
+def run_differential(
+    labels=None,
+    cases: int = CASES,
+    seed: int = SEED,
+    threshold: float = THRESHOLD,
+    mu_min: float = 1.0,
+    fields=FIELDS,
+    capacities=CAPACITIES,
+):
+    """
+    Runs the backends over the cases, and compares them to the reference
+    with the same stack capacity. Backends not supporting `mu_min` are
+    skipped, backends not supporting the capacity only run with `CAPACITY`.
+    Only the `fields` of the results compared by each backend are compared.
+
+    Returns:
+        A 2-tuple: a dictionary of summaries, one per backend and capacity,
+        with the number of cases run, mismatches per field, errors and the
+        total run time in seconds; and a list of mismatches, one dictionary
+        each.
+    """
+    labels = list(BACKENDS) if labels is None else labels
+    labels = [REFERENCE] + [label for label in labels if label != REFERENCE]
+    labels = [label for label in labels if mu_min == 1 or BACKENDS[label].mu_min]
+    runs = [
+        (label, capacity)
+        for capacity in sorted(set(capacities))
+        for label in labels
+        if BACKENDS[label].capacity or capacity == CAPACITY
+    ]
+    summaries = {
+        run: {"cases": 0, "errors": 0, "seconds": 0.0, **{f: 0 for f in FIELDS}}
+        for run in runs
+    }
+    mismatches = []
+    with warnings.catch_warnings():
+        # small stacks overflow by design.
+        warnings.filterwarnings("ignore", message="Curve stack overflow")
+        for i in range(cases):
+            case, xs = make_case(i, seed)
+            for label, capacity in runs:
+                summary = summaries[label, capacity]
+                summary["cases"] += 1
+                if label == REFERENCE:
+                    # each capacity has its own reference result.
+                    reference = None
+                start = time.perf_counter()
+                try:
+                    result = BACKENDS[label].run(
+                        xs, case["lambda"], threshold, mu_min, capacity
+                    )
+                except Exception as e:
+                    summary["errors"] += 1
+                    mismatches.append(
+                        {
+                            **case,
+                            "backend": label,
+                            "capacity": capacity,
+                            "error": repr(e),
+                        }
+                    )
+                    continue
+                finally:
+                    summary["seconds"] += time.perf_counter() - start
+                if label == REFERENCE:
+                    reference = result
+                    continue
+                if reference is None:
+                    # the reference failed, see its errors.
+                    continue
+                compared = [f for f in BACKENDS[label].fields if f in fields]
+                different = differences(result, reference, compared)
+                for f in different:
+                    summary[f] += 1
+                if different:
+                    mismatches.append(
+                        {
+                            **case,
+                            "backend": label,
+                            "capacity": capacity,
+                            "fields": different,
+                            "result": tuple(result),
+                            "reference": tuple(reference),
+                        }
+                    )
+    return summaries, mismatches
+
+
+def run_block_differential(
+    rows: int = BLOCK_ROWS,
+    seed: int = SEED,
+    threshold: float = THRESHOLD,
+    mu_min: float = 1.0,
+):
+    """
+    Runs `pfocus_true` triggers over a block of light curves for each
+    background rate in `LAMBDAS`, with `run_block` and row by row. The two are
+    expected to give the same results, bit by bit, see `algorithms.pfocus_bank`.
+
+    Returns:
+        A list of mismatches, one dictionary each.
+    """
+    rng = np.random.default_rng([seed, rows])
+    mismatches = []
+    for lambda_ in LAMBDAS:
+        # rows of a block have the same length.
+        duration = int(rng.choice(ANOMALY_DURATIONS))
+        xs = np.array(
+            [
+                generate_data(
+                    BLOCK_SKIP + max(NS),
+                    lambda_,
+                    duration,
+                    float(rng.choice(ANOMALY_INTENSITIES)),
+                    rng=rng,
+                )
+                for _ in range(rows)
+            ]
+        )
+        trigger = pfocus_true.init(lambda_, threshold, mu_min=mu_min, skip=BLOCK_SKIP)
+        block = trigger.run_block(xs)
+        for row, (x, result) in enumerate(zip(xs, block)):
+            reference = tuple(trigger(x.tolist()))
+            if tuple(result.tolist()) != reference:
+                mismatches.append(
+                    {
+                        "row": row,
+                        "lambda": lambda_,
+                        "result": tuple(result.tolist()),
+                        "reference": reference,
+                    }
+                )
+    return mismatches
+
+
+def format_summaries(summaries):
+    header = "{:<16} {:>8} {:>6} {:>13} {:>12} {:>12} {:>7} {:>10} {:>9}"
+    row = "{:<16} {:>8d} {:>6d} {:>13d} {:>12d} {:>12d} {:>7d} {:>10.3f} {:>8.2f}x"
+    lines = [
+        header.format(
+            "backend",
+            "capacity",
+            "cases",
+            "significance",
+            "changepoint",
+            "triggertime",
+            "errors",
+            "seconds",
+            "speedup",
+        )
+    ]
+    for (label, capacity), s in summaries.items():
+        reference_seconds = summaries[REFERENCE, capacity]["seconds"]
+        lines.append(
+            row.format(
+                label,
+                capacity,
+                s["cases"],
+                *(s[f] for f in FIELDS),
+                s["errors"],
+                s["seconds"],
+                reference_seconds / s["seconds"] if s["seconds"] else float("inf"),
+            )
+        )
+    return "\n".join(lines)
+
+
+def format_mismatch(mismatch):
+    case = "case {case} (n={n}, lambda={lambda}, anomaly {anomaly_duration} "
+    case = (case + "x {anomaly_intensity})").format(**mismatch)
+    backend = "{backend} (capacity {capacity})".format(**mismatch)
+    if "error" in mismatch:
+        return "{}: {} raised {}".format(case, backend, mismatch["error"])
+    return "{}: {} {} != {} {}".format(
+        case,
+        backend,
+        mismatch["result"],
+        REFERENCE,
+        mismatch["reference"],
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.differential",
+        description="Compares the Poisson-FOCuS implementations over random data.",
+    )
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS))
+    parser.add_argument("--cases", type=int, default=CASES)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--mu-min", type=float, default=1.0)
+    parser.add_argument(
+        "--fields",
+        nargs="+",
+        choices=FIELDS,
+        default=FIELDS,
+        help="the result fields compared, e.g. triggertime only.",
+    )
+    parser.add_argument(
+        "--capacities",
+        nargs="+",
+        type=int,
+        default=CAPACITIES,
+        help="the stack capacities swept. backends not supporting the capacity "
+        f"only run with {CAPACITY}.",
+    )
+    parser.add_argument(
+        "--block-rows",
+        type=int,
+        default=BLOCK_ROWS,
+        help="light curves per background rate of the `run_block` check, 0 skips it.",
+    )
+    parser.add_argument(
+        "--show", type=int, default=5, help="mismatches listed per backend."
+    )
+    args = parser.parse_args(argv)
+
+    summaries, mismatches = run_differential(
+        args.backends,
+        args.cases,
+        args.seed,
+        args.threshold,
+        args.mu_min,
+        args.fields,
+        args.capacities,
+    )
+    print(format_summaries(summaries))
+    for label in BACKENDS:
+        listed = [m for m in mismatches if m["backend"] == label][: args.show]
+        for mismatch in listed:
+            print(format_mismatch(mismatch))
+    if args.block_rows > 0:
+        block_mismatches = run_block_differential(
+            args.block_rows, args.seed, args.threshold, args.mu_min
+        )
+        print(
+            f"run_block: {args.block_rows * len(LAMBDAS)} rows, "
+            f"{len(block_mismatches)} mismatches."
+        )
+        for mismatch in block_mismatches[: args.show]:
+            print(
+                "row {row} (lambda={lambda}): run_block {result} != "
+                "row by row {reference}".format(**mismatch)
+            )
+        mismatches += block_mismatches
+    if mismatches:
+        print(f"found {len(mismatches)} mismatches.")
+        return 1
+    print("no mismatches found.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
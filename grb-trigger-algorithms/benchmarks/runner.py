@@ -0,0 +1,165 @@
+"""
+Runs the benchmarks over a grid of light curve lengths and background rates,
+and compares the timings to a baseline. Light curves are made with
+`computational_efficiency/generate_data.py`, with a fixed seed, so that every
+run times the same data.
+Run from the `grb-trigger-algorithms` folder, e.g.:
+
+    python -m benchmarks --save-baseline benchmarks/baseline.json
+    python -m benchmarks --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from statistics import mean, pvariance
+
+import numpy as np
+from benchmarks.cases import CASES
+from computational_efficiency.generate_data import generate_data
+
+SEED = 666
+NS = [2**i for i in range(11, 16)]
+LAMBDAS = [4, 16, 64]
+REPEATS = 5
+# regressions are flagged when a timing exceeds the baseline by this fraction.
+TOLERANCE = 0.1
+
+
+def make_input(n: int, lambda_: float, seed: int = SEED):
+    """
+    Returns a background-only light curve as a list of counts. The same
+    arguments give the same data.
+    """
+    rng = np.random.default_rng([seed, n, round(lambda_ * 100)])
+    return generate_data(n, lambda_, 0, 1, rng=rng).tolist()
+
+
+def time_case(case, xs, lambda_, repeats: int = REPEATS):
+    """
+    Runs a case once to warm up, then `repeats` times.
+
+    Returns:
+        A list of timings, in nanoseconds per sample.
+    """
+    run = case.setup(xs, lambda_)
+    run()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        run()
+        timings.append((time.perf_counter_ns() - start) / len(xs))
+    return timings
+
+
+def run_suite(
+    labels=None,
+    ns=NS,
+    lambdas=LAMBDAS,
+    repeats: int = REPEATS,
+    verbose: bool = True,
+):
+    """
+    Returns:
+        A list of results, one dictionary per algorithm, length and background
+        rate, with mean, variance and minimum of the timings in ns/sample.
+    """
+    labels = list(CASES) if labels is None else labels
+    results = []
+    for label in labels:
+        case = CASES[label]
+        for n in ns:
+            if case.max_n is not None and n > case.max_n:
+                continue
+            for lambda_ in lambdas:
+                timings = time_case(case, make_input(n, lambda_), lambda_, repeats)
+                result = {
+                    "algorithm": label,
+                    "n": n,
+                    "lambda": lambda_,
+                    "repeats": repeats,
+                    "mean": mean(timings),
+                    "variance": pvariance(timings),
+                    "min": min(timings),
+                }
+                results.append(result)
+                if verbose:
+                    print(format_result(result))
+    return results
+
+
+def format_result(result, baseline=None):
+    line = "{:<16} n={:<8d} lambda={:<6g} {:10.1f} ns/sample +- {:.1f}".format(
+        result["algorithm"],
+        result["n"],
+        result["lambda"],
+        result["mean"],
+        result["variance"] ** 0.5,
+    )
+    if baseline is not None:
+        line += " (baseline {:.1f}, {:+.1%})".format(
+            baseline["mean"], result["mean"] / baseline["mean"] - 1
+        )
+    return line
+
+
+def key(result):
+    return result["algorithm"], result["n"], float(result["lambda"])
+
+
+def compare(results, baseline, tolerance: float = TOLERANCE):
+    """
+    Compares results to a baseline. A result is a regression when its mean
+    exceeds the baseline's by more than `tolerance`, and by more than twice
+    the timings' combined standard deviation.
+
+    Returns:
+        A list of (result, baseline result) pairs, one per regression.
+    """
+    base = {key(b): b for b in baseline}
+    regressions = []
+    for result in results:
+        b = base.get(key(result))
+        if b is None:
+            continue
+        excess = result["mean"] - b["mean"]
+        noise = 2 * (result["variance"] + b["variance"]) ** 0.5
+        if excess > tolerance * b["mean"] and excess > noise:
+            regressions.append((result, b))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Times the python algorithms in ns/sample.",
+    )
+    parser.add_argument("--algorithms", nargs="+", choices=list(CASES))
+    parser.add_argument("--ns", nargs="+", type=int, default=NS)
+    parser.add_argument("--lambdas", nargs="+", type=float, default=LAMBDAS)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--baseline", help="a baseline file to compare with.")
+    parser.add_argument("--save-baseline", help="saves results as a baseline.")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.algorithms, args.ns, args.lambdas, args.repeats)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=1)
+        print(f"saved baseline to {args.save_baseline}.")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for result, b in regressions:
+            print("REGRESSION " + format_result(result, b))
+        if regressions:
+            return 1
+        print("no regressions found.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
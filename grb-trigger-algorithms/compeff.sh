@@ -3,21 +3,13 @@ outputs=computational_efficiency/outputs
 
 mkdir -p $outputs > /dev/null 2>&1
 echo "created output folder"
-echo "deleting old outputs file."
-rm $outputs/*.txt
 
-outfile_gbm="results_gbm.txt";
-outfile_focus="results_focus.txt";
 printf "\nNew test: computational performances\n"
 echo "----Running algorithms----"
-for filename in "$inputs"/*.txt; do
-  echo "running gbm on $filename"
-  echo "$filename" >> "$outputs"/"$outfile_gbm";
-  ./algorithms_c/benchmark/cmake-build-release/gbm_benchmark "$filename" >> "$outputs"/"$outfile_gbm";
-  echo "running focus on $filename"
-  echo "$filename" >> "$outputs"/"$outfile_focus";
-  ./algorithms_c/pfocus_c/cmake-build-release/pfocus_compeff "$filename" >> "$outputs"/"$outfile_focus";
-done
+# harnesses run in parallel, one process per available CPU. binary inputs are
+# memory-mapped by the harnesses, text inputs are parsed. extra arguments are
+# passed to the runner, e.g. `sh compeff.sh --pin --repeats 20`.
+python computational_efficiency/run.py --inputs "$inputs" --outputs "$outputs" "$@" || exit
 
 cd computational_efficiency || exit
 tables="tables";
@@ -1,8 +1,14 @@
 """
 This is a simple script to create the test dataset used for computational
 efficiency tests.
+Data are written in a binary format, which the C harnesses memory-map: a header
+with a magic string, a version number, the background rate and the number of
+counts, followed by the counts as int32. All values are little-endian.
+The old text format, with a "#lambda" line followed by a count per line, is
+still written with `binary=False`, and read by the C harnesses.
 """
 
+import struct
 from pathlib import Path
 
 import numpy as np
@@ -10,6 +16,11 @@ import numpy as np
 seed = 666
 rng = np.random.default_rng(seed)
 
+# see `algorithms_c/common/input.h`.
+BINARY_MAGIC = b"GRBC"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sIdQ")
+
 
 def stringified(value, decimals):
     return "{:.{decimals}f}\n".format(value, decimals=decimals)
@@ -22,7 +33,43 @@ def write_to_file(sample, lambda_, filepath):
             f.write(str(value) + "\n")
 
 
-def generate_data(n, lambda_, anomaly_dur, anomaly_intensity):
+def write_binary(sample, lambda_, filepath):
+    header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, lambda_, len(sample))
+    with open(filepath, mode="wb") as f:
+        f.write(header)
+        f.write(np.asarray(sample, dtype="<i4").tobytes())
+
+
+def read_binary(filepath):
+    """
+    Returns the background rate and the counts of a binary input.
+    """
+    with open(filepath, mode="rb") as f:
+        magic, version, lambda_, n = BINARY_HEADER.unpack(f.read(BINARY_HEADER.size))
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError(f"{filepath} is not a binary input.")
+        return lambda_, np.fromfile(f, dtype="<i4", count=n)
+
+
+def read_text(filepath):
+    """
+    Returns the background rate and the counts of a text input.
+    """
+    with open(filepath) as f:
+        lambda_ = float(f.readline().lstrip("#"))
+        return lambda_, np.loadtxt(f, dtype="<i4", comments="#", ndmin=1)
+
+
+def read_input(filepath):
+    """
+    Returns the background rate and the counts of an input, binary or text.
+    """
+    with open(filepath, mode="rb") as f:
+        binary = f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+    return read_binary(filepath) if binary else read_text(filepath)
+
+
+def generate_data(n, lambda_, anomaly_dur, anomaly_intensity, rng=rng):
     background = rng.poisson(lam=lambda_, size=n)
     if anomaly_dur:
         anomaly = rng.poisson(lam=anomaly_intensity * lambda_, size=anomaly_dur)
@@ -38,6 +85,7 @@ def run(
     folderpath,
     anomaly=None,
     iteration_id=None,
+    binary=True,
 ):
     if anomaly is not None:
         anomaly_dur, anomaly_intensity = anomaly
@@ -56,10 +104,11 @@ def run(
         )
     if iteration_id is not None:
         filepath = filepath + "_{:04x}".format(iteration_id)
-    filepath = filepath + ".txt"
-
     sample = generate_data(n, lambda_, anomaly_dur, anomaly_intensity)
-    write_to_file(sample, lambda_, filepath)
+    if binary:
+        write_binary(sample, lambda_, filepath + ".bin")
+    else:
+        write_to_file(sample, lambda_, filepath + ".txt")
     return sample
 
 
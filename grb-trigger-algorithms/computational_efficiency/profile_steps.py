@@ -0,0 +1,134 @@
+"""
+This script profiles the steps of Poisson-FOCuS over inputs of the
+computational efficiency tests, binary or text, see `generate_data.py`.
+For each input it reports the distribution of step times, of curves popped and
+of maximization iterations per step, and the peak number of curves held.
+The python implementation is profiled with `algorithms.pfocus_profile`; with
+`--c` the C implementation is profiled too, which needs the `pfocus_profile`
+executable, see the README. Focus is reset after each trigger, as in
+`Focus.run_all`.
+Run from the `grb-trigger-algorithms` folder, e.g.:
+
+    python -m computational_efficiency.profile_steps data/simulated_dataset_compeff/*.bin --c
+"""
+
+import argparse
+import json
+import subprocess
+from math import ceil
+
+from algorithms.pfocus_profile import ProfiledFocus
+from computational_efficiency.generate_data import read_input
+
+# same as the C harnesses.
+THRESHOLD = 5.0
+MU_MIN = 1.1
+PROFILER = "./algorithms_c/pfocus_c/cmake-build-release/pfocus_profile"
+QUANTILES = (0.5, 0.99, 0.999)
+
+
+def profile_python(input_path):
+    lambda_, xs = read_input(input_path)
+    xs = xs.tolist()
+    focus = ProfiledFocus(THRESHOLD, mu_min=MU_MIN)
+    triggers = focus.run_all(xs, [lambda_] * len(xs))
+    return {
+        "algorithm": "pfocus",
+        "input": str(input_path),
+        "n": len(xs),
+        "lambda": lambda_,
+        "triggers": len(triggers),
+        **focus.profile.as_dict(),
+    }
+
+
+def profile_c(input_path, profiler=PROFILER):
+    out = subprocess.run(
+        [profiler, str(input_path)], capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout)
+
+
+def quantile(counts, q):
+    """
+    Returns the bin of the `q`-quantile of a histogram, nearest rank.
+    """
+    rank = max(ceil(q * sum(counts)), 1)
+    total = 0
+    for i, c in enumerate(counts):
+        total += c
+        if total >= rank:
+            return i
+    return len(counts) - 1
+
+
+def summarize(profile):
+    """
+    Returns the quantiles of the profile's histograms. Step time quantiles
+    are upper bounds, the edges of the power-of-two bins.
+    """
+    summary = {"steps": profile["steps"], "peak_curves": profile["peak_curves"]}
+    for q in QUANTILES:
+        summary[f"step_ns_{q:g}"] = 2 ** (quantile(profile["step_ns"], q) + 1)
+    summary["step_ns_max"] = profile["max_ns"]
+    for name in ("pops", "iterations"):
+        counts = profile[name]
+        summary[f"{name}_mean"] = sum(i * c for i, c in enumerate(counts)) / max(
+            sum(counts), 1
+        )
+        summary[f"{name}_0.99"] = quantile(counts, 0.99)
+        # histograms have no trailing empty bins.
+        summary[f"{name}_max"] = len(counts) - 1
+    return summary
+
+
+def format_summary(profile):
+    s = summarize(profile)
+    lines = [
+        "{} ({}): {} steps, {} triggers, peak curves {}".format(
+            profile["input"],
+            profile["algorithm"],
+            s["steps"],
+            profile["triggers"],
+            s["peak_curves"],
+        ),
+        "  step time   "
+        + "  ".join(f"p{100 * q:g} < {s[f'step_ns_{q:g}']} ns" for q in QUANTILES)
+        + "  max {} ns".format(s["step_ns_max"]),
+    ]
+    for name in ("pops", "iterations"):
+        lines.append(
+            "  {:<11} mean {:.2f}  p99 {}  max {}".format(
+                name, s[f"{name}_mean"], s[f"{name}_0.99"], s[f"{name}_max"]
+            )
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Profiles the steps of Poisson-FOCuS over inputs."
+    )
+    parser.add_argument("inputs", nargs="+")
+    parser.add_argument(
+        "--c", action="store_true", help="profiles the C implementation too."
+    )
+    parser.add_argument("--profiler", default=PROFILER)
+    parser.add_argument("--output", help="saves the profiles as json lines.")
+    args = parser.parse_args()
+
+    profiles = []
+    for input_path in args.inputs:
+        profiles.append(profile_python(input_path))
+        if args.c:
+            profiles.append(profile_c(input_path, args.profiler))
+    for profile in profiles:
+        print(format_summary(profile))
+    if args.output:
+        with open(args.output, "w") as f:
+            for profile in profiles:
+                f.write(json.dumps(profile) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+This script runs the C harnesses of the computational efficiency tests over all
+the inputs. Harnesses run in parallel, one input per process, and optionally
+pinned to a CPU each. Results are saved as json lines, one file per harness,
+see `table.py`.
+Run from the `grb-trigger-algorithms` folder, e.g.:
+
+    python computational_efficiency/run.py --jobs 4 --pin
+"""
+
+import argparse
+import json
+import os
+import queue
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+HARNESSES = {
+    "focus": "./algorithms_c/pfocus_c/cmake-build-release/pfocus_compeff",
+    "focus_des": "./algorithms_c/pfocus_c/cmake-build-release/pfocus_des_compeff",
+    "gbm": "./algorithms_c/benchmark/cmake-build-release/gbm_benchmark",
+}
+INPUTS = "data/simulated_dataset_compeff"
+OUTPUTS = "computational_efficiency/outputs"
+
+
+def find_inputs(folderpath):
+    """
+    Returns the binary and text inputs in a folder, sorted by name.
+    """
+    folder = Path(folderpath)
+    return sorted([*folder.glob("*.bin"), *folder.glob("*.txt")])
+
+
+def run_harness(harness, input_path, warmup, repeats, cpu=None):
+    """
+    Runs a harness over an input, pinned to `cpu` if given.
+
+    Returns:
+        A dictionary with the harness' timings, in seconds.
+    """
+    command = [harness, str(input_path), "--warmup", str(warmup)]
+    command += ["--repeats", str(repeats)]
+    if cpu is not None:
+        command = ["taskset", "--cpu-list", str(cpu)] + command
+    out = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def run_all(harnesses, inputs, jobs, pin=False, warmup=1, repeats=10):
+    """
+    Runs every harness over every input, `jobs` processes at a time.
+    With pinning, each process runs on a different CPU, and at most one
+    process per available CPU is run.
+
+    Returns:
+        A dictionary mapping harness labels to lists of results, sorted as
+        the inputs.
+    """
+    cpus = queue.Queue()
+    if pin:
+        if shutil.which("taskset") is None:
+            raise ValueError("pinning needs the `taskset` command.")
+        available = sorted(os.sched_getaffinity(0))
+        jobs = min(jobs, len(available))
+        for cpu in available[:jobs]:
+            cpus.put(cpu)
+
+    def task(harness, input_path):
+        cpu = cpus.get() if pin else None
+        try:
+            return run_harness(harness, input_path, warmup, repeats, cpu)
+        finally:
+            if pin:
+                cpus.put(cpu)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            label: [executor.submit(task, harness, i) for i in inputs]
+            for label, harness in harnesses.items()
+        }
+        return {
+            label: [future.result() for future in fs] for label, fs in futures.items()
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Runs the computational efficiency tests."
+    )
+    parser.add_argument("--inputs", default=INPUTS)
+    parser.add_argument("--outputs", default=OUTPUTS)
+    parser.add_argument("--jobs", type=int, default=len(os.sched_getaffinity(0)))
+    parser.add_argument(
+        "--pin", action="store_true", help="pins each process to a CPU."
+    )
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    inputs = find_inputs(args.inputs)
+    print(f"running {len(HARNESSES)} harnesses over {len(inputs)} inputs.")
+    results = run_all(HARNESSES, inputs, args.jobs, args.pin, args.warmup, args.repeats)
+    Path(args.outputs).mkdir(parents=True, exist_ok=True)
+    for label, lines in results.items():
+        with open(Path(args.outputs) / f"results_{label}.jsonl", "w") as f:
+            for line in lines:
+                f.write(json.dumps(line) + "\n")
+    print("done!")
+
+
+if __name__ == "__main__":
+    main()
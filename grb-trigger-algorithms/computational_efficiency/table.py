@@ -1,51 +1,39 @@
 """
 This script will generate a latex table string starting from your results of
-the computational efficiency tests.
+the computational efficiency tests, see `run.py`.
+Table entries are the median run times in milliseconds, averaged over the
+inputs with the same length (rows) and background rate (columns). The
+concatenated table, Poisson-FOCuS and benchmark, is the one of the paper.
 """
 
 import pandas as pd
 
-if __name__ == "__main__":
-    outputs = ["./outputs/results_focus.txt", "./outputs/results_gbm.txt"]
-    results = {
-        "focus": {},
-        "benchmark": {},
-    }
-    for file, key in zip(outputs, results):
-        with open(file) as f:
-            lines = f.readlines()
-            assert len(lines) % 2 == 0
-            for input_file, result in zip(lines[::2], lines[1::2]):
-                data_num = int(input_file.split("n")[-1].split("_")[0])
-                data_bkgrate = float(input_file.split("l")[-1].split("_")[0])
-                results[key].setdefault((data_num, data_bkgrate), []).append(
-                    float(result.split(" s.")[0])
-                )
 
-    df_focus = (
-        pd.DataFrame(results["focus"])
-        .stack()
-        .reset_index(level=0, drop=True)
-        .transpose()
-        .groupby(level=0, axis=1)
-        .mean()
-    )
-    df_benchmark = (
-        pd.DataFrame(results["benchmark"])
-        .stack()
-        .reset_index(level=0, drop=True)
-        .transpose()
-        .groupby(level=0, axis=1)
-        .mean()
+def load_table(filepath, statistic="median"):
+    """
+    Reads a json lines results file into a table of run times, in milliseconds.
+    """
+    results = pd.read_json(filepath, lines=True)
+    table = results.pivot_table(
+        index="n", columns="lambda", values=statistic, aggfunc="mean"
     )
-    df_focus = df_focus * 1000
-    df_benchmark = df_benchmark * 1000
+    return table * 1000
+
+
+if __name__ == "__main__":
+    df_focus = load_table("./outputs/results_focus.jsonl")
+    df_focus_des = load_table("./outputs/results_focus_des.jsonl")
+    df_benchmark = load_table("./outputs/results_gbm.jsonl")
 
     print("focus: ")
     print(df_focus.style.format(precision=2).to_latex(hrules=True))
+    print("focus des: ")
+    print(df_focus_des.style.format(precision=2).to_latex(hrules=True))
     print("benchmark: ")
     print(df_benchmark.style.format(precision=2).to_latex(hrules=True))
-    merged_df = pd.concat((df_focus, df_benchmark), axis=1).drop(columns=[8.0, 32.0])
+    merged_df = pd.concat((df_focus, df_benchmark), axis=1).drop(
+        columns=[8.0, 32.0], errors="ignore"
+    )
     latex_string = merged_df.style.format(precision=2).to_latex(hrules=True)
     print("concatenated: ")
     print(latex_string)
@@ -1,10 +1,14 @@
-import pickle
-
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from lmfit.models import StepModel
 
+try:
+    from detection_performances.store import load_results
+except ImportError:
+    # running as a script from this folder.
+    from store import load_results
+
 
 def fit_erf(intensities, efficiency):
     x, y = intensities, efficiency
@@ -16,7 +20,7 @@ def fit_erf(intensities, efficiency):
 
 
 def make_plot(results_filepath):
-    results = pickle.load(open(results_filepath, "rb"))
+    results = load_results(results_filepath)
 
     fluences = results["fluences"]
     labels = results["true"].keys()
@@ -64,6 +68,6 @@ def make_plot(results_filepath):
 
 
 if __name__ == "__main__":
-    results_filepath = "outputs/results_dataset_grb180703949.pkl"
+    results_filepath = "outputs/results_dataset_grb180703949"
     fig, ax = make_plot(results_filepath)
     plt.show()
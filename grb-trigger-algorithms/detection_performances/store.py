@@ -0,0 +1,169 @@
+"""
+An incremental store for detection performance results. Results are saved in a
+folder, one `.npz` file per block of rows and algorithm, as soon as each block
+is completed. Interrupted runs are resumed skipping the completed blocks.
+Results are read lazily, one algorithm at a time.
+"""
+
+import json
+import os
+import pickle
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+
+INDEX_FILENAME = "index.json"
+
+
+class ResultStore:
+    def __init__(self, path, labels=None, fluences=None, repeats=None):
+        """
+        Opens a result store, creating it if it does not exist.
+
+        Args:
+            path: the store's folder.
+            labels: the algorithms' labels.
+            fluences: the fluence values, one per column of results.
+            repeats: number of repeats, one per row of results.
+            the last three arguments are needed when creating a new store.
+            for an existing store, they must match the stored values.
+
+        Raises:
+            ValueError: if the arguments do not match an existing store.
+        """
+        self.path = Path(path)
+        index_path = self.path / INDEX_FILENAME
+        given = {"labels": labels, "fluences": fluences, "repeats": repeats}
+        if index_path.is_file():
+            with open(index_path) as f:
+                index = json.load(f)
+            for key, value in given.items():
+                if value is not None and list(np.atleast_1d(value)) != list(
+                    np.atleast_1d(index[key])
+                ):
+                    raise ValueError(
+                        f"results in {self.path} were computed with different {key}."
+                    )
+        else:
+            if None in given.values():
+                raise ValueError("labels, fluences and repeats are needed.")
+            index = {
+                "labels": list(labels),
+                "fluences": [int(f) for f in fluences],
+                "repeats": int(repeats),
+            }
+            self.path.mkdir(parents=True, exist_ok=True)
+            write_atomic(index_path, lambda f: f.write(json.dumps(index).encode()))
+        self.labels = index["labels"]
+        self.fluences = index["fluences"]
+        self.repeats = index["repeats"]
+        self.nrows = self.repeats * len(self.fluences)
+
+    def block_path(self, label, start, stop):
+        return self.path / label / f"{start:09d}-{stop:09d}.npz"
+
+    def blocks(self, label):
+        """
+        Returns a sorted list of (start, stop) row ranges completed for `label`.
+        """
+        folder = self.path / label
+        if not folder.is_dir():
+            return []
+        return sorted(
+            tuple(int(row) for row in p.stem.split("-")) for p in folder.glob("*.npz")
+        )
+
+    def missing(self, label):
+        """
+        Returns a list of (start, stop) row ranges not completed for `label`.
+        """
+        out = []
+        row = 0
+        for start, stop in self.blocks(label):
+            if start > row:
+                out.append((row, start))
+            row = max(row, stop)
+        if row < self.nrows:
+            out.append((row, self.nrows))
+        return out
+
+    def save(self, label, start, stop, true_det, false_det):
+        """
+        Saves the true and false positives of rows from `start` to `stop`.
+        The block is written to a temporary file first, so that an interrupted
+        write does not leave a corrupted block.
+        """
+        path = self.block_path(label, start, stop)
+        path.parent.mkdir(exist_ok=True)
+        write_atomic(path, lambda f: np.savez(f, true=true_det, false=false_det))
+
+    def load(self, label, kind):
+        """
+        Args:
+            label: an algorithm's label.
+            kind: either "true" or "false".
+
+        Returns:
+            An array with one row per repeat and one column per fluence.
+
+        Raises:
+            ValueError: if some results are missing.
+        """
+        if self.missing(label):
+            raise ValueError(f"results for {label} in {self.path} are incomplete.")
+        blocks = []
+        for start, stop in self.blocks(label):
+            with np.load(self.block_path(label, start, stop)) as data:
+                blocks.append(data[kind])
+        return np.concatenate(blocks).reshape(self.repeats, len(self.fluences))
+
+    def results(self):
+        """
+        Returns a results dictionary, with the same layout of the results
+        pickled by older versions of `detperf.py`. Arrays are loaded on access.
+        """
+        return {
+            "fluences": self.fluences,
+            "true": LazyResults(self, "true"),
+            "false": LazyResults(self, "false"),
+        }
+
+
+class LazyResults(Mapping):
+    """
+    A read-only mapping from labels to results, loaded from the store when
+    accessed.
+    """
+
+    def __init__(self, store: ResultStore, kind: str):
+        self.store = store
+        self.kind = kind
+
+    def __getitem__(self, label):
+        if label not in self.store.labels:
+            raise KeyError(label)
+        return self.store.load(label, self.kind)
+
+    def __iter__(self):
+        return iter(self.store.labels)
+
+    def __len__(self):
+        return len(self.store.labels)
+
+
+def write_atomic(path, write):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def load_results(results_filepath):
+    """
+    Loads results from a result store folder, or from a pickle file.
+    """
+    if Path(results_filepath).is_dir():
+        return ResultStore(results_filepath).results()
+    with open(results_filepath, "rb") as f:
+        return pickle.load(f)
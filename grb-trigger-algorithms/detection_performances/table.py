@@ -1,9 +1,13 @@
-import pickle
-
 import numpy as np
 import pandas as pd
 from lmfit.models import StepModel
 
+try:
+    from detection_performances.store import load_results
+except ImportError:
+    # running as a script from this folder.
+    from store import load_results
+
 
 def fit_erf(intensities, efficiency):
     x, y = intensities, efficiency
@@ -15,7 +19,7 @@ def fit_erf(intensities, efficiency):
 
 
 def make_table(results_filepath):
-    results = pickle.load(open(results_filepath, "rb"))
+    results = load_results(results_filepath)
     fluences = results["fluences"]
     labels = list(results["true"].keys())
 
@@ -63,5 +67,5 @@ def make_table(results_filepath):
 
 
 if __name__ == "__main__":
-    results_filepath = "outputs/results_dataset_grb180703949.pkl"
+    results_filepath = "outputs/results_dataset_grb180703949"
     print(make_table(results_filepath))
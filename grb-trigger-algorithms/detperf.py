@@ -1,41 +1,61 @@
 """
 This scipt runs the computational efficiency tests.
-The use of the exhaustive search algorithm is disabled by default.
-You can enable it uncommenting line 179.
+The exhaustive search runs on the vectorized engine `algorithms.exhaustive_np`.
 The script is parallelized with joblib. By default it uses 8 threads.
+Work is split into (row block, algorithm) tasks, sized after a quick estimate
+of each algorithm's cost, and run over a single pool of workers.
 """
 
-import pickle
+import time
 from math import ceil
 
 import numpy as np
-from algorithms import exhaustive_true, param_sma, pfocus_des, pfocus_true
+from algorithms import exhaustive_np, param_sma, pfocus, pfocus_des, pfocus_true
 from astropy.io import fits
 from detection_performances.plot import make_plot
+from detection_performances.store import ResultStore
 from detection_performances.table import make_table
 from joblib import Parallel, delayed
 
+# number of tasks per worker. more tasks even out the workers' loads, at the
+# cost of more scheduling overhead.
+TASKS_PER_THREAD = 4
+
+try:
+    from algorithms import pfocus_c
+except ImportError:
+    # the C implementation of Poisson-FOCuS is not compiled.
+    pfocus_c = None
+
 
 def run_triggers(control, test, triglist, labels, fluences, binning):
     container = np.zeros(
-        len(fluences),
+        len(control),
         dtype=[("significance", "f"), ("changepoint", "f"), ("triggertime", "f")],
     )
     false_positives = {label: container.copy() for label in labels}
     true_positives = {label: container.copy() for label in labels}
 
-    for i, f in enumerate(fluences):
-        counts = control[i]
-        for label, trigger in list(zip(labels, triglist)):
+    for label, trigger in list(zip(labels, triglist)):
+        run_block = getattr(trigger, "run_block", None)
+        if run_block is not None:
+            # vectorized triggers step all the light curves in lockstep.
+            rows = np.arange(len(control))
+            store_block(false_positives[label], rows, run_block(control), binning)
+            rows = rows[false_positives[label]["significance"] <= 0.0]
+            store_block(true_positives[label], rows, run_block(test[rows]), binning)
+            continue
+
+        for i in range(len(control)):
+            counts = control[i]
             significance, changepoint, triggertime = trigger(counts)
             if significance > 0:
                 result = (significance, changepoint * binning, triggertime * binning)
                 false_positives[label][i] = result
 
-        counts = test[i]
-        for label, trigger in list(zip(labels, triglist)):
             if false_positives[label][i]["significance"] > 0.0:
                 continue
+            counts = test[i]
             significance, changepoint, triggertime = trigger(counts)
             if significance > 0:
                 result = (significance, changepoint * binning, triggertime * binning)
@@ -47,9 +67,93 @@ def run_triggers(control, test, triglist, labels, fluences, binning):
     return output
 
 
+def store_block(container, rows, results, binning):
+    detected = results["significance"] > 0
+    rows, results = rows[detected], results[detected]
+    container["significance"][rows] = results["significance"]
+    container["changepoint"][rows] = results["changepoint"] * binning
+    container["triggertime"][rows] = results["triggertime"] * binning
+
+
+def load_rows(filepath, start, stop):
+    """
+    Reads the control and test light curves from `start` to `stop` rows of a
+    simulated dataset. The file is memory-mapped, so only these rows are read.
+    """
+    with fits.open(filepath, memmap=True) as hdul:
+        controls = np.array(hdul[2].data[start:stop])
+        tests = np.array(hdul[1].data[start:stop])
+    return controls, tests
+
+
+def run_task(filepath, trigger, label, start, stop, fluences, binning, store=None):
+    """
+    Runs a trigger over rows from `start` to `stop` of a dataset.
+    Workers receive row ranges and read their own rows from the dataset, so
+    that light curves are not copied into each task.
+
+    Returns:
+        A 2-tuple of arrays, with true and false positives. if a result store
+        is given, results are saved to the store instead, and None is returned.
+    """
+    controls, tests = load_rows(filepath, start, stop)
+    out = run_triggers(controls, tests, [trigger], [label], fluences, binning)
+    if store is None:
+        return out["true det"][label], out["false det"][label]
+    store.save(label, start, stop, out["true det"][label], out["false det"][label])
+    return None
+
+
+def estimate_costs(filepath, triglist, labels, fluences, binning):
+    """
+    Times each trigger over the first control and test light curves.
+
+    Returns:
+        A list with the estimated seconds per row, one value per trigger.
+    """
+    controls, tests = load_rows(filepath, 0, 1)
+    costs = []
+    for label, trigger in zip(labels, triglist):
+        start = time.perf_counter()
+        run_triggers(controls, tests, [trigger], [label], fluences, binning)
+        costs.append(time.perf_counter() - start)
+    return costs
+
+
+def schedule(costs, todo, block_len, nthreads, tasks_per_thread=TASKS_PER_THREAD):
+    """
+    Splits the rows into blocks, separately for each trigger, so that tasks take
+    about the same time. Block sizes are multiples of `block_len`.
+
+    Args:
+        costs: estimated seconds per row, one value per trigger.
+        todo: the (start, stop) row ranges to run, one list per trigger.
+        block_len: rows in a block are a multiple of this.
+        nthreads: number of workers.
+        tasks_per_thread: the average number of tasks each worker will run.
+
+    Returns:
+        A list of (trigger index, start row, stop row) tasks, most expensive
+        tasks first.
+    """
+    rows = [sum(stop - start for start, stop in ranges) for ranges in todo]
+    target = np.dot(costs, rows) / (nthreads * tasks_per_thread)
+    tasks = []
+    for k, (cost, ranges) in enumerate(zip(costs, todo)):
+        blocks = max(round(target / (cost * block_len)) if cost else rows[k], 1)
+        step = blocks * block_len
+        for first, last in ranges:
+            tasks += [
+                (k, start, min(start + step, last))
+                for start in range(first, last, step)
+            ]
+    return sorted(
+        tasks, key=lambda task: costs[task[0]] * (task[2] - task[1]), reverse=True
+    )
+
+
 def parallelize(
-    controls,
-    tests,
+    filepath,
     triglist,
     labels,
     fluences,
@@ -57,27 +161,60 @@ def parallelize(
     nthreads,
     repeats=None,
     verbose=13,
+    parallel=None,
+    store=None,
 ):
-    def step(control, test):
-        return run_triggers(control, test, triglist, labels, fluences, binning)
+    """
+    Runs the triggers over a simulated dataset. If a joblib `parallel` instance
+    is given, its workers are used, otherwise a new pool of `nthreads` workers
+    is started. If a result store is given, results are saved as each task
+    completes, and the rows already in the store are skipped.
 
-    assert len(tests) % len(fluences) == 0
-    assert len(tests) == len(controls)
-    stride = int(len(tests) / len(fluences))
+    Returns:
+        Two mappings with true and false positives, from labels to arrays with
+        one row per repeat and one column per fluence. if a store is given,
+        arrays are read from the store when accessed.
+    """
+    with fits.open(filepath, memmap=True) as hdul:
+        nrows = hdul[1].shape[0]
+        assert nrows == hdul[2].shape[0]
+    assert nrows % len(fluences) == 0
+    stride = int(nrows / len(fluences))
     intensity_steps = len(fluences)
     _repeats = stride if repeats is None else repeats
-    out = Parallel(n_jobs=nthreads, verbose=verbose)(
-        delayed(step)(
-            controls[j * intensity_steps : (j + 1) * intensity_steps, :],
-            tests[j * intensity_steps : (j + 1) * intensity_steps, :],
+    nrows = _repeats * intensity_steps
+
+    if store is None:
+        todo = [[(0, nrows)] for _ in labels]
+    else:
+        todo = [store.missing(label) for label in labels]
+    costs = estimate_costs(filepath, triglist, labels, fluences, binning)
+    tasks = schedule(costs, todo, intensity_steps, nthreads)
+    if parallel is None:
+        parallel = Parallel(n_jobs=nthreads, verbose=verbose, batch_size=1)
+    out = parallel(
+        delayed(run_task)(
+            filepath, triglist[k], labels[k], start, stop, fluences, binning, store
         )
-        for j in range(_repeats)
+        for k, start, stop in tasks
     )
+    if store is not None:
+        results = store.results()
+        return results["true"], results["false"]
+
     true_positives = {}
     false_positives = {}
     for label in labels:
-        true_positives[label] = np.vstack([o["true det"][label] for o in out])
-        false_positives[label] = np.vstack([o["false det"][label] for o in out])
+        container = np.zeros(nrows, dtype=out[0][0].dtype)
+        true_positives[label] = container
+        false_positives[label] = container.copy()
+    for (k, start, stop), (true_det, false_det) in zip(tasks, out):
+        true_positives[labels[k]][start:stop] = true_det
+        false_positives[labels[k]][start:stop] = false_det
+    for label in labels:
+        shape = (_repeats, intensity_steps)
+        true_positives[label] = true_positives[label].reshape(shape)
+        false_positives[label] = false_positives[label].reshape(shape)
     return true_positives, false_positives
 
 
@@ -94,16 +231,15 @@ def _test(filepath):
     triglist = [focus]
     labels = ["focus"]
 
-    hdul = fits.open(filepath)
-    fsteps = hdul[0].header["FSTEPS"]
-    nmin, nmax = hdul[0].header["NMIN"], hdul[0].header["NMAX"]
-    binning = hdul[0].header["BINNING"]
+    header = fits.getheader(filepath)
+    fsteps = header["FSTEPS"]
+    nmin, nmax = header["NMIN"], header["NMAX"]
+    binning = header["BINNING"]
     fluences = [round(f) for f in np.linspace(nmin, nmax, fsteps, endpoint=True)]
-    controls = hdul[2].data
-    tests = hdul[1].data
+    controls, tests = load_rows(filepath, 0, len(fluences))
     run_triggers(
-        controls[: len(fluences), :],
-        tests[: len(fluences), :],
+        controls,
+        tests,
         triglist,
         labels,
         fluences,
@@ -112,8 +248,7 @@ def _test(filepath):
     print("completed single thread test")
 
     parallelize(
-        controls,
-        tests,
+        filepath,
         triglist,
         labels,
         fluences,
@@ -132,93 +267,91 @@ def main(nthreads=8):
         "dataset_grb180703949",
         "dataset_grb120707800",
     ]
-    for filename in filenames:
-        print(f"Running on {filename}..")
-        hdul = fits.open(f"data/simulated_{filename}.fits")
-        fsteps = hdul[0].header["FSTEPS"]
-        nmin, nmax = hdul[0].header["NMIN"], hdul[0].header["NMAX"]
-        binning = hdul[0].header["BINNING"]
-        bkg_rate = hdul[0].header["BKGRATE"]
-        lc_duration = hdul[0].header["DURATION"]
-        burst_start_time = hdul[0].header["BSTART"]
-        fluences = [round(f) for f in np.linspace(nmin, nmax, fsteps, endpoint=True)]
-        controls = hdul[2].data
-        tests = hdul[1].data
-
-        ftrue = pfocus_true.init(
-            threshold=threshold,
-            b=bkg_rate * binning,
-            skip=1062,
-        )
+    # a single pool of workers is kept over all the datasets.
+    with Parallel(n_jobs=nthreads, verbose=13, batch_size=1) as parallel:
+        for filename in filenames:
+            print(f"Running on {filename}..")
+            filepath = f"data/simulated_{filename}.fits"
+            header = fits.getheader(filepath)
+            fsteps = header["FSTEPS"]
+            nmin, nmax = header["NMIN"], header["NMAX"]
+            binning = header["BINNING"]
+            bkg_rate = header["BKGRATE"]
+            lc_duration = header["DURATION"]
+            burst_start_time = header["BSTART"]
+            fluences = [
+                round(f) for f in np.linspace(nmin, nmax, fsteps, endpoint=True)
+            ]
 
-        exh = exhaustive_true.init(
-            threshold=threshold,
-            b=bkg_rate * binning,
-            hmax=ceil((lc_duration - burst_start_time) / binning),
-            skip=1062,
-        )
+            ftrue = (pfocus_c or pfocus_true).init(
+                threshold=threshold,
+                b=bkg_rate * binning,
+                skip=1062,
+            )
 
-        focus = pfocus_des.init(
-            threshold=threshold,
-            alpha=0.002,
-            beta=0.0,
-            m=250,
-            t_max=250,
-            sleep=1062,
-            mu_min=1.1,
-        )
+            exh = exhaustive_np.init(
+                threshold=threshold,
+                b=bkg_rate * binning,
+                hmax=ceil((lc_duration - burst_start_time) / binning),
+                skip=1062,
+            )
 
-        gbm = param_sma.init_gbm(
-            threshold=threshold,
-        )
+            focus = pfocus_des.init(
+                threshold=threshold,
+                alpha=0.002,
+                beta=0.0,
+                m=250,
+                t_max=250,
+                sleep=1062,
+                mu_min=1.1,
+                backend=pfocus_c.Focus if pfocus_c else pfocus.Focus,
+            )
 
-        batse = param_sma.init_batse(
-            threshold=threshold,
-        )
+            gbm = param_sma.init_gbm(
+                threshold=threshold,
+            )
 
-        trig_dict = {
-            # "Exhaustive": exh,
-            "FOCuS": ftrue,
-            "FOCuS-AES": focus,
-            "GBM": gbm,
-            "BATSE": batse,
-        }
-        triglist = list(trig_dict.values())
-        labels = list(trig_dict.keys())
-
-        true_detections, false_detections = parallelize(
-            controls,
-            tests,
-            triglist,
-            labels,
-            fluences,
-            binning,
-            nthreads,
-            verbose=13,
-        )
+            batse = param_sma.init_batse(
+                threshold=threshold,
+            )
+
+            trig_dict = {
+                "Exhaustive": exh,
+                "FOCuS": ftrue,
+                "FOCuS-AES": focus,
+                "GBM": gbm,
+                "BATSE": batse,
+            }
+            triglist = list(trig_dict.values())
+            labels = list(trig_dict.keys())
+
+            # results are saved as they come, an interrupted run is resumed.
+            results_filepath = f"detection_performances/outputs/results_{filename}"
+            with fits.open(filepath, memmap=True) as hdul:
+                repeats = hdul[1].shape[0] // len(fluences)
+            store = ResultStore(results_filepath, labels, fluences, repeats)
+            parallelize(
+                filepath,
+                triglist,
+                labels,
+                fluences,
+                binning,
+                nthreads,
+                parallel=parallel,
+                store=store,
+            )
+
+            latex_string = make_table(results_filepath)
+            Path("detection_performances/tables/").mkdir(parents=True, exist_ok=True)
+            table_filepath = f"detection_performances/tables/table_{filename}.tex"
+            with open(table_filepath, "w") as f:
+                f.write(latex_string)
+            make_plot(results_filepath)
 
-        results = {
-            "fluences": fluences,
-            "true": true_detections,
-            "false": false_detections,
-        }
-
-        Path("detection_performances/outputs/").mkdir(parents=True, exist_ok=True)
-        results_filepath = f"detection_performances/outputs/results_{filename}.pkl"
-        with open(results_filepath, "wb") as to_file:
-            pickle.dump(results, to_file)
-
-        latex_string = make_table(results_filepath)
-        Path("detection_performances/tables/").mkdir(parents=True, exist_ok=True)
-        table_filepath = f"detection_performances/tables/table_{filename}.tex"
-        with open(table_filepath, "w") as f:
-            f.write(latex_string)
-        make_plot(results_filepath)
-
-        fig, ax = make_plot(results_filepath)
-        Path("detection_performances/plots/").mkdir(parents=True, exist_ok=True)
-        plot_filepath = f"detection_performances/plots/plot_{filename}.png"
-        fig.savefig(plot_filepath, dpi=300)
+            fig, ax = make_plot(results_filepath)
+            Path("detection_performances/plots/").mkdir(parents=True, exist_ok=True)
+            plot_filepath = f"detection_performances/plots/plot_{filename}.png"
+            fig.savefig(plot_filepath, dpi=300)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,238 @@
+"""
+Streaming readers for GBM count datasets. Datasets are read one chunk of rows
+at a time, so that memory stays bounded over long archives.
+Datasets can also be converted once to a binary columnar cache: a folder with
+one memory-mapped `.npy` array per column, stored with the smallest sufficient
+dtype. Rows with all the detectors off or on are precomputed, so that readers
+only need the columns of the channels they run on.
+"""
+
+import json
+import os
+import queue
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from real_data.trigger_multiplexer import get_keys
+
+# marks the end of a prefetched stream.
+_END = object()
+
+CACHE_INDEX_FILENAME = "index.json"
+# precomputed columns, flagging rows with all the detectors off, or on.
+ALLOFF, ALLON = "ALLOFF", "ALLON"
+
+
+def read_chunks(datafiles, chunksize=2**16, columns=None):
+    """
+    Reads zipped csv datasets back to back, one chunk of rows at a time.
+    :param datafiles: path to a zipped csv dataset, or sequence of paths
+    :param chunksize: number of rows per chunk
+    :param columns: columns to read, defaults to all
+    :return: an iterator of dataframes
+    """
+    if isinstance(datafiles, (str, os.PathLike)):
+        datafiles = [datafiles]
+    for datafile in datafiles:
+        with pd.read_csv(
+            datafile,
+            compression="zip",
+            chunksize=chunksize,
+            usecols=columns,
+        ) as reader:
+            yield from reader
+
+
+def prefetch(iterable, depth=2):
+    """
+    Consumes an iterable in a background thread, keeping up to `depth` items
+    ready. csv parsing and decompression run while the caller works on the
+    current item. exceptions raised by the iterable are raised to the caller.
+    :param iterable: an iterable, e.g. from `read_chunks`
+    :param depth: maximum number of items read in advance
+    :return: an iterator over the same items
+    """
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item):
+        # gives up when the consumer is gone.
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception as error:
+            put((_END, error))
+        else:
+            put((_END, None))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def smallest_dtype(dtype, lo, hi):
+    """
+    :param dtype: a column's dtype
+    :param lo: the column's minimum
+    :param hi: the column's maximum
+    :return: the smallest dtype holding the column. only integers are shrunk.
+    """
+    if not np.issubdtype(dtype, np.integer):
+        return np.dtype(dtype)
+    return np.result_type(np.min_scalar_type(lo), np.min_scalar_type(hi))
+
+
+def write_cache(datafiles, path, chunksize=2**16):
+    """
+    Converts zipped csv datasets to a binary columnar cache. Datasets are read
+    twice in chunks: first to find the columns' ranges, then to write them.
+    The index file is written last, so an interrupted conversion is not
+    mistaken for a complete cache.
+    :param datafiles: path to a zipped csv dataset, or sequence of paths
+    :param path: the cache's folder
+    :param chunksize: number of rows per chunk
+    :return: a ColumnCache
+    """
+    if isinstance(datafiles, (str, os.PathLike)):
+        datafiles = [datafiles]
+    columns = ["MET", "SAA"] + get_keys()
+    nrows, dtypes, los, his = 0, {}, {}, {}
+    for chunk in read_chunks(datafiles, chunksize, columns):
+        nrows += len(chunk)
+        for key in columns:
+            lo, hi = chunk[key].min(), chunk[key].max()
+            dtypes[key] = chunk[key].dtype
+            los[key] = min(los.get(key, lo), lo)
+            his[key] = max(his.get(key, hi), hi)
+    dtypes = {key: smallest_dtype(dtypes[key], los[key], his[key]) for key in columns}
+    dtypes[ALLOFF] = dtypes[ALLON] = np.dtype(bool)
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    (path / CACHE_INDEX_FILENAME).unlink(missing_ok=True)
+    arrays = {
+        key: np.lib.format.open_memmap(
+            path / f"{key}.npy", mode="w+", dtype=dtype, shape=(nrows,)
+        )
+        for key, dtype in dtypes.items()
+    }
+    start = 0
+    for chunk in read_chunks(datafiles, chunksize, columns):
+        stop = start + len(chunk)
+        for key in columns:
+            arrays[key][start:stop] = chunk[key].to_numpy()
+        counts = chunk[get_keys()].to_numpy()
+        arrays[ALLOFF][start:stop] = ~np.any(counts, axis=1)
+        arrays[ALLON][start:stop] = np.all(counts, axis=1)
+        start = stop
+    for array in arrays.values():
+        array.flush()
+    del arrays
+
+    index = {
+        "nrows": nrows,
+        "dtypes": {key: dtype.str for key, dtype in dtypes.items()},
+        "sources": [str(datafile) for datafile in datafiles],
+    }
+    with open(path / CACHE_INDEX_FILENAME, "w") as f:
+        json.dump(index, f)
+    return ColumnCache(path)
+
+
+class ColumnCache:
+    """
+    A binary columnar cache of a GBM dataset. Columns are memory-mapped when
+    first accessed, and only the accessed rows are read from disk.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: the cache's folder
+        """
+        self.path = Path(path)
+        index_path = self.path / CACHE_INDEX_FILENAME
+        if not index_path.is_file():
+            raise ValueError(f"no complete cache found in {self.path}.")
+        with open(index_path) as f:
+            index = json.load(f)
+        self.nrows = index["nrows"]
+        self.sources = index["sources"]
+        self.columns = list(index["dtypes"])
+        self._arrays = {}
+
+    def __len__(self):
+        return self.nrows
+
+    def __contains__(self, key):
+        return key in self.columns
+
+    def __getitem__(self, key):
+        if key not in self.columns:
+            raise KeyError(key)
+        if key not in self._arrays:
+            self._arrays[key] = np.load(self.path / f"{key}.npy", mmap_mode="r")
+        return self._arrays[key]
+
+    def chunks(self, chunksize=2**16):
+        """
+        :param chunksize: number of rows per chunk
+        :return: an iterator of chunks, mappings from column names to arrays.
+        arrays are views of the cache, and are read from disk when accessed.
+        """
+        for start in range(0, self.nrows, chunksize):
+            yield _CacheChunk(self, start, min(start + chunksize, self.nrows))
+
+
+class _CacheChunk:
+    # a lazy slice of a cache's rows, reading only the accessed columns.
+    def __init__(self, cache, start, stop):
+        self.cache, self.start, self.stop = cache, start, stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __contains__(self, key):
+        return key in self.cache
+
+    def __getitem__(self, key):
+        return self.cache[key][self.start : self.stop]
+
+
+def open_cache(datafiles, path, chunksize=2**16):
+    """
+    Opens the cache of some datasets, converting them first if needed.
+    :param datafiles: path to a zipped csv dataset, or sequence of paths
+    :param path: the cache's folder
+    :param chunksize: number of rows per chunk, when converting
+    :return: a ColumnCache
+    """
+    if isinstance(datafiles, (str, os.PathLike)):
+        datafiles = [datafiles]
+    try:
+        cache = ColumnCache(path)
+    except ValueError:
+        return write_cache(datafiles, path, chunksize)
+    if cache.sources != [str(datafile) for datafile in datafiles]:
+        raise ValueError(f"cache in {path} was built from different datasets.")
+    return cache
@@ -1,8 +1,11 @@
+import json
 import warnings
 import logging
+import time
 from math import sqrt
 
 import numpy as np
+from joblib import Parallel, delayed
 
 KDETS = ("0", "1", "2", "3", "4", "5", "6", "7", "8", "9", "a", "b")
 KRANGES = ("0", "1", "2")
@@ -36,136 +39,704 @@ def filter_keys(ls, ns, rs=None):
     return sorted(get_keys(out_index, out_range))
 
 
+def group_channels(keys, by="detector"):
+    """
+    :param keys: list of channel keys, like ['n1_r0', 'n3_r0']
+    :param by: either "detector" or "range"
+    :return: list of group indeces, one per key
+    """
+    if by == "detector":
+        labels = [key[1] for key in keys]
+    elif by == "range":
+        labels = [key[-1] for key in keys]
+    else:
+        raise ValueError("channels can be grouped either by detector or range.")
+    ids = {label: i for i, label in enumerate(sorted(set(labels)))}
+    return [ids[label] for label in labels]
+
+
+class Coincidence:
+    """
+    An incremental k-of-n coincidence condition. channels are grouped, e.g. by
+    detector, and the condition holds when channels from at least k groups are
+    over threshold. a channel's state is updated only when it crosses
+    threshold, hence the condition is checked in constant time.
+    """
+
+    def __init__(self, groups, k=2):
+        """
+        :param groups: sequence of group indeces, one per channel
+        :param k: minimum number of groups over threshold
+        """
+        if k < 1:
+            raise ValueError("k must be a positive integer.")
+        self.groups = list(groups)
+        self.k = k
+        self.counts = [0 for _ in range(max(self.groups, default=-1) + 1)]
+        self.over = [False for _ in self.groups]
+        self.active = 0
+
+    def reset(self):
+        # lists are cleared in place, callers may keep a reference to them.
+        self.counts[:] = [0 for _ in self.counts]
+        self.over[:] = [False for _ in self.over]
+        self.active = 0
+
+    def update(self, n, over):
+        """
+        to save calls, callers may skip this when over equals self.over[n].
+        :param n: channel index
+        :param over: True if the channel is over threshold
+        """
+        if self.over[n] == over:
+            return
+        self.over[n] = over
+        g = self.groups[n]
+        if over:
+            self.counts[g] += 1
+            if self.counts[g] == 1:
+                self.active += 1
+        else:
+            self.counts[g] -= 1
+            if self.counts[g] == 0:
+                self.active -= 1
+
+    def triggered(self):
+        return self.active >= self.k
+
+
+def default_coincidence(nchannels):
+    """
+    The multiplexer's default condition: at least two detectors over
+    threshold. channel i belongs to group (i + 1) // 3, which is the detector
+    index for the channels of ranges r0 and r1.
+    :param nchannels: number of channels
+    :return: a Coincidence
+    """
+    return Coincidence([(i + 1) // 3 for i in range(nchannels)], k=2)
+
+
+# causes of trigger resets: SAA passages, all detectors off, bad data segments
+# of a channel, corrupted background estimates and triggers.
+RESET_CAUSES = ("saa", "off", "zeros", "corrupted", "trigger")
+# rows between checks for due progress reports.
+REPORT_CHECK_ROWS = 1024
+
+
+def stack_depth(trigger):
+    """
+    :param trigger: a trigger instance
+    :return: the number of curves held by a FOCuS trigger, or None.
+    """
+    if hasattr(trigger, "stack_depth"):
+        # C-backed triggers.
+        return trigger.stack_depth()
+    curves = getattr(getattr(trigger, "focus", None), "curves", None)
+    return None if curves is None else len(curves)
+
+
+class MuxStats:
+    """
+    Throughput and health counters of the multiplexers: rows per second,
+    per-channel resets by cause, triggers' curve stack depths and time spent in
+    each stage. progress is reported at most once every `interval` seconds to
+    the logger and, optionally, appended as json lines to a metrics file.
+    the multiplexers update counters in bulk, hence keeping stats is cheap.
+    """
+
+    def __init__(self, interval=10.0, metrics_path=None):
+        """
+        :param interval: minimum number of seconds between progress reports
+        :param metrics_path: a file to append reports to, as json lines
+        """
+        self.interval = interval
+        self.metrics_path = metrics_path
+        self.start()
+
+    def start(self, nrows=None, keys=()):
+        """
+        clears the counters.
+        :param nrows: total number of rows, None if unknown
+        :param keys: channel keys
+        """
+        self.nrows = nrows
+        self.keys = list(keys)
+        # rows run through the triggers, and last row reached.
+        self.rows = 0
+        self.position = 0
+        self.triggers = 0
+        self.resets = {cause: [0 for _ in self.keys] for cause in RESET_CAUSES}
+        self.stage_times = {}
+        self.depth_mean = None
+        self.depth_max = None
+        self.depth_peak = None
+        self.start_time = time.perf_counter()
+        self.last_report = self.start_time
+
+    def add_time(self, stage, seconds):
+        self.stage_times[stage] = self.stage_times.get(stage, 0.0) + seconds
+
+    def due(self):
+        return time.perf_counter() - self.last_report >= self.interval
+
+    def sample_depths(self, triggers):
+        """
+        :param triggers: trigger instances
+        """
+        depths = [d for d in map(stack_depth, triggers) if d is not None]
+        if not depths:
+            return
+        self.depth_mean = sum(depths) / len(depths)
+        self.depth_max = max(depths)
+        self.depth_peak = max(self.depth_max, self.depth_peak or 0)
+
+    def snapshot(self):
+        """
+        :return: a dictionary with the counters. resets are listed only for
+        channels which were reset.
+        """
+        elapsed = time.perf_counter() - self.start_time
+        return {
+            "elapsed": elapsed,
+            "rows": self.rows,
+            "position": int(self.position),
+            "nrows": self.nrows,
+            "rows_per_second": self.rows / elapsed if elapsed else 0.0,
+            "triggers": self.triggers,
+            "resets": {
+                cause: {k: c for k, c in zip(self.keys, counts) if c}
+                for cause, counts in self.resets.items()
+            },
+            "stack_depth": {
+                "mean": self.depth_mean,
+                "max": self.depth_max,
+                "peak": self.depth_peak,
+            },
+            "stage_times": dict(self.stage_times),
+        }
+
+    def report(self, final=False):
+        """
+        logs progress, and appends a snapshot to the metrics file.
+        :param final: True for the last report of a run
+        """
+        self.last_report = time.perf_counter()
+        snapshot = self.snapshot()
+        snapshot["final"] = final
+        if self.nrows:
+            progress = "{:.1f}% done".format(100 * self.position / self.nrows)
+        else:
+            progress = "{} rows done".format(self.position)
+        logging.info(
+            "{}, {:.0f} rows/s, {} triggers, resets: {}.".format(
+                progress,
+                snapshot["rows_per_second"],
+                self.triggers,
+                {cause: sum(counts) for cause, counts in self.resets.items()},
+            )
+        )
+        print(end="\r" + progress)
+        if self.metrics_path is not None:
+            with open(self.metrics_path, "a") as f:
+                f.write(json.dumps(snapshot) + "\n")
+        return snapshot
+
+
+def channel_arrays(observations, det_keys):
+    """
+    Reads the columns needed by the multiplexers. only the channels which are
+    run are read, rows with all detectors off or on are read from the
+    precomputed columns of a `real_data.reader.ColumnCache`, when available.
+    :param observations: a dataframe, a ColumnCache, or a chunk of them
+    :param det_keys: list of (channel index, channel key) pairs
+    :return: a 5-tuple of arrays: METs, SAA flags, counts with one column per
+    channel run, all-off and all-on flags.
+    """
+    mets_arr = np.asarray(observations["MET"])
+    saa_arr = np.asarray(observations["SAA"])
+    # counts of compact caches are widened, as triggers expect int64 counts.
+    counts_arr = np.column_stack(
+        [np.asarray(observations[key]) for _, key in det_keys]
+    ).astype(np.int64, copy=False)
+    if "ALLOFF" in observations and "ALLON" in observations:
+        alloff_arr = np.asarray(observations["ALLOFF"])
+        allon_arr = np.asarray(observations["ALLON"])
+    else:
+        all_counts = np.column_stack(
+            [np.asarray(observations[key]) for key in get_keys()]
+        )
+        alloff_arr = ~np.any(all_counts, axis=1)
+        allon_arr = np.all(all_counts, axis=1)
+    return mets_arr, saa_arr, counts_arr, alloff_arr, allon_arr
+
+
 def trigger_mux(
-    observations_df,
+    observations,
     trig,
     thresholds,
     stride,
     t_start=0.0,
     max_consecutive_zeros=10,
+    coincidence=None,
+    stats=None,
     **trig_params,
 ):
+    """
+    Runs a trigger over each channel, with a coincidence condition.
+    :param observations: a dataframe, a `real_data.reader.ColumnCache`, or an
+    iterable of dataframes with consecutive rows, e.g. from
+    `real_data.reader.read_chunks`. trigger states are carried across chunk
+    boundaries, hence results do not depend on chunk sizes. only the channels
+    with finite thresholds are read.
+    :param t_start: fraction of the rows to skip. iterables do not support it.
+    :param stats: a MuxStats, counting resets and reporting progress.
+    defaults to a new one, with default settings.
+    :return: trigger registry
+    """
+
     def reset_trigger(detector_key):
         trigs[detector_key] = trig(**trig_params)
         global_maximums[detector_key] = 0
         time_offsets[detector_key] = 0
+        coincidence.update(detector_key, False)
         return True
 
     ndet = len(thresholds)
 
-    mets_arr = observations_df["MET"].to_numpy()
-    saa_arr = observations_df["SAA"].to_numpy()
-    counts_arr = observations_df[get_keys()].to_numpy()
+    if hasattr(observations, "columns"):
+        nrows = len(observations)
+        # caches are read in chunks, to bound memory.
+        if hasattr(observations, "chunks"):
+            chunks = observations.chunks()
+        else:
+            chunks = [observations]
+    else:
+        if t_start:
+            raise ValueError("t_start is not supported over iterables.")
+        nrows = None
+        chunks = observations
     det_keys = [(i, k) for i, k in enumerate(get_keys()) if np.isfinite(thresholds[i])]
-    det_indeces, det_names = zip(*det_keys)
 
     consecutive_zeros = np.array([0 for _ in range(ndet)])
     global_maximums = np.array([0.0 for _ in range(ndet)])
     time_offsets = np.array([0 for _ in range(ndet)])
     trigs = [trig(**trig_params) for _ in range(ndet)]
     trig_registry = []
+    if coincidence is None:
+        coincidence = default_coincidence(ndet)
+    coincidence.reset()
+    coincidence_over = coincidence.over
+    channel_thresholds = np.asarray(thresholds, dtype=float).tolist()
+    if stats is None:
+        stats = MuxStats()
+    stats.start(nrows, get_keys())
+    resets = stats.resets
+    # rows run through the triggers. the clock is read once every
+    # REPORT_CHECK_ROWS rows, to check if a progress report is due.
+    stepped = 0
 
-    nrows = len(mets_arr)
-    t = int(t_start * nrows)
-    while t < nrows:
-        print(end="\r%6.2f %%" % (t / (nrows - 1) * 100))
-
-        # deals with SAA passages
-        if saa_arr[t]:
-            for n, _ in det_keys:
-                reset_trigger(n)
-                consecutive_zeros[n] = 0
-
-            try:
-                next_out, *_ = np.where(saa_arr[t:] == 0)[0]
-            except ValueError:
-                # deals with the possibility of observations ending in saa
-                if not np.all(saa_arr[t:]):
-                    raise
-                t = nrows
-            else:
-                t += next_out
+    t = 0 if nrows is None else int(t_start * nrows)
+    # while in a SAA passage, or with all detectors off, rows are skipped
+    # until the passage ends, or all the detectors are on again.
+    waiting_saa, waiting_on = False, False
+    # t is counted from the first row of the first chunk.
+    chunk_start = chunk_stop = 0
+    clock = time.perf_counter()
+    try:
+        for chunk in chunks:
+            # stage times: waiting for data, reading columns, skipping rows
+            # and resetting, running triggers.
+            read_clock = time.perf_counter()
+            stats.add_time("read", read_clock - clock)
+            chunk_stop = chunk_start + len(chunk)
+            if t >= chunk_stop:
+                chunk_start = chunk_stop
+                clock = time.perf_counter()
+                continue
+            mets_arr, saa_arr, counts_arr, alloff_arr, allon_arr = channel_arrays(
+                chunk, det_keys
+            )
+            clock = time.perf_counter()
+            stats.add_time("prepare", clock - read_clock)
+            skip_time = 0.0
+            while t < chunk_stop:
+                i = t - chunk_start
+                if waiting_saa or waiting_on:
+                    skip_clock = time.perf_counter()
+                    if waiting_saa:
+                        (next_rows,) = np.nonzero(saa_arr[i:] == 0)
+                    else:
+                        (next_rows,) = np.nonzero(allon_arr[i:])
+                    skip_time += time.perf_counter() - skip_clock
+                    if not len(next_rows):
+                        t = chunk_stop
+                        break
+                    t += next_rows[0]
+                    waiting_saa, waiting_on = False, False
+                    continue
+
+                # deals with SAA passages
+                if saa_arr[i]:
+                    skip_clock = time.perf_counter()
+                    for n, _ in det_keys:
+                        reset_trigger(n)
+                        resets["saa"][n] += 1
+                        consecutive_zeros[n] = 0
+                    waiting_saa = True
+                    skip_time += time.perf_counter() - skip_clock
+                    continue
+
+                # deals with occasionally detectors turning off at same time
+                elif alloff_arr[i]:
+                    skip_clock = time.perf_counter()
+                    for n, _ in det_keys:
+                        warnings.warn(
+                            f"All detectors seems to be off. "
+                            f"Resetting all triggers. "
+                            f"MET: {mets_arr[i]}"
+                        )
+                        reset_trigger(n)
+                        resets["off"][n] += 1
+                        consecutive_zeros[n] = 0
+                    waiting_on = True
+                    skip_time += time.perf_counter() - skip_clock
+                    continue
+
+                stepped += 1
+                if not stepped % REPORT_CHECK_ROWS and stats.due():
+                    stats.rows, stats.position = stepped, t
+                    stats.sample_depths(trigs[n] for n, _ in det_keys)
+                    stats.report()
+
+                for j, (n, det_key) in enumerate(det_keys):
+                    x_t = counts_arr[i, j]
+                    if x_t <= 0:
+                        consecutive_zeros[n] += 1
+                    else:
+                        consecutive_zeros[n] = 0
+
+                    if consecutive_zeros[n] > max_consecutive_zeros:
+                        # data may contains segments in which the counts of some detector
+                        # is constantly zero because the detector is turned off.
+                        # this happens most often with sun-facing detectors.
+                        # if we pass too much zero data to the trigger, they will
+                        # pollute the background estimate, possibly causing
+                        # false detection. when we detect this, we restart the trigger.
+                        reset_trigger(n)
+                        if consecutive_zeros[n] == max_consecutive_zeros + 1:
+                            # bad segments are counted once.
+                            resets["zeros"][n] += 1
+                        warnings.warn(
+                            f"Found a bad data segment for detector {det_key}. "
+                            f"Resetting the corresponding trigger. "
+                            f"MET: {mets_arr[i]}"
+                        )
+                        continue
+
+                    try:
+                        global_max, time_offset = trigs[n].step(x_t)
+                    except ValueError:
+                        resets["corrupted"][n] += 1
+                        raise ValueError(
+                            f"Corrupted background estimate over {det_key}. "
+                            f"Resetting this trigger."
+                            f"MET: {mets_arr[i]}"
+                        )
+                    global_maximums[n] = global_max
+                    time_offsets[n] = time_offset
+                    # the coincidence state changes only when channels cross threshold.
+                    over = global_max > channel_thresholds[n]
+                    if over != coincidence_over[n]:
+                        coincidence.update(n, over)
+
+                # trigger condition.
+                if coincidence.triggered():
+                    print(", found a trigger.")
+                    stats.triggers += 1
+                    channels = [
+                        (key, to, gm)
+                        for j, (key, to, gm) in enumerate(
+                            zip(get_keys(), time_offsets, global_maximums)
+                        )
+                        if gm > thresholds[j]
+                    ]
+                    register_trigger(trig_registry, t, nrows, mets_arr[i], channels)
+                    for n, _ in det_keys:
+                        reset_trigger(n)
+                        resets["trigger"][n] += 1
+                        consecutive_zeros[n] = 0
+                    t += stride
+                else:
+                    t += 1
+            step_clock, clock = clock, time.perf_counter()
+            stats.add_time("step", clock - step_clock - skip_time)
+            stats.add_time("skip", skip_time)
+            chunk_start = chunk_stop
+    finally:
+        stats.rows, stats.position = stepped, min(t, chunk_stop)
+        stats.sample_depths(trigs[n] for n, _ in det_keys)
+        stats.report(final=True)
+    return trig_registry
+
+
+def register_trigger(trig_registry, t, nrows, trig_met, channels):
+    """
+    Logs a trigger and appends it to the registry.
+    :param trig_registry: list of triggers
+    :param t: trigger iteration
+    :param nrows: total number of iterations, None if unknown
+    :param trig_met: trigger MET
+    :param channels: list of (key, time offset, significance) over threshold
+    """
+    logging.info("\n--------")
+    logging.info("New trigger [key: {:3d}]".format(len(trig_registry)))
+    logging.info("MET: {}.".format(trig_met))
+    if nrows is not None:
+        logging.info("{:.1f}% done!".format(100 * t / nrows))
+    logging.info("Iteration number: {}".format(t))
+    trig_entry = [len(trig_registry), trig_met]
+    for key, to, gm in channels:
+        logging.info(
+            "det_name: {}, time-offset: {:3d}, significance {:.2f}".format(key, -to, gm)
+        )
+        trig_entry.append((key, to, sqrt(2 * gm)))
+    trig_registry.append(tuple(trig_entry))
+
+
+def next_true(mask):
+    """
+    :param mask: boolean array
+    :return: array whose i-th entry is the index of the first true value of
+    mask at or after i, or len(mask) if there is none.
+    """
+    index = np.where(mask, np.arange(len(mask)), len(mask))
+    return np.minimum.accumulate(index[::-1])[::-1]
+
+
+def channel_pass(trig, trig_params, xs, threshold, max_consecutive_zeros):
+    """
+    Runs a fresh trigger over the counts of a single channel, with the same
+    zero-run resets of `trigger_mux`, and no coincidence resets.
+    :param trig: trigger class
+    :param trig_params: trigger parameters
+    :param xs: channel counts
+    :param threshold: channel threshold
+    :param max_consecutive_zeros: zero-run length causing a reset
+    :return: a 5-tuple. iterations over threshold, with their significances and
+    time offsets, iterations with zero-run resets, and the iteration at which
+    the background estimate got corrupted, or None. iterations are relative to
+    the start of xs. the pass stops at corrupted background.
+    """
+    trigger = trig(**trig_params)
+    over, gms, tos, zero_resets = [], [], [], []
+    error = None
+    consecutive_zeros = 0
+    for t, x_t in enumerate(xs.tolist()):
+        if x_t <= 0:
+            consecutive_zeros += 1
+        else:
+            consecutive_zeros = 0
+        if consecutive_zeros > max_consecutive_zeros:
+            trigger = trig(**trig_params)
+            zero_resets.append(t)
             continue
+        try:
+            global_max, time_offset = trigger.step(x_t)
+        except ValueError:
+            error = t
+            break
+        if global_max > threshold:
+            over.append(t)
+            gms.append(global_max)
+            tos.append(time_offset)
+    return (
+        np.array(over, dtype=np.int64),
+        np.array(gms, dtype=np.float64),
+        np.array(tos, dtype=np.int64),
+        zero_resets,
+        error,
+    )
+
 
-        # deals with occasionally detectors turning off at same time
-        elif not np.any(counts_arr[t]):
-            for n, _ in det_keys:
+def trigger_mux_parallel(
+    observations_df,
+    trig,
+    thresholds,
+    stride,
+    t_start=0.0,
+    max_consecutive_zeros=10,
+    coincidence=None,
+    n_jobs=-1,
+    stats=None,
+    **trig_params,
+):
+    """
+    A parallel version of `trigger_mux`, with the same trigger registry.
+    data are split in segments between SAA passages and detectors turning off
+    all at once. first, each channel runs independently over each segment in
+    a pool of workers. then coincidences are searched in order. after a
+    trigger, the rest of the segment is run again from the resume iteration.
+    :param observations_df: a dataframe, or a `real_data.reader.ColumnCache`
+    :param coincidence: a Coincidence, only its groups and k are used.
+    defaults to at least two detectors over threshold.
+    :param n_jobs: number of workers, see joblib.
+    :param stats: a MuxStats, see `trigger_mux`. stack depths are not sampled,
+    since triggers run in the workers.
+    :return: trigger registry
+    """
+    if stats is None:
+        stats = MuxStats()
+    stats.start(len(observations_df), get_keys())
+    resets = stats.resets
+    clock = time.perf_counter()
+    det_keys = [(i, k) for i, k in enumerate(get_keys()) if np.isfinite(thresholds[i])]
+    mets_arr, saa_arr, counts_arr, alloff_arr, allon_arr = channel_arrays(
+        observations_df, det_keys
+    )
+    nrows = len(mets_arr)
+
+    next_out = next_true(saa_arr == 0)
+    next_on = next_true(allon_arr)
+    next_reset = next_true((saa_arr != 0) | alloff_arr)
+    if coincidence is None:
+        coincidence = default_coincidence(len(thresholds))
+
+    def next_segment(t, count=False):
+        # follows the SAA and all-off jumps of trigger_mux, returning the
+        # next segment of iterations stepped with no resets, or None.
+        # resets are counted only if `count` is True.
+        while t < nrows:
+            if saa_arr[t]:
+                if count:
+                    for n, _ in det_keys:
+                        resets["saa"][n] += 1
+                t = next_out[t]
+            elif alloff_arr[t]:
                 warnings.warn(
                     f"All detectors seems to be off. "
                     f"Resetting all triggers. "
                     f"MET: {mets_arr[t]}"
                 )
-                reset_trigger(n)
-                consecutive_zeros[n] = 0
-            try:
-                next_out, *_ = np.where(np.all(counts_arr[t:], axis=1))[0]
-            except ValueError:
-                # deals with the possibility of signal never coming up again
-                if not np.all(counts_arr[t:]):
-                    raise
-                t = nrows
+                if count:
+                    for n, _ in det_keys:
+                        resets["off"][n] += 1
+                t = next_on[t]
             else:
-                t += next_out
-            continue
+                return t, next_reset[t]
+        return None
 
-        for n, det_key in zip(det_indeces, det_names):
-            x_t = counts_arr[t, n]
-            if x_t <= 0:
-                consecutive_zeros[n] += 1
-            else:
-                consecutive_zeros[n] = 0
-
-            if consecutive_zeros[n] > max_consecutive_zeros:
-                # data may contains segments in which the counts of some detector
-                # is constantly zero because the detector is turned off.
-                # this happens most often with sun-facing detectors.
-                # if we pass too much zero data to the trigger, they will
-                # pollute the background estimate, possibly causing
-                # false detection. when we detect this, we restart the trigger.
-                reset_trigger(n)
-                warnings.warn(
-                    f"Found a bad data segment for detector {det_key}. "
-                    f"Resetting the corresponding trigger. "
-                    f"MET: {mets_arr[t]}"
-                )
-                continue
+    def run_segments(segments):
+        run_clock = time.perf_counter()
+        passes = parallel(
+            delayed(channel_pass)(
+                trig,
+                trig_params,
+                counts_arr[start:stop, j],
+                thresholds[n],
+                max_consecutive_zeros,
+            )
+            for start, stop in segments
+            for j, (n, _) in enumerate(det_keys)
+        )
+        stats.add_time("channels", time.perf_counter() - run_clock)
+        return {
+            start: passes[i * len(det_keys) : (i + 1) * len(det_keys)]
+            for i, (start, _) in enumerate(segments)
+        }
 
-            try:
-                global_max, time_offset = trigs[n].step(x_t)
-            except ValueError:
-                raise ValueError(
-                    f"Corrupted background estimate over {det_key}. "
-                    f"Resetting this trigger."
-                    f"MET: {mets_arr[t]}"
-                )
-            global_maximums[n] = global_max
-            time_offsets[n] = time_offset
-
-        # trigger condition.
-        if len(np.unique(np.floor((np.argwhere(global_maximums > thresholds).T + 1) / 3))) > 1:
-            print(", found a trigger.")
-            logging.info("\n--------")
-            logging.info("New trigger [key: {:3d}]".format(len(trig_registry)))
-            trig_met = mets_arr[t]
-            logging.info("MET: {}.".format(trig_met))
-            logging.info("{:.1f}% done!".format(100 * t / nrows))
-            logging.info("Iteration number: {}".format(t))
-            trig_entry = [len(trig_registry), trig_met]
-            for i, (key, to, gm) in enumerate(
-                zip(get_keys(), time_offsets, global_maximums)
-            ):
-                if gm > thresholds[i]:
-                    logging.info(
-                        "det_name: {}, time-offset: {:3d}, significance {:.2f}".format(
-                            key, -to, gm
+    def first_coincidence(passes, start, stop):
+        # first iteration in which the coincidence condition holds, before
+        # `stop`.
+        groups, iterations = [], []
+        for (n, _), (over, *_) in zip(det_keys, passes):
+            over = over[over < stop - start] + start
+            iterations.append(over)
+            groups.append(np.full(len(over), coincidence.groups[n]))
+        iterations, groups = np.concatenate(iterations), np.concatenate(groups)
+        ngroups = len(coincidence.counts)
+        pairs = np.unique(iterations * ngroups + groups)
+        candidates, counts = np.unique(pairs // ngroups, return_counts=True)
+        passed = counts >= coincidence.k
+        return candidates[np.argmax(passed)] if np.any(passed) else None
+
+    trig_registry = []
+    t = int(t_start * nrows)
+    try:
+        with Parallel(n_jobs=n_jobs) as parallel:
+            # phase one: all the segments met with no triggers.
+            segments = []
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                while (segment := next_segment(t)) is not None:
+                    segments.append(segment)
+                    t = segment[1]
+            stats.add_time("split", time.perf_counter() - clock)
+            computed = run_segments(segments)
+
+            # phase two: coincidences, in order.
+            t = int(t_start * nrows)
+            while (segment := next_segment(t, count=True)) is not None:
+                start, stop = segment
+                t = start
+                if stats.due():
+                    stats.position = start
+                    stats.report()
+                if start not in computed:
+                    computed.update(run_segments([segment]))
+                clock = time.perf_counter()
+                passes = computed.pop(start)
+                corrupted = [
+                    (start + error, n)
+                    for (n, _), (*_, error) in zip(det_keys, passes)
+                    if error is not None
+                ]
+                end = min(corrupted)[0] if corrupted else stop
+                trigger_t = first_coincidence(passes, start, end)
+
+                limit = end if trigger_t is None else trigger_t + 1
+                for (n, det_key), (*_, zero_resets, _) in zip(det_keys, passes):
+                    for k, zero_t in enumerate(zero_resets):
+                        if start + zero_t < limit:
+                            if not k or zero_resets[k - 1] != zero_t - 1:
+                                # bad segments are counted once.
+                                resets["zeros"][n] += 1
+                            warnings.warn(
+                                f"Found a bad data segment for detector {det_key}. "
+                                f"Resetting the corresponding trigger. "
+                                f"MET: {mets_arr[start + zero_t]}"
+                            )
+                if trigger_t is None:
+                    if corrupted:
+                        error_t, n = min(corrupted)
+                        stats.rows += error_t + 1 - start
+                        t = error_t
+                        resets["corrupted"][n] += 1
+                        raise ValueError(
+                            f"Corrupted background estimate over {get_keys()[n]}. "
+                            f"Resetting this trigger."
+                            f"MET: {mets_arr[error_t]}"
                         )
-                    )
-                    trig_entry.append((key, to, sqrt(2 * gm)))
-            trig_registry.append(tuple(trig_entry))
-            for n, _ in det_keys:
-                reset_trigger(n)
-                consecutive_zeros[n] = 0
-            t += stride
-        else:
-            t += 1
+                    stats.rows += stop - start
+                    t = stop
+                    stats.add_time("coincidences", time.perf_counter() - clock)
+                    continue
+
+                print(", found a trigger.")
+                stats.rows += trigger_t + 1 - start
+                stats.triggers += 1
+                channels = []
+                for (n, det_key), (over, gms, tos, *_) in zip(det_keys, passes):
+                    resets["trigger"][n] += 1
+                    i = np.searchsorted(over, trigger_t - start)
+                    if i < len(over) and over[i] == trigger_t - start:
+                        channels.append((det_key, tos[i], gms[i]))
+                trig_met = mets_arr[trigger_t]
+                register_trigger(trig_registry, trigger_t, nrows, trig_met, channels)
+                t = trigger_t + stride
+                stats.add_time("coincidences", time.perf_counter() - clock)
+            # the last segment was followed to the end of data.
+            t = nrows
+    finally:
+        stats.position = min(t, nrows)
+        stats.report(final=True)
     return trig_registry
@@ -8,11 +8,26 @@ import time
 
 import numpy as np
 import pandas as pd
-from algorithms.pfocus_des import FOCuSDES
-from real_data.trigger_multiplexer import trigger_mux
+from real_data.reader import open_cache, prefetch, read_chunks
+from real_data.trigger_multiplexer import MuxStats, trigger_mux, trigger_mux_parallel
+
+try:
+    # the whole trigger runs in C, background estimate included.
+    from algorithms.pfocus_c import FOCuSDES
+except ImportError:
+    # the C implementation of Poisson-FOCuS is not compiled.
+    from algorithms.pfocus_des import FOCuSDES
 
 if __name__ == "__main__":
-    datafile = "./data/gbm_dataset_20171002_20171009.zip"
+    # datasets are run back to back.
+    datafiles = ["./data/gbm_dataset_20171002_20171009.zip"]
+    # with streaming, data are read in chunks and memory stays bounded over
+    # long archives. otherwise, data are read at once and channels run in
+    # parallel.
+    stream = False
+    # datasets are converted once to a binary cache, which later runs map.
+    # set to None to parse the datasets at each run.
+    cache_path = "./data/cache_gbm_20171002_20171009"
     trigger = FOCuSDES
     threshold = 5.0
     threshold_array = np.array([np.inf, threshold, np.inf] * 12)
@@ -35,10 +50,46 @@ if __name__ == "__main__":
         "Hello!\nA log file with timestamp '{}' has been created.\n"
         "You can check it while I'm working.".format(timestamp)
     )
-    logging.info("Running on datafile: {}.".format(datafile))
-    logging.info("Trigger algorithm: {}.".format(trigger.__name__))
+    logging.info("Running on datafiles: {}.".format(datafiles))
+    logging.info(
+        "Trigger algorithm: {}.{}.".format(trigger.__module__, trigger.__name__)
+    )
     logging.info("Trigger parameters: {}".format(parameters))
+    # progress, throughput and resets are logged every minute, and saved to a
+    # metrics file.
+    stats = MuxStats(
+        interval=60.0,
+        metrics_path="real_data/logs/" + timestamp + "_metrics.jsonl",
+    )
+
+    if cache_path is not None:
+        observations = open_cache(datafiles, cache_path)
+    elif stream:
+        observations = prefetch(read_chunks(datafiles))
+    else:
+        observations = pd.concat(
+            [pd.read_csv(datafile, compression="zip") for datafile in datafiles],
+            ignore_index=True,
+        )
 
-    obs_df = pd.read_csv(datafile, compression="zip")
-    res = trigger_mux(obs_df, trigger, threshold_array, stride=18750, **parameters)
+    if stream:
+        res = trigger_mux(
+            observations,
+            trigger,
+            threshold_array,
+            stride=18750,
+            stats=stats,
+            **parameters,
+        )
+    else:
+        # detectors run in parallel, over all the available cores.
+        res = trigger_mux_parallel(
+            observations,
+            trigger,
+            threshold_array,
+            stride=18750,
+            n_jobs=-1,
+            stats=stats,
+            **parameters,
+        )
     print("I've found {} triggers. I'm done, ciao!.".format(len(res)))
@@ -6,8 +6,8 @@ import warnings
 
 import matplotlib.pyplot as plt
 import numpy as np
-import scipy.special as sps
 import scipy.stats as sts
+from algorithms.significance import significance
 
 warnings.filterwarnings("ignore")
 import seaborn as sns
@@ -33,8 +33,7 @@ def make_data(length, b_rate, t_rate, t_time, t_len):
 
 
 def snr(n, b):
-    pvalue = sps.pdtrc(n, b)
-    return -sps.ndtri(pvalue)
+    return significance(n, b)
 
 
 def make_count_matrix(cs):
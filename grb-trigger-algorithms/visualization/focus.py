@@ -85,6 +85,9 @@ class Focus:
                 self.global_max = m
                 self.time_offset = acc.t - p.t
             i -= 1
+            if i == 0:
+                # the tail curve is never tested.
+                break
             p = self.curve_list[i]
             m = p.ymax(acc)
             checked_maxima.append(p)
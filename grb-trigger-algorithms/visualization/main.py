@@ -1,16 +1,20 @@
 """
 Main script for producing checker plots.
+Run from the `grb-trigger-algorithms` folder:
+
+    python -m visualization.main
 """
 
-import checkers
 import matplotlib.pyplot as plt
-from data import data
-from focus import focus
+from visualization import checkers
+from visualization.data import data
+from visualization.focus import focus
 
 if __name__ == "__main__":
     from pathlib import Path
 
-    Path("outputs/").mkdir(parents=True, exist_ok=True)
+    outputs = Path(__file__).parent / "outputs"
+    outputs.mkdir(parents=True, exist_ok=True)
     mc = checkers.make_count_matrix(data.counts)
 
     # GBM-like
@@ -30,7 +34,7 @@ if __name__ == "__main__":
         data.transient_len,
         print_significance=True,
     )
-    fig.savefig("outputs/checkers_gbm.png", dpi=300)
+    fig.savefig(outputs / "checkers_gbm.png", dpi=300)
     plt.close()
 
     # BATSE-like
@@ -50,7 +54,7 @@ if __name__ == "__main__":
         data.transient_len,
         print_significance=True,
     )
-    fig.savefig("outputs/checkers_batse.png", dpi=300)
+    fig.savefig(outputs / "checkers_batse.png", dpi=300)
     plt.close()
 
     # FOCuS
@@ -67,5 +71,5 @@ if __name__ == "__main__":
         data.transient_len,
         maxima_matrix=max_matrix,
     )
-    fig.savefig("outputs/checkers_focus.png", dpi=300)
+    fig.savefig(outputs / "checkers_focus.png", dpi=300)
     plt.close()